@@ -0,0 +1,244 @@
+import os
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Mixed into version-derived tags: the state versions are per-process counters,
+# so a tag from another worker or from before a restart must never match
+BOOT_NONCE = os.urandom(8).hex()
+
+# Tells browsers to revalidate with If-None-Match before reusing a cached body
+CACHE_CONTROL = "no-cache"
+
+# Returns a tag for the state behind an endpoint, or None when the state
+# cannot be versioned cheaply (the response body is hashed instead)
+VersionFunction = Callable[[QueryParams], Optional[str]]
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from state versions or a response body.
+
+    Weak tags are used because compression changes the bytes on the wire.
+
+    Args:
+        *parts: Values identifying the representation
+
+    Returns:
+        str: ETag header value
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return f'W/"{digest.hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+
+    Args:
+        if_none_match (Optional[str]): Header value from the request
+        etag (str): Current ETag
+
+    Returns:
+        bool: True if the client already has this representation
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    wanted = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == wanted:
+            return True
+    return False
+
+class EndpointCacheStats:
+    """
+    Conditional request counters for one endpoint.
+    """
+
+    __slots__ = ('requests', 'conditional', 'not_modified', 'version_hits', 'body_hashes')
+
+    def __init__(self):
+        self.requests = 0
+        self.conditional = 0
+        self.not_modified = 0
+        self.version_hits = 0
+        self.body_hashes = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'conditional_requests': self.conditional,
+            'not_modified': self.not_modified,
+            # 304s answered from state versions, without running the handler
+            'not_modified_without_handler': self.version_hits,
+            'body_hashed': self.body_hashes,
+            'hit_ratio': round(self.not_modified / self.requests, 4) if self.requests else 0.0
+        }
+
+class ConditionalRoutes:
+    """
+    Registry of the endpoints that support conditional GETs, with their counters.
+    """
+
+    def __init__(self):
+        self.versions: Dict[str, VersionFunction] = {}
+        self._stats: Dict[str, EndpointCacheStats] = {}
+        self._lock = threading.Lock()
+
+    def register(self, path: str, version: VersionFunction) -> None:
+        """
+        Enable conditional GETs for a path.
+
+        Args:
+            path (str): Request path, e.g. /api/containers
+            version (VersionFunction): Returns the state version for the request's
+                query parameters, or None to hash the body instead. Runs on the
+                event loop, so it must be cheap and non-blocking.
+        """
+        self.versions[path] = version
+        self._stats[path] = EndpointCacheStats()
+
+    def count(self, path: str, field: str) -> None:
+        with self._lock:
+            stats = self._stats[path]
+            setattr(stats, field, getattr(stats, field) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-endpoint conditional request counters and hit ratios.
+
+        Returns:
+            Dict[str, Any]: Counters keyed by path
+        """
+        with self._lock:
+            return {path: stats.to_dict() for path, stats in self._stats.items()}
+
+class ConditionalGetMiddleware:
+    """
+    ETag / If-None-Match support for polled GET endpoints.
+
+    When an endpoint's state can be versioned cheaply (inventory generation,
+    settings version, log sequence...) the ETag is derived from that version,
+    the query string and the process's boot nonce, and a matching If-None-Match is answered with 304
+    before the handler runs. Otherwise the response body is buffered and
+    hashed, which still saves the transfer.
+    """
+
+    def __init__(self, app: ASGIApp, routes: ConditionalRoutes):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or scope["path"] not in self.routes.versions:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        self.routes.count(path, 'requests')
+        if if_none_match:
+            self.routes.count(path, 'conditional')
+
+        version = None
+        try:
+            version = self.routes.versions[path](QueryParams(scope.get("query_string", b"")))
+        except Exception as e:
+            logger.warning(f"Could not compute the state version of {path}: {str(e)}")
+
+        if version is None:
+            await self._hashed(scope, receive, send, path, if_none_match)
+            return
+
+        etag = make_etag(BOOT_NONCE, path, version, scope.get("query_string", b""))
+        if etag_matches(if_none_match, etag):
+            self.routes.count(path, 'not_modified')
+            self.routes.count(path, 'version_hits')
+            await self._send_not_modified(send, etag)
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = etag
+                headers["Cache-Control"] = CACHE_CONTROL
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    async def _hashed(self, scope: Scope, receive: Receive, send: Send, path: str, if_none_match: Optional[str]) -> None:
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def buffer(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            if start["status"] != 200:
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            etag = make_etag(body)
+            self.routes.count(path, 'body_hashes')
+            if etag_matches(if_none_match, etag):
+                self.routes.count(path, 'not_modified')
+                await self._send_not_modified(send, etag)
+                return
+
+            headers = MutableHeaders(scope=start)
+            headers["ETag"] = etag
+            headers["Cache-Control"] = CACHE_CONTROL
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffer)
+
+    async def _send_not_modified(self, send: Send, etag: str) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 304,
+            "headers": [(b"etag", etag.encode("latin-1")), (b"cache-control", CACHE_CONTROL.encode("latin-1"))]
+        })
+        await send({"type": "http.response.body", "body": b""})
+
+class CompressionMiddleware:
+    """
+    GZip for regular GET responses.
+
+    Streamed endpoints (paths ending in /stream) and non-GET requests pass
+    through untouched, so chunked NDJSON and SSE bodies are never held back
+    by the compressor.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD") and not scope["path"].endswith("/stream"):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
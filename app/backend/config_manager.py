@@ -1,32 +1,121 @@
+import copy
 import json
 import os
+import time
 import logging
-from typing import List, Dict, Any, Set
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from backend import state_store as state
 
 logger = logging.getLogger(__name__)
 
+# Legacy settings file, imported into the state store once at startup
 SETTINGS_FILE = "/data/settings.json"
 
-def load_settings() -> Dict[str, Any]:
+# Reads re-check the store's settings generation at most this often; writes always re-check
+SETTINGS_REVALIDATE_SECONDS = float(os.getenv("SETTINGS_REVALIDATE_SECONDS", "2"))
+
+DEFAULT_SETTINGS = {"disabled_containers": []}
+
+class _Snapshot:
+    """Immutable copy of the stored settings; replaced as a whole so readers need no lock"""
+
+    __slots__ = ('path', 'generation', 'settings', 'disabled', 'version', 'checked_at')
+
+    def __init__(self, path, generation, settings, version, checked_at):
+        self.path = path
+        self.generation = generation
+        self.settings = settings
+        self.disabled = frozenset(settings.get("disabled_containers", [])) if settings else frozenset()
+        self.version = version
+        self.checked_at = checked_at
+
+# In-memory copy of the stored settings; writers hold _lock
+_lock = threading.RLock()
+_cache = _Snapshot(None, None, None, 0, 0.0)
+# Held while settings_version has a revalidation running
+_background = threading.Lock()
+
+def _store() -> state.StateStore:
+    """Get the state store holding the settings"""
+    return state.get_state_store()
+
+def migrate_legacy_settings() -> None:
     """
-    Load settings from the JSON file.
+    Import the legacy settings file into the state store if that has not happened yet.
 
-    Returns:
-        Dict[str, Any]: The settings dictionary.
+    Only called at startup, so reading settings never touches the legacy file.
     """
-    if not os.path.exists(SETTINGS_FILE):
-        return {"disabled_containers": []}
+    with _lock:
+        store = _store()
+        if not store.imported(SETTINGS_FILE):
+            _import_legacy_settings(store)
+            _revalidate(force=True)
+
+def _import_legacy_settings(store: state.StateStore) -> None:
+    settings = {}
+    if os.path.exists(SETTINGS_FILE):
+        try:
+            with open(SETTINGS_FILE, 'r') as f:
+                settings = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load legacy settings {SETTINGS_FILE}: {e}")
+            return
+    store.import_settings(SETTINGS_FILE, settings)
+    if os.path.exists(SETTINGS_FILE):
+        os.replace(SETTINGS_FILE, SETTINGS_FILE + ".migrated")
+        logger.info(f"Migrated {SETTINGS_FILE} into {store.path}")
+
+def _key() -> str:
+    return state.get_state_store().path
+
+def _refresh(store: state.StateStore, generation: int) -> _Snapshot:
+    global _cache
+    _cache = _Snapshot(store.path, generation, store.load_settings(), _cache.version + 1, time.monotonic())
+    return _cache
+
+def _revalidate(force: bool = False) -> _Snapshot:
+    """Reload the cache if the stored settings changed; must hold _lock"""
+    global _cache
+    cache = _cache
+    now = time.monotonic()
+    if not force and cache.path == _key() and now - cache.checked_at < SETTINGS_REVALIDATE_SECONDS:
+        return cache
 
     try:
-        with open(SETTINGS_FILE, 'r') as f:
-            return json.load(f)
+        store = _store()
+        generation = store.settings_generation()
+        if cache.path == store.path and generation == cache.generation and cache.settings is not None:
+            _cache = _Snapshot(cache.path, cache.generation, cache.settings, cache.version, now)
+            return _cache
+        return _refresh(store, generation)
     except Exception as e:
         logger.error(f"Failed to load settings: {e}")
-        return {"disabled_containers": []}
+        if cache.settings is not None:
+            return cache
+        return _Snapshot(None, None, copy.deepcopy(DEFAULT_SETTINGS), cache.version, 0.0)
+
+def _current() -> _Snapshot:
+    # Fast path: a fresh snapshot is read without taking the lock or querying the store
+    cache = _cache
+    if cache.path == _key() and time.monotonic() - cache.checked_at < SETTINGS_REVALIDATE_SECONDS:
+        return cache
+    with _lock:
+        return _revalidate()
+
+def load_settings() -> Dict[str, Any]:
+    """
+    Load settings from the in-memory cache, re-reading the state store if it changed.
+
+    Returns:
+        Dict[str, Any]: A copy of the settings dictionary.
+    """
+    return copy.deepcopy(_current().settings)
 
 def save_settings(settings: Dict[str, Any]) -> bool:
     """
-    Save settings to the JSON file.
+    Replace the stored settings and update the cache.
 
     Args:
         settings (Dict[str, Any]): The settings dictionary to save.
@@ -34,14 +123,60 @@ def save_settings(settings: Dict[str, Any]) -> bool:
     Returns:
         bool: True if successful, False otherwise.
     """
+    def replace(current: Dict[str, Any]) -> None:
+        current.clear()
+        current.update(copy.deepcopy(settings))
+
+    return update_settings(replace) is not None
+
+def update_settings(mutate: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+    """
+    Apply a read-modify-write change to the settings in one store transaction.
+
+    The settings are re-read inside the transaction, so changes made by
+    other threads or processes are never lost.
+
+    Args:
+        mutate (Callable[[Dict[str, Any]], None]): Changes the settings dictionary in place.
+
+    Returns:
+        Optional[Dict[str, Any]]: A copy of the saved settings, or None if saving failed.
+    """
+    with _lock:
+        try:
+            store = _store()
+            with store.transaction() as conn:
+                settings = store.load_settings()
+                mutate(settings)
+                store.save_settings(conn, settings)
+            _refresh(store, store.settings_generation())
+            return copy.deepcopy(settings)
+        except Exception as e:
+            logger.error(f"Failed to save settings: {e}")
+            return None
+
+def settings_version() -> str:
+    """
+    Get a cheap version tag for the settings, changing whenever they are rewritten.
+
+    Only the in-memory snapshot is read, so this is safe on the event loop. A
+    snapshot due for revalidation is re-checked against the store on a
+    background thread; the tag moves on once that has seen a change.
+
+    Returns:
+        str: Version tag of the cached settings.
+    """
+    cache = _cache
+    if time.monotonic() - cache.checked_at >= SETTINGS_REVALIDATE_SECONDS and _background.acquire(blocking=False):
+        threading.Thread(target=_revalidate_in_background, name="settings-revalidate", daemon=True).start()
+    return f"{cache.version}-{cache.generation or 0}"
+
+def _revalidate_in_background() -> None:
     try:
-        os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(settings, f, indent=2)
-        return True
-    except Exception as e:
-        logger.error(f"Failed to save settings: {e}")
-        return False
+        with _lock:
+            _revalidate()
+    finally:
+        _background.release()
 
 def get_disabled_containers() -> Set[str]:
     """
@@ -50,8 +185,7 @@ def get_disabled_containers() -> Set[str]:
     Returns:
         Set[str]: Set of disabled container IDs.
     """
-    settings = load_settings()
-    return set(settings.get("disabled_containers", []))
+    return set(_current().disabled)
 
 def set_disabled_containers(disabled_ids: List[str]) -> bool:
     """
@@ -63,6 +197,30 @@ def set_disabled_containers(disabled_ids: List[str]) -> bool:
     Returns:
         bool: True if successful.
     """
-    settings = load_settings()
-    settings["disabled_containers"] = disabled_ids
-    return save_settings(settings)
+    def replace(settings: Dict[str, Any]) -> None:
+        settings["disabled_containers"] = list(disabled_ids)
+
+    return update_settings(replace) is not None
+
+def update_disabled_containers(enabled: Iterable[str] = (), disabled: Iterable[str] = ()) -> Set[str]:
+    """
+    Enable and disable containers in one atomic settings update.
+
+    Args:
+        enabled (Iterable[str]): IDs to remove from the disabled list.
+        disabled (Iterable[str]): IDs to add to the disabled list.
+
+    Returns:
+        Set[str]: The disabled container IDs after the update.
+
+    Raises:
+        Exception: If the settings could not be saved.
+    """
+    with _lock:
+        try:
+            store = _store()
+            updated = store.update_disabled(enabled, disabled)
+            _refresh(store, store.settings_generation())
+            return updated
+        except Exception as e:
+            raise Exception(f"Failed to save settings: {e}")
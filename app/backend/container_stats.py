@@ -1,16 +1,35 @@
+import re
 import docker
 import logging
-from typing import List, Dict, Any, Optional
+from typing import Iterable, Iterator, List, Dict, Any, Optional
 from datetime import datetime
 
+from backend.docker_clients import get_client, lease
+from backend.cgroup_stats import local_stats
+from backend.json_logs import local_logs
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Longest partial line buffered while streaming; longer lines are split
+MAX_LOG_LINE_BYTES = 64 * 1024
+
+# Severity keywords recognised in log messages, mapped to a canonical level
+LOG_LEVEL_PATTERN = re.compile(r'\b(TRACE|DEBUG|INFO|NOTICE|WARN(?:ING)?|ERR(?:OR)?|CRIT(?:ICAL)?|FATAL|PANIC)\b', re.IGNORECASE)
+LOG_LEVELS = {
+    'trace': 'trace', 'debug': 'debug', 'info': 'info', 'notice': 'info',
+    'warn': 'warning', 'warning': 'warning', 'err': 'error', 'error': 'error',
+    'crit': 'critical', 'critical': 'critical', 'fatal': 'critical', 'panic': 'critical'
+}
+
 def get_container_stats(container_id: str, remote_host: str = None) -> Dict[str, Any]:
     """
     Get statistics for a specific container.
     
+    Local containers are read from their cgroup v2 files when the host has
+    them; the Docker API's two-sample stats call is the fallback.
+    
     Args:
         container_id (str): The ID of the container to get statistics for
         remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
@@ -18,13 +37,14 @@ def get_container_stats(container_id: str, remote_host: str = None) -> Dict[str,
     Returns:
         Dict[str, Any]: Container statistics
     """
+    if not remote_host and local_stats.available():
+        figures = local_stats.sample(container_id)
+        if figures is not None:
+            return stats_document(container_id, **figures)
+
     try:
-        # Initialize Docker client
-        if remote_host:
-            client = docker.DockerClient(base_url=remote_host)
-            logger.info(f"Connected to remote Docker host: {remote_host}")
-        else:
-            client = docker.from_env()
+        # Get the shared Docker client for this host
+        client = get_client(remote_host)
         
         # Get container
         container = client.containers.get(container_id)
@@ -32,77 +52,7 @@ def get_container_stats(container_id: str, remote_host: str = None) -> Dict[str,
         # Get container stats
         stats = container.stats(stream=False)
         
-        # Process CPU stats
-        cpu_stats = stats.get('cpu_stats', {})
-        precpu_stats = stats.get('precpu_stats', {})
-        
-        cpu_usage = cpu_stats.get('cpu_usage', {}).get('total_usage', 0)
-        precpu_usage = precpu_stats.get('cpu_usage', {}).get('total_usage', 0)
-        system_cpu_usage = cpu_stats.get('system_cpu_usage', 0)
-        precpu_system_usage = precpu_stats.get('system_cpu_usage', 0)
-        online_cpus = cpu_stats.get('online_cpus', 1)
-        
-        # Calculate CPU percentage
-        cpu_percent = 0.0
-        if system_cpu_usage > 0 and precpu_system_usage > 0:
-            cpu_delta = cpu_usage - precpu_usage
-            system_delta = system_cpu_usage - precpu_system_usage
-            if system_delta > 0 and cpu_delta > 0:
-                cpu_percent = (cpu_delta / system_delta) * online_cpus * 100.0
-        
-        # Process memory stats
-        memory_stats = stats.get('memory_stats', {})
-        memory_usage = memory_stats.get('usage', 0)
-        memory_limit = memory_stats.get('limit', 1)
-        memory_percent = (memory_usage / memory_limit) * 100.0 if memory_limit > 0 else 0
-        
-        # Process network stats
-        networks = stats.get('networks', {})
-        network_rx_bytes = 0
-        network_tx_bytes = 0
-        
-        for interface, data in networks.items():
-            network_rx_bytes += data.get('rx_bytes', 0)
-            network_tx_bytes += data.get('tx_bytes', 0)
-        
-        # Process block I/O stats
-        blkio_stats = stats.get('blkio_stats', {})
-        io_service_bytes_recursive = blkio_stats.get('io_service_bytes_recursive', [])
-        
-        block_read = 0
-        block_write = 0
-        
-        for io_stat in io_service_bytes_recursive:
-            if io_stat.get('op') == 'Read':
-                block_read += io_stat.get('value', 0)
-            elif io_stat.get('op') == 'Write':
-                block_write += io_stat.get('value', 0)
-        
-        # Format the stats
-        formatted_stats = {
-            'id': container_id,
-            'name': container.name,
-            'timestamp': datetime.now().isoformat(),
-            'cpu': {
-                'usage_percent': round(cpu_percent, 2),
-                'online_cpus': online_cpus
-            },
-            'memory': {
-                'usage': memory_usage,
-                'limit': memory_limit,
-                'usage_percent': round(memory_percent, 2)
-            },
-            'network': {
-                'rx_bytes': network_rx_bytes,
-                'tx_bytes': network_tx_bytes
-            },
-            'disk': {
-                'read_bytes': block_read,
-                'write_bytes': block_write
-            }
-        }
-        
-        return formatted_stats
+        return format_container_stats(container_id, container.name, stats)
         
     except docker.errors.NotFound:
         logger.error(f"Container {container_id} not found")
@@ -114,48 +64,186 @@ def get_container_stats(container_id: str, remote_host: str = None) -> Dict[str,
         logger.error(f"Error getting container stats: {str(e)}")
         raise Exception(f"Error getting container stats: {str(e)}")
 
-def get_container_logs(container_id: str, lines: int = 100, remote_host: str = None) -> List[str]:
+def prime_container_stats(container_id: str, remote_host: str = None) -> None:
+    """
+    Take a local container's CPU baseline ahead of get_container_stats.
+    
+    A container read from its cgroup for the first time is measured over a
+    short interval from its baseline; priming all the containers of a bulk
+    read first makes them share that interval.
+    
+    Args:
+        container_id (str): The ID of the container
+        remote_host (str, optional): Remote Docker host URL; remote containers need no baseline
+    """
+    if not remote_host and local_stats.available():
+        local_stats.prime(container_id)
+
+def format_container_stats(container_id: str, name: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute CPU, memory, network and block I/O figures from a raw stats sample.
+    
+    Args:
+        container_id (str): The ID of the container the sample belongs to
+        name (str): The container name
+        stats (Dict[str, Any]): Raw sample as returned by the Docker stats API
+    
+    Returns:
+        Dict[str, Any]: Container statistics
+    """
+    # Process CPU stats
+    cpu_stats = stats.get('cpu_stats', {})
+    precpu_stats = stats.get('precpu_stats', {})
+    
+    cpu_usage = cpu_stats.get('cpu_usage', {}).get('total_usage', 0)
+    precpu_usage = precpu_stats.get('cpu_usage', {}).get('total_usage', 0)
+    system_cpu_usage = cpu_stats.get('system_cpu_usage', 0)
+    precpu_system_usage = precpu_stats.get('system_cpu_usage', 0)
+    online_cpus = cpu_stats.get('online_cpus', 1)
+    
+    # Calculate CPU percentage
+    cpu_percent = 0.0
+    if system_cpu_usage > 0 and precpu_system_usage > 0:
+        cpu_delta = cpu_usage - precpu_usage
+        system_delta = system_cpu_usage - precpu_system_usage
+        if system_delta > 0 and cpu_delta > 0:
+            cpu_percent = (cpu_delta / system_delta) * online_cpus * 100.0
+    
+    # Process memory stats
+    memory_stats = stats.get('memory_stats', {})
+    memory_usage = memory_stats.get('usage', 0)
+    memory_limit = memory_stats.get('limit', 1)
+    
+    # Process network stats
+    networks = stats.get('networks', {})
+    network_rx_bytes = 0
+    network_tx_bytes = 0
+    
+    for interface, data in networks.items():
+        network_rx_bytes += data.get('rx_bytes', 0)
+        network_tx_bytes += data.get('tx_bytes', 0)
+    
+    # Process block I/O stats
+    blkio_stats = stats.get('blkio_stats', {})
+    io_service_bytes_recursive = blkio_stats.get('io_service_bytes_recursive', [])
+    
+    block_read = 0
+    block_write = 0
+    
+    for io_stat in io_service_bytes_recursive:
+        if io_stat.get('op') == 'Read':
+            block_read += io_stat.get('value', 0)
+        elif io_stat.get('op') == 'Write':
+            block_write += io_stat.get('value', 0)
+    
+    return stats_document(
+        container_id, name, cpu_percent, online_cpus, memory_usage, memory_limit,
+        network_rx_bytes, network_tx_bytes, block_read, block_write
+    )
+
+def stats_document(
+    container_id: str,
+    name: str,
+    cpu_percent: float,
+    online_cpus: int,
+    memory_usage: int,
+    memory_limit: int,
+    network_rx_bytes: int,
+    network_tx_bytes: int,
+    block_read: int,
+    block_write: int
+) -> Dict[str, Any]:
+    """
+    Build the statistics document served for a container, whatever the source of the figures.
+    
+    Args:
+        container_id (str): The ID of the container
+        name (str): The container name
+        cpu_percent (float): CPU usage, 100 per fully used CPU
+        online_cpus (int): CPUs available to the container
+        memory_usage (int): Memory in use, in bytes
+        memory_limit (int): Memory limit (or host memory), in bytes
+        network_rx_bytes (int): Bytes received over all interfaces
+        network_tx_bytes (int): Bytes sent over all interfaces
+        block_read (int): Bytes read from block devices
+        block_write (int): Bytes written to block devices
+    
+    Returns:
+        Dict[str, Any]: Container statistics
+    """
+    memory_percent = (memory_usage / memory_limit) * 100.0 if memory_limit > 0 else 0
+    
+    # Format the stats
+    formatted_stats = {
+        'id': container_id,
+        'name': name,
+        'timestamp': datetime.now().isoformat(),
+        'cpu': {
+            'usage_percent': round(cpu_percent, 2),
+            'online_cpus': online_cpus
+        },
+        'memory': {
+            'usage': memory_usage,
+            'limit': memory_limit,
+            'usage_percent': round(memory_percent, 2)
+        },
+        'network': {
+            'rx_bytes': network_rx_bytes,
+            'tx_bytes': network_tx_bytes
+        },
+        'disk': {
+            'read_bytes': block_read,
+            'write_bytes': block_write
+        }
+    }
+    
+    return formatted_stats
+
+def get_container_logs(
+    container_id: str,
+    lines: int = 100,
+    remote_host: str = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None
+) -> List[str]:
     """
     Get logs for a specific container.
     
+    Local containers using the json-file driver are read straight from their
+    log files; other containers go through the Docker API.
+    
     Args:
         container_id (str): The ID of the container to get logs for
         lines (int, optional): Number of log lines to retrieve. Defaults to 100.
         remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+        since (float, optional): Only lines at or after this epoch timestamp
+        until (float, optional): Only lines at or before this epoch timestamp
     
     Returns:
         List[str]: Container log lines
     """
+    if not remote_host:
+        formatted_logs = local_logs.read(container_id, lines, since, until)
+        if formatted_logs is not None:
+            return formatted_logs
+    
     try:
-        # Initialize Docker client
-        if remote_host:
-            client = docker.DockerClient(base_url=remote_host)
-            logger.info(f"Connected to remote Docker host: {remote_host}")
-        else:
-            client = docker.from_env()
+        # Get the shared Docker client for this host
+        client = get_client(remote_host)
         
         # Get container
         container = client.containers.get(container_id)
         
         # Get container logs
-        logs = container.logs(tail=lines, timestamps=True).decode('utf-8').splitlines()
+        options = {'tail': lines, 'timestamps': True}
+        if since is not None:
+            options['since'] = since
+        if until is not None:
+            options['until'] = until
+        logs = container.logs(**options).decode('utf-8').splitlines()
         
         # Format logs with timestamps
-        formatted_logs = []
-        for log in logs:
-            # Try to split timestamp and message
-            parts = log.split(' ', 1)
-            if len(parts) >= 2:
-                timestamp, message = parts[0], parts[1]
-                formatted_logs.append({
-                    'timestamp': timestamp,
-                    'message': message
-                })
-            else:
-                formatted_logs.append({
-                    'timestamp': '',
-                    'message': log
-                })
+        formatted_logs = [parse_log_line(log) for log in logs]
         
         return formatted_logs
         
@@ -167,4 +255,168 @@ def get_container_logs(container_id: str, lines: int = 100, remote_host: str = N
         raise Exception(f"Failed to connect to Docker daemon: {str(e)}")
     except Exception as e:
         logger.error(f"Error getting container logs: {str(e)}")
-        raise Exception(f"Error getting container logs: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error getting container logs: {str(e)}")
+
+def parse_log_line(line: str) -> Dict[str, str]:
+    """
+    Split a log line read with timestamps into its timestamp and message.
+    
+    Args:
+        line (str): Log line as returned by the Docker logs API
+    
+    Returns:
+        Dict[str, str]: Log entry with timestamp and message
+    """
+    # Try to split timestamp and message
+    parts = line.split(' ', 1)
+    if len(parts) >= 2:
+        return {'timestamp': parts[0], 'message': parts[1]}
+    return {'timestamp': '', 'message': line}
+
+def detect_log_level(message: str) -> Optional[str]:
+    """
+    Guess the severity of a log message from the first level keyword in it.
+    
+    Args:
+        message (str): Log message
+    
+    Returns:
+        Optional[str]: trace, debug, info, warning, error or critical; None if unknown
+    """
+    match = LOG_LEVEL_PATTERN.search(message)
+    return LOG_LEVELS[match.group(1).lower()] if match else None
+
+class LogFilter:
+    """
+    Server-side filter applied to each streamed log entry.
+    
+    Only substring and level checks are offered: a client-supplied regular
+    expression could backtrack for seconds on every line of a stream.
+    """
+    
+    def __init__(self, contains: str = None, levels: Iterable[str] = None):
+        """
+        Args:
+            contains (str, optional): Substring the message must contain
+            levels (Iterable[str], optional): Accepted levels (e.g. warning, error)
+        
+        Raises:
+            ValueError: If a level is unknown
+        """
+        self.contains = contains or None
+        self.levels = None
+        if levels:
+            self.levels = {LOG_LEVELS.get(level.strip().lower()) for level in levels if level.strip()}
+            if None in self.levels:
+                raise ValueError(f"Unknown log level, expected one of {', '.join(sorted(set(LOG_LEVELS.values())))}")
+    
+    def matches(self, entry: Dict[str, Any]) -> bool:
+        if self.levels and entry.get('level') not in self.levels:
+            return False
+        if self.contains and self.contains not in entry['message']:
+            return False
+        return True
+
+class LogStream:
+    """
+    Incremental reader over a container's log stream.
+    
+    Chunks from ``logs(stream=True)`` are split into lines as they arrive, so
+    only the current partial line is ever buffered regardless of log volume.
+    Reads that do not follow a local json-file container come from its log
+    files instead of the daemon.
+    ``close`` may be called from another thread to end a follow-mode read.
+    """
+    
+    def __init__(
+        self,
+        container_id: str,
+        tail: Optional[int] = 100,
+        follow: bool = True,
+        since: Optional[float] = None,
+        log_filter: LogFilter = None,
+        remote_host: str = None
+    ):
+        self.container_id = container_id
+        self.tail = tail
+        self.follow = follow
+        self.since = since
+        self.log_filter = log_filter or LogFilter()
+        self.remote_host = remote_host
+        self.lines_read = 0
+        self._raw = None
+        self._closed = False
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not self.follow and not self.remote_host:
+            local = local_logs.read(self.container_id, self.tail, self.since)
+            if local is not None:
+                for entry in local:
+                    if self._closed:
+                        return
+                    entry = self._accept(entry)
+                    if entry is not None:
+                        yield entry
+                return
+        
+        # The client stays open for as long as the stream is read
+        with lease(self.remote_host):
+            yield from self._daemon_entries()
+
+    def _daemon_entries(self) -> Iterator[Dict[str, Any]]:
+        try:
+            container = get_client(self.remote_host).containers.get(self.container_id)
+            options = {'stream': True, 'follow': self.follow, 'timestamps': True, 'tail': 'all' if self.tail is None else self.tail}
+            if self.since is not None:
+                options['since'] = self.since
+            self._raw = container.logs(**options)
+        except docker.errors.NotFound:
+            logger.error(f"Container {self.container_id} not found")
+            raise Exception(f"Container {self.container_id} not found")
+        except docker.errors.DockerException as e:
+            logger.error(f"Docker error: {str(e)}")
+            raise Exception(f"Failed to connect to Docker daemon: {str(e)}")
+        
+        if self._closed:
+            self.close()
+        
+        partial = b''
+        try:
+            for chunk in self._raw:
+                lines = (partial + chunk).split(b'\n')
+                partial = lines.pop()
+                if len(partial) > MAX_LOG_LINE_BYTES:
+                    lines.append(partial)
+                    partial = b''
+                for line in lines:
+                    entry = self._entry(line)
+                    if entry is not None:
+                        yield entry
+            if partial:
+                entry = self._entry(partial)
+                if entry is not None:
+                    yield entry
+        except Exception as e:
+            # Closing the stream from another thread surfaces as a read error
+            if not self._closed:
+                logger.error(f"Error streaming container logs: {str(e)}")
+                raise Exception(f"Error streaming container logs: {str(e)}")
+    
+    def close(self) -> None:
+        """
+        Stop reading, unblocking a follow-mode read waiting for new lines.
+        """
+        self._closed = True
+        if self._raw is not None:
+            try:
+                self._raw.close()
+            except Exception:
+                pass
+    
+    def _entry(self, line: bytes) -> Optional[Dict[str, Any]]:
+        return self._accept(parse_log_line(line.decode('utf-8', errors='replace').rstrip('\r')))
+    
+    def _accept(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self.lines_read += 1
+        entry['level'] = detect_log_level(entry['message'])
+        return entry if self.log_filter.matches(entry) else None
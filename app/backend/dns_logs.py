@@ -1,39 +1,250 @@
 import os
 import json
+import time
+import ipaddress
 import logging
+import threading
+from collections import deque
+from itertools import islice
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
+
+from backend.state_store import StateStore, get_state_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Default log file path
-DEFAULT_LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'dns_access.json')
+# Legacy log files (JSON Lines segments and the older single JSON array),
+# imported into the state store on first use
+DEFAULT_LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'dns_access.jsonl')
+
+# Rotated legacy segments looked for when importing (<path>.1 ... <path>.N)
+LEGACY_MAX_SEGMENTS = 32
+
+# Passes over the legacy segments when a writer still rotates them during the import
+LEGACY_IMPORT_ATTEMPTS = 3
+
+# Events older than this are deleted from the store (0 keeps everything)
+DEFAULT_RETENTION_DAYS = float(os.getenv("DNS_LOG_RETENTION_DAYS", "30"))
+
+# Retention runs at most this often while entries are appended
+RETENTION_INTERVAL_SECONDS = 3600
+
+# Number of rejected entries described in a batch response
+MAX_REPORTED_ERRORS = 20
+
+# Number of recent entries kept in memory
+DEFAULT_BUFFER_SIZE = int(os.getenv("DNS_LOG_BUFFER_SIZE", "1000"))
 
-def ensure_log_directory(log_file: str = DEFAULT_LOG_FILE) -> None:
+class DnsAccess:
     """
-    Ensure the log directory exists.
-    
+    Compact record of one DNS access held in the in-memory buffer.
+    """
+
+    __slots__ = ("timestamp", "ip_address", "domain")
+
+    def __init__(self, timestamp: str, ip_address: str, domain: str):
+        self.timestamp = timestamp
+        self.ip_address = ip_address
+        self.domain = domain
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> "DnsAccess":
+        return cls(entry.get("timestamp", ""), entry.get("ip_address", ""), entry.get("domain", ""))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"timestamp": self.timestamp, "ip_address": self.ip_address, "domain": self.domain}
+
+class DnsLogStore:
+    """
+    DNS access log kept in the dns_access table of the state store.
+
+    Entries are inserted in one transaction per append and indexed by time,
+    domain and client, so windowed queries are index range scans. The newest
+    ``buffer_size`` entries are also kept in a ring buffer, filled on every
+    append and rebuilt from the table on first use, so reading recent entries
+    needs no database access.
+    """
+
+    def __init__(
+        self,
+        state: StateStore,
+        legacy_path: str = DEFAULT_LOG_FILE,
+        retention_days: float = DEFAULT_RETENTION_DAYS,
+        buffer_size: int = DEFAULT_BUFFER_SIZE
+    ):
+        self.state = state
+        self.legacy_path = legacy_path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=buffer_size)
+        self._recent_loaded = False
+        self._pruned_at = 0.0
+        self.sequence = 0
+
+    def append(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Insert entries in a single transaction.
+
+        Args:
+            entries (List[Dict[str, Any]]): Log entries with timestamp, ip_address and domain
+        """
+        if not entries:
+            return
+        with self._lock:
+            self._load_recent()
+            self.sequence = self.state.record_dns_accesses(entries)
+            self._recent.extend(DnsAccess.from_dict(entry) for entry in entries)
+            self._apply_retention()
+
+    def recent(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Get the newest entries from the in-memory ring buffer, which holds at
+        most ``buffer_size`` entries.
+
+        Args:
+            count (int): Maximum number of entries to return
+
+        Returns:
+            List[Dict[str, Any]]: Entries, newest first
+        """
+        with self._lock:
+            self._load_recent()
+            records = list(islice(reversed(self._recent), count))
+        return [record.to_dict() for record in records]
+
+    def load(self) -> None:
+        """
+        Rebuild the ring buffer if that has not happened yet.
+        """
+        with self._lock:
+            self._load_recent()
+            self._apply_retention()
+
+    def hits(self, since: float, until: Optional[float] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Count accesses per domain in a time window.
+
+        Args:
+            since (float): Window start, epoch seconds
+            until (Optional[float]): Window end, epoch seconds
+            limit (int): Maximum number of domains
+
+        Returns:
+            List[Dict[str, Any]]: Domains with hit counts, busiest first
+        """
+        return self.state.dns_hits(since, until, limit)
+
+    def migrate(self) -> None:
+        """
+        Import the legacy log files, then rebuild the ring buffer from the table.
+        """
+        with self._lock:
+            migrate_legacy_log(self)
+            self._recent.clear()
+            self._recent_loaded = False
+
+    def _load_recent(self) -> None:
+        if self._recent_loaded:
+            return
+        newest_first = self.state.recent_dns_accesses(self._recent.maxlen)
+        self._recent.extend(DnsAccess.from_dict(entry) for entry in reversed(newest_first))
+        self.sequence = self.state.last_dns_access_id()
+        self._recent_loaded = True
+
+    def _apply_retention(self) -> None:
+        if self.retention_days <= 0 or time.time() - self._pruned_at < RETENTION_INTERVAL_SECONDS:
+            return
+        self._pruned_at = time.time()
+        removed = self.state.prune_dns_accesses(self._pruned_at - self.retention_days * 86400)
+        if removed:
+            logger.info(f"Deleted {removed} DNS access entries older than {self.retention_days} days")
+
+_stores: Dict[str, DnsLogStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(db_path: Optional[str] = None) -> DnsLogStore:
+    """
+    Get the shared DNS log for a state database.
+
+    Args:
+        db_path (Optional[str]): State database path, STATE_DB_FILE by default
+
+    Returns:
+        DnsLogStore: Log writing to that database
+    """
+    state = get_state_store(db_path)
+    with _stores_lock:
+        store = _stores.get(state.path)
+        if store is None:
+            store = DnsLogStore(state, DEFAULT_LOG_FILE)
+            _stores[state.path] = store
+        return store
+
+def read_legacy_entries(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read the entries of a legacy log file, oldest first.
+
+    Args:
+        path (str): A JSON Lines segment, or a ``.json`` file holding one array
+
+    Yields:
+        Dict[str, Any]: Log entries
+    """
+    if path.endswith(".json"):
+        with open(path, 'r') as f:
+            entries = json.load(f)
+        entries.sort(key=lambda x: x.get("timestamp", ""))
+        yield from entries
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def migrate_legacy_log(store: DnsLogStore) -> None:
+    """
+    Import the old ``dns_access.json`` array and the rotated JSON Lines
+    segments into the state store, oldest first, then rename each file so it
+    is not imported again. A segment renamed by a rotation between being
+    listed and being read is picked up by listing the segments again.
+
     Args:
-        log_file (str): Path to the log file
+        store (DnsLogStore): Log to import into
     """
-    log_dir = os.path.dirname(log_file)
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-        logger.info(f"Created log directory: {log_dir}")
+    base = os.path.splitext(store.legacy_path)[0]
+    segments = [f"{store.legacy_path}.{index}" for index in range(LEGACY_MAX_SEGMENTS, 0, -1)]
+    for _ in range(LEGACY_IMPORT_ATTEMPTS):
+        rotated = False
+        for legacy_file in [base + ".json"] + segments + [store.legacy_path]:
+            if not os.path.exists(legacy_file) or store.state.imported(legacy_file):
+                continue
+            try:
+                imported = store.state.import_dns_accesses(legacy_file, read_legacy_entries(legacy_file))
+                os.replace(legacy_file, legacy_file + ".migrated")
+                logger.info(f"Migrated {imported} DNS access entries from {legacy_file}")
+            except FileNotFoundError:
+                # Nothing was imported from it: start over from the oldest segment
+                rotated = True
+                break
+            except Exception as e:
+                logger.warning(f"Could not migrate legacy DNS log {legacy_file}: {str(e)}")
+        if not rotated:
+            return
+    logger.warning(f"Legacy DNS logs at {store.legacy_path} kept rotating, the rest is imported on the next start")
 
-def log_dns_access(ip_address: str, domain: str, log_file: str = DEFAULT_LOG_FILE) -> None:
+def log_dns_access(ip_address: str, domain: str, db_path: Optional[str] = None) -> None:
     """
-    Log DNS access to a file.
+    Log DNS access to the state store.
     
     Args:
         ip_address (str): IP address that accessed the DNS
         domain (str): Domain that was accessed
-        log_file (str, optional): Path to the log file
+        db_path (str, optional): Path to the state database
     """
-    ensure_log_directory(log_file)
-    
     timestamp = datetime.now().isoformat()
     log_entry = {
         "timestamp": timestamp,
@@ -42,53 +253,125 @@ def log_dns_access(ip_address: str, domain: str, log_file: str = DEFAULT_LOG_FIL
     }
     
     try:
-        # Load existing logs if file exists
-        logs = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r') as f:
-                    logs = json.load(f)
-            except json.JSONDecodeError:
-                logger.warning(f"Could not parse log file {log_file}, creating new file")
-        
-        # Add new log entry
-        logs.append(log_entry)
-        
-        # Keep only the last 1000 entries to prevent file from growing too large
-        if len(logs) > 1000:
-            logs = logs[-1000:]
-        
-        # Write logs back to file
-        with open(log_file, 'w') as f:
-            json.dump(logs, f)
-            
+        get_store(db_path).append([log_entry])
         logger.debug(f"Logged DNS access from {ip_address} to {domain}")
     except Exception as e:
         logger.error(f"Failed to log DNS access: {str(e)}")
 
-def get_recent_dns_accesses(count: int = 5, log_file: str = DEFAULT_LOG_FILE) -> List[Dict[str, Any]]:
+def validate_dns_access(entry: Any) -> Optional[str]:
+    """
+    Check a DNS access event received from a client.
+
+    Args:
+        entry (Any): Decoded event, expected to carry ip_address and domain
+
+    Returns:
+        Optional[str]: Reason the entry is rejected, or None if it is valid
+    """
+    if not isinstance(entry, dict):
+        return "entry must be an object"
+    ip_address = entry.get("ip_address")
+    domain = entry.get("domain")
+    if not ip_address or not domain:
+        return "IP address and domain are required"
+    if not isinstance(domain, str) or len(domain) > 253:
+        return "invalid domain"
+    if not isinstance(ip_address, str):
+        return "invalid IP address"
+    try:
+        ipaddress.ip_address(ip_address)
+    except ValueError:
+        return "invalid IP address"
+    timestamp = entry.get("timestamp")
+    if timestamp is not None:
+        try:
+            datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return "timestamp must be an ISO 8601 string"
+    return None
+
+def log_dns_accesses(entries: List[Any], db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validate a batch of DNS access events and commit the valid ones in a
+    single transaction.
+
+    Args:
+        entries (List[Any]): Events with ip_address, domain and an optional timestamp
+        db_path (str, optional): Path to the state database
+
+    Returns:
+        Dict[str, Any]: Accepted and rejected counts, plus the reasons for the
+        first rejected entries
+    """
+    reasons = [validate_dns_access(entry) for entry in entries]
+    now = datetime.now().isoformat()
+    accepted = [
+        {
+            "timestamp": entry.get("timestamp") or now,
+            "ip_address": entry["ip_address"],
+            "domain": entry["domain"]
+        }
+        for entry, reason in zip(entries, reasons) if reason is None
+    ]
+    errors = [{"index": index, "error": reason} for index, reason in enumerate(reasons) if reason is not None]
+
+    get_store(db_path).append(accepted)
+    logger.debug(f"Logged {len(accepted)} DNS accesses, rejected {len(errors)}")
+    return {"accepted": len(accepted), "rejected": len(errors), "errors": errors[:MAX_REPORTED_ERRORS]}
+
+def get_recent_dns_accesses(count: int = 5, db_path: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Get the most recent DNS accesses.
     
     Args:
         count (int, optional): Number of recent accesses to return
-        log_file (str, optional): Path to the log file
+        db_path (str, optional): Path to the state database
         
     Returns:
-        List[Dict[str, Any]]: List of recent DNS accesses
+        List[Dict[str, Any]]: List of recent DNS accesses, newest first
     """
-    if not os.path.exists(log_file):
-        return []
-    
     try:
-        with open(log_file, 'r') as f:
-            logs = json.load(f)
-        
-        # Sort logs by timestamp (newest first)
-        logs.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        
-        # Return only the requested number of logs
-        return logs[:count]
+        return get_store(db_path).recent(count)
     except Exception as e:
         logger.error(f"Failed to get recent DNS accesses: {str(e)}")
-        return []
\ No newline at end of file
+        return []
+
+def migrate_legacy_dns_logs(db_path: Optional[str] = None) -> None:
+    """
+    Import legacy DNS log files into the state store; only called at startup.
+
+    Args:
+        db_path (str, optional): Path to the state database
+    """
+    try:
+        get_store(db_path).migrate()
+    except Exception as e:
+        logger.error(f"Failed to migrate legacy DNS logs: {str(e)}")
+
+def load_recent_dns_accesses(db_path: Optional[str] = None) -> None:
+    """
+    Rebuild the in-memory buffer of recent DNS accesses.
+
+    Args:
+        db_path (str, optional): Path to the state database
+    """
+    try:
+        get_store(db_path).load()
+    except Exception as e:
+        logger.error(f"Failed to load recent DNS accesses: {str(e)}")
+
+def get_dns_hits(window_seconds: float = 3600, limit: int = 100, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Count DNS accesses per domain over a recent window.
+
+    Args:
+        window_seconds (float, optional): Window length, ending now
+        limit (int, optional): Maximum number of domains
+        db_path (str, optional): Path to the state database
+
+    Returns:
+        Dict[str, Any]: Window bounds and per-domain hit counts, busiest first
+    """
+    until = time.time()
+    since = until - window_seconds
+    return {"since": since, "until": until, "domains": get_store(db_path).hits(since, until, limit)}
@@ -0,0 +1,162 @@
+import os
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Blocking Docker and file calls run on bounded thread pools so they never
+# stall the event loop. Slow calls (two-sample stats reads, log downloads)
+# get their own lane so they cannot starve quick listing requests.
+DEFAULT_LANE = "default"
+SLOW_LANE = "slow"
+# Fleet-wide fan-out (bulk stats) gets a wider lane of its own
+FANOUT_LANE = "fanout"
+# Per-container readers of merged log streams, which may wait for new lines indefinitely
+LOG_READER_LANE = "log_readers"
+
+_LANE_SIZES = {
+    DEFAULT_LANE: int(os.getenv("DOCKER_WORKERS", "16")),
+    SLOW_LANE: int(os.getenv("DOCKER_SLOW_WORKERS", "8")),
+    FANOUT_LANE: int(os.getenv("DOCKER_FANOUT_WORKERS", "32")),
+    LOG_READER_LANE: int(os.getenv("DOCKER_LOG_READER_WORKERS", "128"))
+}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+def get_executor(lane: str = DEFAULT_LANE) -> ThreadPoolExecutor:
+    """
+    Get the thread pool backing a lane, creating it on first use.
+
+    Args:
+        lane (str, optional): Lane name: "default", "slow", "fanout" or "log_readers"
+
+    Returns:
+        ThreadPoolExecutor: Executor for the lane
+    """
+    executor = _executors.get(lane)
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=_LANE_SIZES[lane], thread_name_prefix=f"docker-{lane}")
+        _executors[lane] = executor
+    return executor
+
+async def run_docker(func: Callable[..., Any], *args: Any, lane: str = DEFAULT_LANE, **kwargs: Any) -> Any:
+    """
+    Run a blocking Docker call on a bounded thread pool and await its result.
+
+    Args:
+        func (Callable[..., Any]): Blocking function to call
+        *args: Positional arguments for the function
+        lane (str, optional): Thread pool lane to run on
+        **kwargs: Keyword arguments for the function
+
+    Returns:
+        Any: The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. request tracing) into the worker thread
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(lane), call)
+
+def shutdown_executors() -> None:
+    """
+    Shut down every lane's thread pool without waiting for running calls.
+    """
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
+
+def lane_size(lane: str) -> int:
+    """
+    Get the number of worker threads of a lane.
+
+    Args:
+        lane (str): Lane name
+
+    Returns:
+        int: Maximum number of concurrent calls on the lane
+    """
+    return _LANE_SIZES[lane]
+
+_STREAM_END = object()
+
+class _StreamError:
+    __slots__ = ('error',)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+async def iterate_in_thread(
+    iterable: Iterable[Any],
+    close: Optional[Callable[[], None]] = None,
+    queue_size: int = 256
+) -> AsyncIterator[Any]:
+    """
+    Consume a long-lived blocking iterator (e.g. a follow-mode log stream) from async code.
+
+    The iterator runs on a dedicated thread rather than a lane, since it may
+    block indefinitely. Items are handed over through a bounded queue, so a
+    slow consumer pauses the reader instead of letting items pile up.
+
+    Args:
+        iterable (Iterable[Any]): Blocking iterable to consume
+        close (Callable[[], None], optional): Called when the consumer stops early,
+            to unblock a read waiting for data
+        queue_size (int, optional): Items buffered between the thread and the consumer
+
+    Yields:
+        Any: Items of the iterable, in order
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def hand_over(item: Any) -> bool:
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    def produce() -> None:
+        try:
+            try:
+                for item in iterable:
+                    if stop.is_set() or not hand_over(item):
+                        return
+                last = _STREAM_END
+            except Exception as e:
+                if stop.is_set():
+                    return
+                last = _StreamError(e)
+            hand_over(last)
+        except RuntimeError:
+            # The event loop has been closed
+            pass
+
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(produce,), name="docker-stream", daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                return
+            if isinstance(item, _StreamError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        if close is not None:
+            close()
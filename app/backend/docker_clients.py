@@ -0,0 +1,320 @@
+import os
+import time
+import docker
+import logging
+import threading
+import requests
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+from backend.metrics import instrument_docker_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOCAL_HOST_KEY = "local"
+
+class PooledClient:
+    """
+    A long-lived Docker client together with its usage counters.
+    """
+
+    def __init__(self, host: str, client: docker.DockerClient):
+        self.host = host
+        self.client = client
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+        self.hits = 0
+        self.health_check_failures = 0
+
+class DockerClientPool:
+    """
+    Registry of long-lived Docker clients keyed by host.
+
+    Each client keeps its own HTTP connection pool, so repeated calls against
+    the same daemon reuse connections instead of reconnecting (and redoing the
+    TLS handshake) every time. Idle clients are evicted, clients are pinged
+    before reuse once their last health check is older than
+    ``health_check_interval``, and at most ``max_hosts`` clients are kept.
+
+    Long-running calls (streams, fleet scans) hold a ``lease`` on their host:
+    leased hosts are not evicted while others can be, and a client replaced
+    or evicted while its host is leased is only closed after the last lease
+    is released.
+    """
+
+    def __init__(
+        self,
+        max_hosts: int = None,
+        idle_timeout: float = None,
+        health_check_interval: float = None,
+        pool_size: int = None,
+        timeout: float = None
+    ):
+        self.max_hosts = int(os.getenv("DOCKER_POOL_MAX_HOSTS", "16")) if max_hosts is None else max_hosts
+        self.idle_timeout = float(os.getenv("DOCKER_POOL_IDLE_TIMEOUT", "300")) if idle_timeout is None else idle_timeout
+        self.health_check_interval = float(os.getenv("DOCKER_POOL_HEALTH_CHECK_INTERVAL", "30")) if health_check_interval is None else health_check_interval
+        self.pool_size = int(os.getenv("DOCKER_POOL_CONNECTIONS", "32")) if pool_size is None else pool_size
+        # Request timeout of the clients, docker-py's default when None
+        self.timeout = timeout
+        if self.max_hosts < 1 or self.pool_size < 1:
+            raise ValueError("DOCKER_POOL_MAX_HOSTS and DOCKER_POOL_CONNECTIONS must be at least 1")
+        self._clients: "OrderedDict[str, PooledClient]" = OrderedDict()
+        self._leases: Dict[str, int] = {}
+        self._retired: List[PooledClient] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_client(self, remote_host: str = None) -> docker.DockerClient:
+        """
+        Get the shared Docker client for a host, creating it if needed.
+
+        Args:
+            remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+
+        Returns:
+            docker.DockerClient: Long-lived Docker client
+        """
+        key = remote_host or LOCAL_HOST_KEY
+        self.evict_idle()
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients.move_to_end(key)
+
+        if entry is not None and self._is_healthy(entry):
+            with self._lock:
+                entry.hits += 1
+                entry.last_used = time.time()
+                self.hits += 1
+            return entry.client
+
+        client = self._create_client(remote_host)
+        with self._lock:
+            # The failed entry, or one another thread created in the meantime
+            replaced = self._clients.pop(key, None)
+            self._clients[key] = PooledClient(key, client)
+            self.misses += 1
+            overflow = [replaced] if replaced is not None else []
+            while len(self._clients) > self.max_hosts:
+                # Least recently used first, sparing hosts with calls in progress when possible
+                victim = next((host for host in self._clients if host != key and not self._leases.get(host)), next(iter(self._clients)))
+                stale = self._clients.pop(victim)
+                logger.info(f"Evicting Docker client for {stale.host}: host limit of {self.max_hosts} reached")
+                overflow.append(stale)
+                self.evictions += 1
+
+        self._retire(overflow)
+        return client
+
+    @contextmanager
+    def lease(self, remote_host: str = None) -> Iterator[None]:
+        """
+        Keep a host's client open for the duration of a long-running call.
+
+        Args:
+            remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+        """
+        key = remote_host or LOCAL_HOST_KEY
+        with self._lock:
+            self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            released = []
+            with self._lock:
+                # The client was in use until now
+                entry = self._clients.get(key)
+                if entry is not None:
+                    entry.last_used = time.time()
+                self._leases[key] -= 1
+                if not self._leases[key]:
+                    del self._leases[key]
+                    released = [entry for entry in self._retired if entry.host == key]
+                    self._retired = [entry for entry in self._retired if entry.host != key]
+            for entry in released:
+                self._close(entry)
+
+    def evict_idle(self) -> int:
+        """
+        Close clients that have not been used within the idle timeout.
+
+        Returns:
+            int: Number of clients evicted
+        """
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            idle = [
+                entry for entry in self._clients.values()
+                if entry.last_used < cutoff and not self._leases.get(entry.host)
+            ]
+            for entry in idle:
+                del self._clients[entry.host]
+                self.evictions += 1
+
+        for entry in idle:
+            logger.info(f"Evicting idle Docker client for {entry.host}")
+        self._retire(idle)
+        return len(idle)
+
+    def close_all(self) -> None:
+        """
+        Close every pooled client.
+        """
+        with self._lock:
+            entries = list(self._clients.values()) + self._retired
+            self._clients.clear()
+            self._retired = []
+
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool hit counters and per-host connection reuse figures.
+
+        Returns:
+            Dict[str, Any]: Pool statistics
+        """
+        now = time.time()
+        with self._lock:
+            entries = list(self._clients.values())
+            summary = {
+                'max_hosts': self.max_hosts,
+                'idle_timeout': self.idle_timeout,
+                'health_check_interval': self.health_check_interval,
+                'pool_size': self.pool_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'leases': sum(self._leases.values()),
+                'retired': len(self._retired)
+            }
+
+        hosts = {}
+        for entry in entries:
+            connections = connection_stats(entry.client)
+            hosts[entry.host] = {
+                'hits': entry.hits,
+                'health_check_failures': entry.health_check_failures,
+                'age_seconds': round(now - entry.created_at, 3),
+                'idle_seconds': round(now - entry.last_used, 3),
+                'connections_opened': connections['connections_opened'],
+                'requests': connections['requests'],
+                'reused_connections': max(connections['requests'] - connections['connections_opened'], 0)
+            }
+
+        summary['hosts'] = hosts
+        return summary
+
+    def _is_healthy(self, entry: PooledClient) -> bool:
+        if time.time() - entry.last_checked < self.health_check_interval:
+            return True
+        try:
+            entry.client.ping()
+            entry.last_checked = time.time()
+            return True
+        except Exception as e:
+            entry.health_check_failures += 1
+            logger.warning(f"Health check failed for Docker client {entry.host}: {str(e)}")
+            return False
+
+    def _create_client(self, remote_host: str = None) -> docker.DockerClient:
+        if not remote_host:
+            client = docker.from_env(max_pool_size=self.pool_size, **self._timeout_option())
+            instrument_docker_client(client, LOCAL_HOST_KEY)
+            return client
+
+        client = docker.DockerClient(base_url=remote_host, max_pool_size=self.pool_size, **self._timeout_option())
+        # Plain tcp:// endpoints go through the default requests adapter, which
+        # ignores max_pool_size, so size its connection pool explicitly
+        if getattr(client.api, '_custom_adapter', None) is None:
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            client.api.mount('http://', adapter)
+            client.api.mount('https://', adapter)
+        instrument_docker_client(client, remote_host)
+        logger.info(f"Connected to remote Docker host: {remote_host}")
+        return client
+
+    def _retire(self, entries: List[PooledClient]) -> None:
+        # Close now, or once the last lease on the host is released
+        closable = []
+        with self._lock:
+            for entry in entries:
+                if self._leases.get(entry.host):
+                    self._retired.append(entry)
+                else:
+                    closable.append(entry)
+        for entry in closable:
+            self._close(entry)
+
+    def _timeout_option(self) -> Dict[str, Any]:
+        return {'timeout': self.timeout} if self.timeout is not None else {}
+
+    def _close(self, entry: PooledClient) -> None:
+        try:
+            entry.client.close()
+        except Exception as e:
+            logger.debug(f"Error closing Docker client for {entry.host}: {str(e)}")
+
+def connection_stats(client: docker.DockerClient) -> Dict[str, int]:
+    """
+    Sum urllib3 connection and request counters over a client's adapters.
+
+    Args:
+        client (docker.DockerClient): Docker client to inspect
+
+    Returns:
+        Dict[str, int]: Connections opened and requests made
+    """
+    opened = 0
+    made = 0
+    try:
+        adapters = client.api.adapters.values()
+    except Exception:
+        adapters = []
+
+    for adapter in adapters:
+        pools = getattr(adapter, 'pools', None)
+        if pools is None:
+            pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+        if pools is None:
+            continue
+        connection_pools = [pools.get(key) for key in pools.keys()]
+        for pool in connection_pools:
+            opened += getattr(pool, 'num_connections', 0)
+            made += getattr(pool, 'num_requests', 0)
+
+    return {'connections_opened': opened, 'requests': made}
+
+# Shared client pool for all modules
+pool = DockerClientPool()
+
+def get_client(remote_host: str = None) -> docker.DockerClient:
+    """
+    Get the shared Docker client for the local daemon or a remote host.
+
+    Args:
+        remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+
+    Returns:
+        docker.DockerClient: Long-lived Docker client
+    """
+    return pool.get_client(remote_host)
+
+def lease(remote_host: str = None):
+    """
+    Keep the shared client of a host open while a long-running call uses it.
+
+    Args:
+        remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+
+    Returns:
+        Context manager holding the lease
+    """
+    return pool.lease(remote_host)
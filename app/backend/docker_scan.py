@@ -1,95 +1,63 @@
 import docker
 import os
+import time
 from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
 import logging
 
+from backend.docker_clients import DockerClientPool, get_client, lease, LOCAL_HOST_KEY
+from backend.metrics import CONTAINER_SCAN_SECONDS
+from backend.tracing import span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_running_containers(remote_host: str = None) -> List[Dict[str, Any]]:
+# Fields served for each container, in response order
+CONTAINER_FIELDS = ('id', 'name', 'image', 'status', 'ip_address', 'ports', 'dns_enabled', 'created', 'labels')
+
+# Containers never exposed through DNS
+SYSTEM_CONTAINERS = {'zeronsd', 'dns-manager'}
+
+def get_running_containers(remote_host: str = None, labels: List[str] = None, client_pool: DockerClientPool = None) -> List[Dict[str, Any]]:
     """
     Get a list of all running Docker containers with their relevant information.
     
+    The listing uses the daemon's list-endpoint summaries (``sparse=True``), so
+    one request covers every container instead of one inspect per container.
+    
     Args:
         remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+        labels (List[str], optional): Label selectors ("key" or "key=value") the containers must all match
+        client_pool (DockerClientPool, optional): Pool to take the client from instead of the shared one
     
     Returns:
         List[Dict[str, Any]]: List of container information dictionaries
     """
+    started = time.perf_counter()
     try:
-        # Initialize Docker client
-        if remote_host:
-            client = docker.DockerClient(base_url=remote_host)
-            logger.info(f"Connected to remote Docker host: {remote_host}")
-        else:
-            client = docker.from_env()
-        
-        # Get all running containers
-        containers = client.containers.list()
+        # Get all running containers, letting the daemon apply label selectors;
+        # the lease keeps the client open while a fleet scan crowds the pool
+        filters = {'label': labels} if labels else None
+        held = client_pool.lease(remote_host) if client_pool else lease(remote_host)
+        with held:
+            # Get the shared Docker client for this host
+            with span("docker.client"):
+                client = client_pool.get_client(remote_host) if client_pool else get_client(remote_host)
+            with span("docker.list"):
+                containers = client.containers.list(sparse=True, filters=filters)
         
         container_info = []
         
-        for container in containers:
-            # Skip system containers or those with specific labels
-            if should_skip_container(container):
-                continue
-                
-            # Get container details
-            details = container.attrs
-            
-            # Extract container name (remove leading slash)
-            name = details['Name']
-            if name.startswith('/'):
-                name = name[1:]
+        with span("containers.parse", containers=len(containers)):
+            for container in containers:
+                info = build_container_info(container)
                 
-            # Get container IP address
-            ip_address = ""
-            networks = details.get('NetworkSettings', {}).get('Networks', {})
-            if networks:
-                # Check if a specific network is configured
-                target_network_name = os.getenv('DOCKER_NETWORK')
-
-                if target_network_name and target_network_name in networks:
-                    # Use IP from the configured network
-                    ip_address = networks[target_network_name].get('IPAddress', '')
-                else:
-                    # Fallback to the first network's IP
-                    first_network = next(iter(networks.values()))
-                    ip_address = first_network.get('IPAddress', '')
-            
-            # Get exposed ports
-            ports = []
-            port_bindings = details.get('NetworkSettings', {}).get('Ports', {})
-            if port_bindings:
-                for container_port, host_bindings in port_bindings.items():
-                    if host_bindings:  # Only include ports that are actually exposed
-                        protocol = container_port.split('/')[-1]
-                        port_num = container_port.split('/')[0]
-                        ports.append({
-                            'container_port': port_num,
-                            'protocol': protocol,
-                            'host_port': host_bindings[0]['HostPort'] if host_bindings else None
-                        })
-            
-            # Check if DNS should be enabled (via label)
-            labels = details.get('Config', {}).get('Labels', {})
-            dns_enabled = labels.get('subdomain.enabled', 'true').lower() == 'true'
-            
-            # Create container info dictionary
-            container_data = {
-                'id': container.id,
-                'name': name,
-                'image': details.get('Config', {}).get('Image', ''),
-                'status': details.get('State', {}).get('Status', ''),
-                'ip_address': ip_address,
-                'ports': ports,
-                'dns_enabled': dns_enabled,
-                'created': details.get('Created', ''),
-                'labels': labels
-            }
-            
-            container_info.append(container_data)
+                # Skip system containers or those with specific labels
+                if should_skip_info(info):
+                    continue
+                    
+                container_info.append(info)
             
         return container_info
         
@@ -99,48 +67,198 @@ def get_running_containers(remote_host: str = None) -> List[Dict[str, Any]]:
     except Exception as e:
         logger.error(f"Error scanning containers: {str(e)}")
         raise Exception(f"Error scanning containers: {str(e)}")
+    finally:
+        CONTAINER_SCAN_SECONDS.labels(remote_host or LOCAL_HOST_KEY).observe(time.perf_counter() - started)
 
-def should_skip_container(container) -> bool:
+def build_container_info(container) -> Dict[str, Any]:
     """
-    Determine if a container should be skipped in DNS configuration.
+    Build the container information dictionary served by the API.
+    
+    Accepts both list-endpoint summaries (``containers.list(sparse=True)``)
+    and full inspect payloads, reading each attribute once.
     
     Args:
         container: Docker container object
         
     Returns:
-        bool: True if container should be skipped, False otherwise
+        Dict[str, Any]: Container information dictionary
     """
-    # Get container labels
-    labels = container.attrs.get('Config', {}).get('Labels', {})
+    # Get container details
+    details = container.attrs
+    network_settings = details.get('NetworkSettings') or {}
     
-    # Skip if explicitly disabled via label
-    if labels.get('subdomain.enabled', 'true').lower() == 'false':
-        return True
-        
-    # Skip system containers (could be expanded based on needs)
-    system_containers = ['zeronsd', 'dns-manager']
-    name = container.attrs.get('Name', '')
+    if 'Names' in details:
+        # List summary: flat state, labels and published ports
+        names = details.get('Names') or ['']
+        name = names[0]
+        image = details.get('Image', '')
+        status = details.get('State', '')
+        labels = details.get('Labels') or {}
+        ports = summary_ports(details.get('Ports') or [])
+        created = details.get('Created', '')
+        if isinstance(created, (int, float)):
+            created = datetime.fromtimestamp(created, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    else:
+        # Inspect payload
+        name = details.get('Name', '')
+        config = details.get('Config') or {}
+        image = config.get('Image', '')
+        status = (details.get('State') or {}).get('Status', '')
+        labels = config.get('Labels') or {}
+        ports = inspect_ports(network_settings.get('Ports') or {})
+        created = details.get('Created', '')
+    
+    # Extract container name (remove leading slash)
     if name.startswith('/'):
         name = name[1:]
         
-    if name in system_containers:
+    # Get container IP address
+    ip_address = ""
+    networks = network_settings.get('Networks', {})
+    if networks:
+        # Check if a specific network is configured
+        target_network_name = os.getenv('DOCKER_NETWORK')
+
+        if target_network_name and target_network_name in networks:
+            # Use IP from the configured network
+            ip_address = networks[target_network_name].get('IPAddress', '')
+        else:
+            # Fallback to the first network's IP
+            first_network = next(iter(networks.values()))
+            ip_address = first_network.get('IPAddress', '')
+    
+    # Check if DNS should be enabled (via label)
+    dns_enabled = labels.get('subdomain.enabled', 'true').lower() == 'true'
+    
+    # Create container info dictionary
+    container_data = {
+        'id': details.get('Id') or container.id,
+        'name': name,
+        'image': image,
+        'status': status,
+        'ip_address': ip_address,
+        'ports': ports,
+        'dns_enabled': dns_enabled,
+        'created': created,
+        'labels': labels
+    }
+    
+    return container_data
+
+def inspect_ports(port_bindings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Get the published ports from an inspect payload's port bindings.
+    
+    Args:
+        port_bindings (Dict[str, Any]): NetworkSettings.Ports of an inspect payload
+        
+    Returns:
+        List[Dict[str, Any]]: Published ports
+    """
+    ports = []
+    for container_port, host_bindings in port_bindings.items():
+        if host_bindings:  # Only include ports that are actually exposed
+            protocol = container_port.split('/')[-1]
+            port_num = container_port.split('/')[0]
+            ports.append({
+                'container_port': port_num,
+                'protocol': protocol,
+                'host_port': host_bindings[0]['HostPort'] if host_bindings else None
+            })
+    return ports
+
+def summary_ports(port_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Get the published ports from a list summary's port list.
+    
+    Args:
+        port_list (List[Dict[str, Any]]): Ports of a list summary
+        
+    Returns:
+        List[Dict[str, Any]]: Published ports, one per container port and protocol
+    """
+    ports = []
+    seen = set()
+    for port in port_list:
+        if not port.get('PublicPort'):
+            continue
+        # IPv4 and IPv6 bindings of the same port are listed separately
+        key = (port.get('PrivatePort'), port.get('Type'))
+        if key in seen:
+            continue
+        seen.add(key)
+        ports.append({
+            'container_port': str(port.get('PrivatePort', '')),
+            'protocol': port.get('Type', 'tcp'),
+            'host_port': str(port['PublicPort'])
+        })
+    return ports
+
+def should_skip_info(info: Dict[str, Any]) -> bool:
+    """
+    Determine if a parsed container should be skipped in DNS configuration.
+    
+    Args:
+        info (Dict[str, Any]): Container information built by build_container_info
+        
+    Returns:
+        bool: True if container should be skipped, False otherwise
+    """
+    # Skip if explicitly disabled via label; other values only turn dns_enabled off
+    labels = info.get('labels') or {}
+    if labels.get('subdomain.enabled', 'true').lower() == 'false':
         return True
+
+    # Skip system containers
+    return info['name'] in SYSTEM_CONTAINERS
+
+def should_skip_container(container) -> bool:
+    """
+    Determine if a container should be skipped in DNS configuration.
+    
+    Args:
+        container: Docker container object
         
-    return False
+    Returns:
+        bool: True if container should be skipped, False otherwise
+    """
+    return should_skip_info(build_container_info(container))
 
-def get_container_by_name(name: str, remote_host: str = None) -> Optional[Dict[str, Any]]:
+def matches_labels(info: Dict[str, Any], labels: List[str] = None) -> bool:
     """
-    Get container information by name.
+    Check a parsed container against label selectors.
     
     Args:
-        name (str): Container name to search for
-        remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+        info (Dict[str, Any]): Container information built by build_container_info
+        labels (List[str], optional): Label selectors ("key" or "key=value")
         
     Returns:
-        Optional[Dict[str, Any]]: Container information or None if not found
+        bool: True if every selector matches
+    """
+    container_labels = info.get('labels') or {}
+    for selector in labels or []:
+        key, sep, value = selector.partition('=')
+        if key not in container_labels or (sep and container_labels[key] != value):
+            return False
+    return True
+
+def project_fields(containers: List[Dict[str, Any]], fields: List[str] = None) -> List[Dict[str, Any]]:
+    """
+    Keep only the requested fields of each container.
+    
+    Args:
+        containers (List[Dict[str, Any]]): Container information dictionaries
+        fields (List[str], optional): Fields to keep, all fields if empty
+        
+    Returns:
+        List[Dict[str, Any]]: Projected container dictionaries
+        
+    Raises:
+        ValueError: If a field is unknown
     """
-    containers = get_running_containers(remote_host)
-    for container in containers:
-        if container['name'] == name:
-            return container
-    return None
\ No newline at end of file
+    if not fields:
+        return containers
+    unknown = [field for field in fields if field not in CONTAINER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown container fields: {', '.join(unknown)}; expected {', '.join(CONTAINER_FIELDS)}")
+    return [{field: container[field] for field in fields} for container in containers]
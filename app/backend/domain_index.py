@@ -0,0 +1,337 @@
+import os
+import toml
+import logging
+import ipaddress
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from backend.tracing import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Length of the short container IDs shown by the Docker CLI
+SHORT_ID_LENGTH = 12
+
+def address_key(address: str) -> str:
+    """
+    Normalize an address for the reverse index, so that differently written
+    forms of one IPv6 address (or an IPv4 address with padding) match.
+
+    Args:
+        address (str): IP address as configured or queried
+
+    Returns:
+        str: Canonical form of the address, or the value as given if it is not an IP address
+    """
+    try:
+        return str(ipaddress.ip_address(address.strip()))
+    except ValueError:
+        return address
+
+def config_mtime(config_path: str) -> Optional[int]:
+    """
+    Get the modification time of config.toml, which changes whenever any
+    writer (this process, another worker or an external tool) replaces it.
+
+    Args:
+        config_path (str): Path to the rendered ZeroNSD config
+
+    Returns:
+        Optional[int]: Modification time in nanoseconds, None if the file is missing
+    """
+    try:
+        return os.stat(config_path).st_mtime_ns
+    except OSError:
+        return None
+
+class DomainRecord:
+    """
+    Immutable view of one container's DNS state.
+
+    Records are replaced rather than mutated, so readers can use them without
+    taking the index lock.
+    """
+
+    __slots__ = ('id', 'name', 'fqdn', 'ip_address', 'address', 'enabled', 'dns_enabled')
+
+    def __init__(self, container: Dict[str, Any], fqdn: str, entry: Optional[Dict[str, Any]], disabled: bool):
+        self.id = container['id']
+        self.name = container['name']
+        self.fqdn = fqdn
+        self.ip_address = container.get('ip_address', '')
+        # A config.toml entry wins over the container's current address
+        self.address = entry.get('address', self.ip_address) if entry else self.ip_address
+        self.enabled = entry is not None
+        self.dns_enabled = container.get('dns_enabled', True) and not disabled
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'fqdn': self.fqdn,
+            'ip_address': self.ip_address,
+            'address': self.address,
+            'enabled': self.enabled,
+            'dns_enabled': self.dns_enabled
+        }
+
+class DomainIndex:
+    """
+    Maintained index from container ID, name, FQDN and address to a DomainRecord.
+
+    The index is fed incrementally: container changes arrive from the
+    inventory listener, configured services from config.toml (re-read only
+    when its mtime changes) and disabled IDs from the persisted settings.
+    Every change bumps ``version``.
+    """
+
+    def __init__(self, domain_suffix: str):
+        self.domain_suffix = domain_suffix
+        self.version = 0
+        self._containers: Dict[str, Dict[str, Any]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._disabled: Set[str] = set()
+        self._config_mtime: Optional[int] = None
+        self._by_id: Dict[str, DomainRecord] = {}
+        self._by_short_id: Dict[str, DomainRecord] = {}
+        self._by_name: Dict[str, DomainRecord] = {}
+        self._by_fqdn: Dict[str, DomainRecord] = {}
+        self._by_address: Dict[str, List[DomainRecord]] = {}
+        self._domains: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def fqdn(self, name: str) -> str:
+        return f"{name}.{self.domain_suffix}"
+
+    def apply_inventory_event(self, action: str, payload: Any) -> None:
+        """
+        Inventory listener: apply a "reset", "upsert" or "remove" change.
+
+        Args:
+            action (str): Kind of change
+            payload (Any): Container list, container information or container ID
+        """
+        if action == 'reset':
+            self.replace_containers(payload)
+        elif action == 'upsert':
+            self.upsert(payload)
+        elif action == 'remove':
+            self.remove(payload)
+
+    def replace_containers(self, containers: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace every indexed container.
+
+        Args:
+            containers (Iterable[Dict[str, Any]]): Container information dictionaries
+        """
+        with self._lock:
+            self._containers = {container['id']: container for container in containers}
+            self._rebuild()
+
+    def upsert(self, container: Dict[str, Any]) -> None:
+        """
+        Add or update one container.
+
+        Args:
+            container (Dict[str, Any]): Container information dictionary
+        """
+        with self._lock:
+            self._unindex(self._by_id.get(container['id']))
+            self._containers[container['id']] = container
+            self._index(self._record(container))
+            self._changed()
+
+    def remove(self, container_id: str) -> None:
+        """
+        Remove one container.
+
+        Args:
+            container_id (str): The ID of the container
+        """
+        with self._lock:
+            if self._containers.pop(container_id, None) is None:
+                return
+            self._unindex(self._by_id.get(container_id))
+            self._changed()
+
+    def set_disabled(self, disabled_ids: Iterable[str]) -> None:
+        """
+        Update the IDs of containers whose DNS was disabled by the user.
+
+        Args:
+            disabled_ids (Iterable[str]): Disabled container IDs
+        """
+        disabled = set(disabled_ids)
+        with self._lock:
+            if disabled == self._disabled:
+                return
+            touched = disabled ^ self._disabled
+            self._disabled = disabled
+            for container_id in touched:
+                container = self._containers.get(container_id)
+                if container is not None:
+                    self._unindex(self._by_id.get(container_id))
+                    self._index(self._record(container))
+            self._changed()
+
+    def config_changed(self, config_path: str) -> bool:
+        """
+        Check with one stat whether config.toml changed since the last read.
+
+        Args:
+            config_path (str): Path to the rendered ZeroNSD config
+
+        Returns:
+            bool: True if refresh_config would re-read the file
+        """
+        return config_mtime(config_path) != self._config_mtime
+
+    def refresh_config(self, config_path: str) -> bool:
+        """
+        Re-read the configured services if config.toml changed since the last read.
+
+        Args:
+            config_path (str): Path to the rendered ZeroNSD config
+
+        Returns:
+            bool: True if the configured services were reloaded
+        """
+        mtime = config_mtime(config_path)
+        if mtime == self._config_mtime:
+            return False
+
+        entries = {}
+        if mtime is not None:
+            try:
+                with span("config.toml_load"):
+                    services = toml.load(config_path).get("services", [])
+                entries = {service["name"]: service for service in services if "name" in service}
+            except Exception as e:
+                logger.error(f"Error parsing {config_path}: {e}")
+                return False
+
+        with self._lock:
+            self._config_mtime = mtime
+            changed = (set(entries) ^ set(self._entries)) | {
+                name for name in entries.keys() & self._entries.keys() if entries[name] != self._entries[name]
+            }
+            self._entries = entries
+            for fqdn in changed:
+                record = self._by_fqdn.get(fqdn)
+                if record is not None:
+                    self._unindex(record)
+                    self._index(self._record(self._containers[record.id]))
+            self._changed()
+        return True
+
+    def lookup(self, key: str) -> Optional[DomainRecord]:
+        """
+        Find a record by container ID, ID prefix, name, FQDN or address.
+
+        Args:
+            key (str): Lookup key
+
+        Returns:
+            Optional[DomainRecord]: The record, or None if nothing matches
+        """
+        record = self._by_id.get(key) or self._by_name.get(key) or self._by_fqdn.get(key.rstrip('.'))
+        if record is not None:
+            return record
+        records = self._by_address.get(address_key(key))
+        if records:
+            return records[0]
+        # Short container IDs as shown by the Docker CLI
+        record = self._by_short_id.get(key[:SHORT_ID_LENGTH]) if len(key) >= SHORT_ID_LENGTH else None
+        if record is not None and record.id.startswith(key):
+            return record
+        return None
+
+    def reverse(self, address: str) -> List[DomainRecord]:
+        """
+        Find the records resolving to an address (PTR-style lookup).
+
+        Args:
+            address (str): IPv4 or IPv6 address
+
+        Returns:
+            List[DomainRecord]: Records for the address, empty if unknown
+        """
+        return list(self._by_address.get(address_key(address), ()))
+
+    def domains(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the domain view served by /api/domains, cached until the next change.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Domain entries keyed by container name
+        """
+        domains = self._domains
+        if domains is None:
+            with self._lock:
+                domains = {
+                    record.name: {"name": record.fqdn, "enabled": record.enabled, "address": record.address}
+                    for record in self._by_id.values()
+                }
+                self._domains = domains
+        return domains
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Describe the index size and version.
+
+        Returns:
+            Dict[str, Any]: Index statistics
+        """
+        return {
+            'version': self.version,
+            'containers': len(self._by_id),
+            'names': len(self._by_name),
+            'addresses': len(self._by_address),
+            'configured_services': len(self._entries),
+            'disabled': len(self._disabled)
+        }
+
+    def _record(self, container: Dict[str, Any]) -> DomainRecord:
+        fqdn = self.fqdn(container['name'])
+        return DomainRecord(container, fqdn, self._entries.get(fqdn), container['id'] in self._disabled)
+
+    def _index(self, record: DomainRecord) -> None:
+        self._by_id[record.id] = record
+        self._by_short_id[record.id[:SHORT_ID_LENGTH]] = record
+        self._by_name[record.name] = record
+        self._by_fqdn[record.fqdn] = record
+        if record.address:
+            key = address_key(record.address)
+            self._by_address[key] = self._by_address.get(key, []) + [record]
+
+    def _unindex(self, record: Optional[DomainRecord]) -> None:
+        if record is None:
+            return
+        self._by_id.pop(record.id, None)
+        if self._by_short_id.get(record.id[:SHORT_ID_LENGTH]) is record:
+            del self._by_short_id[record.id[:SHORT_ID_LENGTH]]
+        if self._by_name.get(record.name) is record:
+            del self._by_name[record.name]
+        if self._by_fqdn.get(record.fqdn) is record:
+            del self._by_fqdn[record.fqdn]
+        if record.address:
+            key = address_key(record.address)
+            # Replace rather than mutate the list lock-free readers may hold
+            remaining = [other for other in self._by_address.get(key, []) if other is not record]
+            if remaining:
+                self._by_address[key] = remaining
+            else:
+                self._by_address.pop(key, None)
+
+    def _rebuild(self) -> None:
+        self._by_id, self._by_short_id, self._by_name, self._by_fqdn, self._by_address = {}, {}, {}, {}, {}
+        for container in self._containers.values():
+            self._index(self._record(container))
+        self._changed()
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._domains = None
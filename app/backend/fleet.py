@@ -0,0 +1,189 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from backend.docker_scan import get_running_containers
+from backend.docker_async import run_docker, FANOUT_LANE
+from backend.docker_clients import DockerClientPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Comma-separated Docker hosts scanned by the fleet endpoints; "local" is the local daemon
+DOCKER_HOSTS = os.getenv("DOCKER_HOSTS", "")
+FLEET_HOST_TIMEOUT = float(os.getenv("FLEET_HOST_TIMEOUT", "10"))
+
+LOCAL_HOST = "local"
+
+def validate_timeout(timeout: Any) -> float:
+    """
+    Check a per-host deadline given by a client.
+
+    Args:
+        timeout (Any): Seconds from the request body, or None for the default
+
+    Returns:
+        float: The deadline in seconds
+
+    Raises:
+        ValueError: If the deadline is not a number in (0, FLEET_HOST_TIMEOUT]
+    """
+    if timeout is None:
+        return FLEET_HOST_TIMEOUT
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout <= FLEET_HOST_TIMEOUT:
+        raise ValueError(f"timeout must be a number of seconds between 0 and {FLEET_HOST_TIMEOUT:g}")
+    return float(timeout)
+
+def configured_hosts() -> List[str]:
+    """
+    Get the Docker hosts configured for fleet scans.
+
+    Returns:
+        List[str]: Host URLs (e.g., tcp://192.168.1.100:2375) or "local"
+    """
+    return [host.strip() for host in DOCKER_HOSTS.split(",") if host.strip()]
+
+# Hosts the fleet pool keeps clients for: the whole configured fleet, so a scan
+# reuses every host's connections instead of evicting them in a loop
+FLEET_POOL_MAX_HOSTS = int(os.getenv("FLEET_POOL_MAX_HOSTS", "0")) or max(len(configured_hosts()), 64)
+
+# Fleet scans use their own clients, whose request timeout is the host deadline,
+# so a worker thread is not held by an unresponsive daemon after its scan gave up
+fleet_pool = DockerClientPool(max_hosts=FLEET_POOL_MAX_HOSTS, timeout=FLEET_HOST_TIMEOUT)
+
+def unique_hosts(hosts: List[Any]) -> List[Any]:
+    """
+    De-duplicate hosts while keeping the caller's order.
+
+    Items that are not non-empty strings are kept as they are (each once per
+    occurrence), so they are reported as degraded instead of failing the scan.
+
+    Args:
+        hosts (List[Any]): Hosts from the request or DOCKER_HOSTS
+
+    Returns:
+        List[Any]: Hosts to scan, in order
+    """
+    seen = set()
+    unique = []
+    for host in hosts:
+        if isinstance(host, str) and host:
+            if host in seen:
+                continue
+            seen.add(host)
+        unique.append(host)
+    return unique
+
+async def scan_host(host: str, timeout: float = None) -> Dict[str, Any]:
+    """
+    Scan one Docker host under a deadline, reporting failures instead of raising.
+
+    Args:
+        host (str): Remote Docker host URL or "local"
+        timeout (float, optional): Seconds to wait for the host once its scan is
+            running, defaults to FLEET_HOST_TIMEOUT
+
+    Returns:
+        Dict[str, Any]: Host result with status "ok" or "degraded"
+    """
+    timeout = timeout or FLEET_HOST_TIMEOUT
+    if not isinstance(host, str) or not host:
+        return {"host": host, "status": "degraded", "error": "Host must be a non-empty string", "count": 0, "containers": [], "elapsed_ms": 0.0}
+    remote_host = None if host == LOCAL_HOST else host
+    loop = asyncio.get_running_loop()
+    running = loop.create_future()
+
+    def scan() -> List[Dict[str, Any]]:
+        loop.call_soon_threadsafe(_set_done, running)
+        return get_running_containers(remote_host, client_pool=fleet_pool)
+
+    started = time.perf_counter()
+    job = asyncio.ensure_future(run_docker(scan, lane=FANOUT_LANE))
+    try:
+        # The deadline starts once a worker picks the scan up, not while it waits for the lane
+        await asyncio.wait({running, job}, return_when=asyncio.FIRST_COMPLETED)
+        containers = await asyncio.wait_for(asyncio.shield(job), timeout=timeout)
+        result = {"host": host, "status": "ok", "count": len(containers), "containers": containers}
+    except asyncio.TimeoutError:
+        logger.warning(f"Fleet scan of {host} timed out after {timeout}s")
+        result = {"host": host, "status": "degraded", "error": f"Timed out after {timeout}s", "count": 0, "containers": []}
+    except Exception as e:
+        logger.warning(f"Fleet scan of {host} failed: {str(e)}")
+        result = {"host": host, "status": "degraded", "error": str(e), "count": 0, "containers": []}
+    finally:
+        running.cancel()
+        # The thread ends within the client timeout; drop its late result or error
+        job.add_done_callback(_discard)
+
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+def _set_done(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+def _discard(job: asyncio.Future) -> None:
+    if not job.cancelled():
+        job.exception()
+
+async def iter_fleet_scan(hosts: List[str], timeout: float = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Scan hosts concurrently, yielding each host's result as soon as it answers.
+
+    Args:
+        hosts (List[str]): Hosts to scan
+        timeout (float, optional): Per-host deadline in seconds
+
+    Yields:
+        Dict[str, Any]: Host results in completion order
+    """
+    tasks = [asyncio.ensure_future(scan_host(host, timeout)) for host in unique_hosts(hosts)]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def summarize_fleet(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """
+    Summarize host results of a fleet scan.
+
+    Args:
+        results (List[Dict[str, Any]]): Host results
+        elapsed (float): Seconds the scan took
+
+    Returns:
+        Dict[str, Any]: Host and container counts
+    """
+    degraded = [result["host"] for result in results if result["status"] != "ok"]
+    return {
+        "hosts": len(results),
+        "healthy": len(results) - len(degraded),
+        "degraded": degraded,
+        "containers": sum(result["count"] for result in results),
+        "elapsed_ms": round(elapsed * 1000, 1)
+    }
+
+async def scan_fleet(hosts: List[str], timeout: float = None) -> Dict[str, Any]:
+    """
+    Scan hosts concurrently and merge their results.
+
+    The scan takes about as long as the slowest host, bounded by the
+    per-host deadline; unreachable hosts are reported as degraded.
+
+    Args:
+        hosts (List[str]): Hosts to scan
+        timeout (float, optional): Per-host deadline in seconds
+
+    Returns:
+        Dict[str, Any]: Summary plus per-host results in the requested order
+    """
+    started = time.perf_counter()
+    ordered = await asyncio.gather(*(scan_host(host, timeout) for host in unique_hosts(hosts)))
+    summary = summarize_fleet(ordered, time.perf_counter() - started)
+    summary["results"] = ordered
+    return summary
@@ -0,0 +1,239 @@
+import copy
+import time
+import docker
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, List, Dict, Any, Optional
+
+from backend.docker_scan import build_container_info, should_skip_info
+from backend.docker_clients import LOCAL_HOST_KEY
+from backend.metrics import instrument_docker_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Docker events that change what the inventory should contain
+CONTAINER_REFRESH_ACTIONS = {'start', 'rename', 'unpause', 'update'}
+# A paused container keeps its network and still answers once unpaused
+CONTAINER_REMOVE_ACTIONS = {'die', 'destroy'}
+CONTAINER_KEPT_STATES = {'running', 'paused'}
+NETWORK_REFRESH_ACTIONS = {'connect', 'disconnect'}
+
+# Seconds to wait before reconnecting to the events stream
+RECONNECT_DELAY = 2.0
+MAX_RECONNECT_DELAY = 30.0
+
+class ContainerInventory:
+    """
+    In-process inventory of the running containers on the local Docker daemon.
+
+    The inventory is seeded with a full scan when started and is then kept
+    current by the Docker events stream, so readers never touch the daemon.
+    Every applied change bumps ``generation``.
+    """
+
+    def __init__(self):
+        self._containers: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._client = None
+        self._events = None
+        self._listeners: List[Callable[[str, Any], None]] = []
+        self.generation = 0
+        self.events_applied = 0
+        self.resyncs = 0
+        self.seeded_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        """
+        Start the background thread that seeds and follows the inventory.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="container-inventory", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop following Docker events and mark the inventory as not ready.
+        """
+        self._stop.set()
+        self._ready.clear()
+        events = self._events
+        if events is not None:
+            try:
+                events.close()
+            except Exception:
+                pass
+
+    def add_listener(self, listener: Callable[[str, Any], None]) -> None:
+        """
+        Register a callback for inventory changes.
+
+        The callback receives ("reset", containers) after every seed,
+        ("upsert", container) when a container is added or updated and
+        ("remove", container_id) when one goes away. It runs on the
+        inventory thread and must not block.
+
+        Args:
+            listener (Callable[[str, Any], None]): Change callback
+        """
+        self._listeners.append(listener)
+
+    def is_ready(self) -> bool:
+        """
+        Check whether the inventory is seeded and following the events stream.
+
+        Returns:
+            bool: True if snapshots reflect the current daemon state
+        """
+        return self._ready.is_set()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get a deep copy of the container information held in memory.
+
+        Returns:
+            List[Dict[str, Any]]: List of container information dictionaries
+        """
+        with self._lock:
+            return copy.deepcopy(list(self._containers.values()))
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the inventory state, including how stale it may be.
+
+        Returns:
+            Dict[str, Any]: Inventory status
+        """
+        now = time.time()
+        last_update = self.last_event_at or self.seeded_at
+        return {
+            'ready': self.is_ready(),
+            'generation': self.generation,
+            'containers': len(self._containers),
+            'events_applied': self.events_applied,
+            'resyncs': self.resyncs,
+            'seeded_at': datetime.fromtimestamp(self.seeded_at).isoformat() if self.seeded_at else None,
+            'last_event_at': datetime.fromtimestamp(self.last_event_at).isoformat() if self.last_event_at else None,
+            'seconds_since_update': round(now - last_update, 3) if last_update else None,
+            'last_error': self.last_error
+        }
+
+    def _run(self) -> None:
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                self._client = docker.from_env()
+                instrument_docker_client(self._client, LOCAL_HOST_KEY)
+                # Subscribe from just before the seed so no change is missed in between
+                since = int(time.time()) - 1
+                self._seed()
+                self._follow(since)
+                delay = RECONNECT_DELAY
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Container inventory lost the Docker events stream: {str(e)}")
+            finally:
+                self._ready.clear()
+                self._events = None
+
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            self.resyncs += 1
+
+    def _seed(self) -> None:
+        containers = {}
+        # List summaries carry everything the inventory serves, without per-container inspects
+        for container in self._client.containers.list(sparse=True):
+            info = build_container_info(container)
+            if should_skip_info(info):
+                continue
+            containers[info['id']] = info
+
+        with self._lock:
+            self._containers = containers
+            self.generation += 1
+        self._notify('reset', copy.deepcopy(list(containers.values())))
+        self.seeded_at = time.time()
+        self.last_error = None
+        logger.info(f"Container inventory seeded with {len(containers)} containers")
+
+    def _follow(self, since: int) -> None:
+        self._events = self._client.events(
+            since=since,
+            decode=True,
+            filters={'type': ['container', 'network']}
+        )
+        self._ready.set()
+
+        for event in self._events:
+            if self._stop.is_set():
+                break
+            self._apply_event(event)
+
+    def _apply_event(self, event: Dict[str, Any]) -> None:
+        event_type = event.get('Type')
+        action = event.get('Action', '')
+        attributes = event.get('Actor', {}).get('Attributes', {})
+
+        if event_type == 'container':
+            container_id = event.get('Actor', {}).get('ID') or event.get('id')
+            if action in CONTAINER_REFRESH_ACTIONS:
+                self._refresh(container_id)
+            elif action in CONTAINER_REMOVE_ACTIONS:
+                self._remove(container_id)
+            else:
+                return
+        elif event_type == 'network' and action in NETWORK_REFRESH_ACTIONS:
+            container_id = attributes.get('container')
+            if not container_id:
+                return
+            self._refresh(container_id)
+        else:
+            return
+
+        self.events_applied += 1
+        self.last_event_at = time.time()
+
+    def _refresh(self, container_id: str) -> None:
+        try:
+            container = self._client.containers.get(container_id)
+        except docker.errors.NotFound:
+            self._remove(container_id)
+            return
+
+        info = build_container_info(container)
+        if info['status'] not in CONTAINER_KEPT_STATES or should_skip_info(info):
+            self._remove(container_id)
+            return
+
+        with self._lock:
+            self._containers[info['id']] = info
+            self.generation += 1
+        self._notify('upsert', copy.deepcopy(info))
+
+    def _remove(self, container_id: str) -> None:
+        with self._lock:
+            if self._containers.pop(container_id, None) is None:
+                return
+            self.generation += 1
+        self._notify('remove', container_id)
+
+    def _notify(self, action: str, payload: Any) -> None:
+        for listener in self._listeners:
+            try:
+                listener(action, payload)
+            except Exception as e:
+                logger.error(f"Container inventory listener failed on {action}: {str(e)}")
+
+# Shared inventory for the local Docker daemon
+inventory = ContainerInventory()
@@ -0,0 +1,573 @@
+import os
+import re
+import json
+import time
+import logging
+import calendar
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from backend.docker_clients import get_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Logs of local containers using the json-file driver are read straight from
+# their files instead of through the daemon, which scans the whole file for a
+# tail. Inside a container, mount the host's /var/lib/docker/containers
+# read-only and point JSON_LOG_DIR at it; other drivers use the Docker API.
+JSON_LOG_READER_ENABLED = os.getenv("JSON_LOG_READER_ENABLED", "true").lower() == "true"
+JSON_LOG_DIR = os.getenv("JSON_LOG_DIR", "/var/lib/docker/containers")
+# Bytes of log between two entries of a file's timestamp index
+JSON_LOG_INDEX_STRIDE = int(os.getenv("JSON_LOG_INDEX_STRIDE", str(1024 * 1024)))
+
+# Containers that cannot be read locally are looked up again after this many seconds
+MISSING_RETRY_SECONDS = 60
+# Located containers and indexed files beyond which the oldest are dropped
+MAX_TRACKED = 1024
+# Bytes left to a linear scan when bisecting between two index entries
+SCAN_BYTES = 8192
+# Bytes per positioned read of a log file
+BLOCK_SIZE = 65536
+
+ROTATED_SUFFIX = re.compile(r"\.(\d+)$")
+TIME_FIELD = b'"time":"'
+
+def parse_log_time(value: str) -> Optional[float]:
+    """
+    Convert a Docker log timestamp (RFC 3339 with nanoseconds) to epoch seconds.
+
+    Args:
+        value (str): Timestamp such as "2024-01-01T12:00:00.123456789Z"
+
+    Returns:
+        Optional[float]: Seconds since the epoch, or None if the value is not a timestamp
+    """
+    try:
+        seconds = calendar.timegm((
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19]), 0, 0, 0
+        ))
+        end = 19
+        if value[19:20] == ".":
+            end = 20
+            while end < len(value) and value[end].isdigit():
+                end += 1
+            seconds += float("0" + value[19:end])
+        zone = value[end:]
+        if zone not in ("Z", ""):
+            sign = -1 if zone[0] == "-" else 1
+            seconds -= sign * (int(zone[1:3]) * 3600 + int(zone[4:6]) * 60)
+        return seconds
+    except (ValueError, IndexError):
+        return None
+
+def line_time(line: bytes) -> Optional[float]:
+    """
+    Get the timestamp of a json-file log line without decoding the whole line.
+
+    Args:
+        line (bytes): One line of a *-json.log file
+
+    Returns:
+        Optional[float]: Seconds since the epoch, or None for a malformed line
+    """
+    # The driver writes compact JSON with "time" last, after the message
+    start = line.rfind(TIME_FIELD)
+    if start < 0:
+        parsed = parse_json_log_line(line)
+        return parsed[0] if parsed else None
+    start += len(TIME_FIELD)
+    end = line.find(b'"', start)
+    return parse_log_time(line[start:end].decode("ascii", "replace")) if end > 0 else None
+
+def parse_json_log_line(line: bytes) -> Optional[Tuple[float, Dict[str, str]]]:
+    """
+    Decode a json-file log line into the entries get_container_logs returns.
+
+    Args:
+        line (bytes): One line of a *-json.log file
+
+    Returns:
+        Optional[Tuple[float, Dict[str, str]]]: Epoch timestamp and the entry
+        with its 'timestamp' and 'message', or None for a malformed line
+    """
+    try:
+        record = json.loads(line)
+        at = parse_log_time(record["time"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    if at is None:
+        return None
+    return at, {"timestamp": record["time"], "message": record.get("log", "").rstrip("\n").rstrip("\r")}
+
+class LogFile:
+    """
+    A log file opened for one query and read with positioned block reads.
+
+    Unlike a memory map, ``os.pread`` on a file truncated in place (json-file
+    rotation with max-file=1, ``truncate -s0``) returns a short read instead
+    of faulting the process with SIGBUS; searches then find nothing past the
+    new end. The last block read is kept, so walking lines reads each block once.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd: Optional[int] = None
+        self.size = 0
+        self.key: Tuple[int, int] = (0, 0)
+        self._block = b""
+        self._block_start = 0
+
+    def __enter__(self) -> "LogFile":
+        self.fd = os.open(self.path, os.O_RDONLY)
+        try:
+            status = os.fstat(self.fd)
+        except OSError:
+            os.close(self.fd)
+            raise
+        self.key = (status.st_dev, status.st_ino)
+        self.size = status.st_size
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self._block = b""
+
+    def read(self, start: int, end: int) -> bytes:
+        """
+        Read the bytes between two offsets, fewer if the file got shorter.
+
+        Args:
+            start (int): First offset
+            end (int): Offset after the last byte
+
+        Returns:
+            bytes: File content
+        """
+        if start >= end:
+            return b""
+        offset = start - self._block_start
+        if offset >= 0 and end - self._block_start <= len(self._block):
+            return self._block[offset:end - self._block_start]
+        return os.pread(self.fd, end - start, start)
+
+    def find(self, start: int, end: int) -> int:
+        """
+        Find the first newline between two offsets.
+
+        Args:
+            start (int): First offset searched
+            end (int): Offset after the last byte searched
+
+        Returns:
+            int: Offset of the newline, -1 if there is none
+        """
+        position = start
+        while position < end:
+            block, block_start = self._load(position)
+            if position >= block_start + len(block):
+                return -1
+            found = block.find(b"\n", position - block_start, end - block_start)
+            if found >= 0:
+                return block_start + found
+            position = block_start + len(block)
+        return -1
+
+    def rfind(self, start: int, end: int) -> int:
+        """
+        Find the last newline between two offsets.
+
+        Args:
+            start (int): First offset searched
+            end (int): Offset after the last byte searched
+
+        Returns:
+            int: Offset of the newline, -1 if there is none
+        """
+        position = end
+        while position > start:
+            block, block_start = self._load(position - 1)
+            if position - 1 >= block_start + len(block):
+                return -1
+            found = block.rfind(b"\n", max(start - block_start, 0), position - block_start)
+            if found >= 0:
+                return block_start + found
+            position = block_start
+        return -1
+
+    def first_time(self) -> Optional[float]:
+        for _, line in lines_forward(self, 0, self.size):
+            return line_time(line)
+        return None
+
+    def last_time(self) -> Optional[float]:
+        for _, line in lines_backward(self, self.size):
+            return line_time(line)
+        return None
+
+    def _load(self, position: int) -> Tuple[bytes, int]:
+        if not self._block_start <= position < self._block_start + len(self._block):
+            self._block_start = position - position % BLOCK_SIZE
+            self._block = os.pread(self.fd, BLOCK_SIZE, self._block_start)
+        return self._block, self._block_start
+
+def lines_backward(log: LogFile, end: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    Walk the complete lines ending at or before an offset, newest first.
+
+    Args:
+        log (LogFile): Open log file
+        end (int): Offset of a line start, or the file size
+
+    Returns:
+        Iterator[Tuple[int, bytes]]: Offset and content (without newline) of each line
+    """
+    if end > 0 and log.read(end - 1, end) != b"\n":
+        # A line still being written
+        end = log.rfind(0, end) + 1
+    while end > 0:
+        start = log.rfind(0, end - 1) + 1
+        yield start, log.read(start, end - 1)
+        end = start
+
+def lines_forward(log: LogFile, start: int, size: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    Walk the complete lines from an offset up to a size.
+
+    Args:
+        log (LogFile): Open log file
+        start (int): Offset of a line start
+        size (int): Offset the walk stops at
+
+    Returns:
+        Iterator[Tuple[int, bytes]]: Offset and content (without newline) of each line
+    """
+    while start < size:
+        end = log.find(start, size)
+        if end < 0:
+            return
+        yield start, log.read(start, end)
+        start = end + 1
+
+class TimeIndex:
+    """
+    Sparse timestamp-to-offset index of one log file.
+
+    Every ``stride`` bytes the first line starting at or after that point is
+    parsed and its (timestamp, offset) kept, so an index over a 4 GiB file with
+    the default 1 MiB stride has 4096 entries and costs as many single-line
+    reads to build. A lookup bisects the index, then the stride itself, line
+    by line. Log files only grow (rotation renames them) until they are
+    truncated, which resets the index, so later queries extend the index over
+    the appended bytes only. Readers on different threads share an index, so
+    extending and bisecting it happen under its own lock.
+    """
+
+    __slots__ = ('stride', 'times', 'offsets', 'indexed_size', 'next_probe', '_lock')
+
+    def __init__(self, stride: int):
+        self.stride = max(stride, 4096)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget every indexed line, as after the file was truncated.
+        """
+        self.times: List[float] = []
+        self.offsets: List[int] = []
+        self.indexed_size = 0
+        self.next_probe = 0
+
+    def update(self, log: LogFile, size: int) -> None:
+        """
+        Index the bytes appended since the last update.
+
+        Args:
+            log (LogFile): Open log file
+            size (int): File size
+        """
+        with self._lock:
+            self._update(log, size)
+
+    def _update(self, log: LogFile, size: int) -> None:
+        if size < self.indexed_size:
+            # Truncated and rewritten in place
+            self.reset()
+        probe = self.next_probe
+        while probe < size:
+            start = 0 if probe == 0 else log.find(probe - 1, size) + 1
+            if start <= 0 and probe > 0:
+                break
+            end = log.find(start, size)
+            if end < 0:
+                break
+            at = line_time(log.read(start, end))
+            if at is not None:
+                # Keep the index sorted across small clock steps back
+                if self.times and at < self.times[-1]:
+                    at = self.times[-1]
+                self.times.append(at)
+                self.offsets.append(start)
+            probe += self.stride
+        self.next_probe = probe
+        self.indexed_size = size
+
+    def offset_of(self, log: LogFile, size: int, at: float, after: bool = False) -> int:
+        """
+        Find the first line with a timestamp at (or after) a point in time.
+
+        Args:
+            log (LogFile): Open log file
+            size (int): File size
+            at (float): Epoch timestamp
+            after (bool): Find the first line strictly later than ``at``
+
+        Returns:
+            int: Offset of that line, or ``size`` if every line is earlier
+        """
+        with self._lock:
+            self._update(log, size)
+            position = (bisect_right if after else bisect_left)(self.times, at)
+            start = self.offsets[position - 1] if position > 0 else 0
+            end = self.offsets[position] if position < len(self.offsets) else size
+        # Bisect the stride between the two indexed lines down to a few lines
+        while end - start > SCAN_BYTES:
+            probe = log.find((start + end) // 2, end) + 1
+            if probe <= 0 or probe >= end:
+                break
+            probe_end = log.find(probe, size)
+            probe_at = line_time(log.read(probe, probe_end)) if probe_end > 0 else None
+            if probe_at is None:
+                break
+            if probe_at > at if after else probe_at >= at:
+                end = probe
+            else:
+                start = probe
+        for offset, line in lines_forward(log, start, size):
+            line_at = line_time(line)
+            if line_at is not None and (line_at > at if after else line_at >= at):
+                return offset
+        return size
+
+class JsonLogReader:
+    """
+    Reads local containers' json-file driver logs straight from disk.
+
+    The container's ``<id>-json.log`` and its rotated ``.1``, ``.2``, ...
+    files (compressed rotations are skipped) are read with positioned block
+    reads. A tail walks backward from the end with ``rfind``, reading only the
+    blocks holding the requested lines, and ``since``/``until`` ranges jump to their
+    first line through each file's sparse timestamp index. Containers are
+    resolved (log path, driver) once through the Docker API; those with
+    another driver or an unreadable log directory are left to the API.
+    """
+
+    def __init__(self, log_dir: str = None, stride: int = None, resolve: Callable[[str], Tuple[str, str]] = None):
+        self.log_dir = log_dir or JSON_LOG_DIR
+        self.stride = stride or JSON_LOG_INDEX_STRIDE
+        self.resolve = resolve or resolve_log_path
+        # Requested ID or name -> path of the current log file
+        self._paths: Dict[str, str] = {}
+        self._missing: Dict[str, float] = {}
+        # (device, inode) -> index, following a file through its renames
+        self._indexes: "OrderedDict[Tuple[int, int], TimeIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.fallbacks = 0
+
+    def read(
+        self,
+        container_id: str,
+        lines: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> Optional[Any]:
+        """
+        Read a local container's log entries from its json-file logs.
+
+        Args:
+            container_id (str): Container ID, short ID or name
+            lines (int, optional): Keep only the last lines of the range, like the API's tail
+            since (float, optional): Epoch timestamp of the earliest line
+            until (float, optional): Epoch timestamp of the latest line
+
+        Returns:
+            Optional[Any]: A list of {'timestamp', 'message'} entries when
+            ``lines`` is given, otherwise an iterator over the range, oldest
+            first; None when the logs cannot be read locally and the Docker API
+            should be used instead
+        """
+        files = self.log_files(container_id)
+        if files is None:
+            with self._lock:
+                self.fallbacks += 1
+            return None
+        with self._lock:
+            self.reads += 1
+        if lines is not None:
+            return self._tail(files, lines, since, until)
+        return self._range(files, since, until)
+
+    def log_files(self, container_id: str) -> Optional[List[str]]:
+        """
+        List a container's log files, newest first.
+
+        Args:
+            container_id (str): Container ID, short ID or name
+
+        Returns:
+            Optional[List[str]]: Current then rotated log files, or None if the
+            container's logs cannot be read locally
+        """
+        path = self._locate(container_id)
+        if path is None:
+            return None
+        directory, name = os.path.split(path)
+        try:
+            entries = os.listdir(directory)
+        except OSError as e:
+            logger.debug(f"Could not list the logs of {container_id}: {str(e)}")
+            self._forget(container_id)
+            return None
+        rotated = []
+        for entry in entries:
+            if entry.startswith(name + "."):
+                match = ROTATED_SUFFIX.search(entry[len(name):])
+                if match and match.start() == 0:
+                    rotated.append((int(match.group(1)), os.path.join(directory, entry)))
+        return [path] + [rotated_path for _, rotated_path in sorted(rotated)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "log_dir": self.log_dir,
+                "tracked": len(self._paths),
+                "indexed_files": len(self._indexes),
+                "index_entries": sum(len(index.offsets) for index in self._indexes.values()),
+                "reads": self.reads,
+                "fallbacks": self.fallbacks
+            }
+
+    def _tail(self, files: List[str], lines: int, since: Optional[float], until: Optional[float]) -> List[Dict[str, str]]:
+        entries: List[Dict[str, str]] = []
+        for path in files:
+            if len(entries) >= lines:
+                break
+            try:
+                with LogFile(path) as log:
+                    if not log.size:
+                        continue
+                    end = log.size
+                    if until is not None:
+                        first = log.first_time()
+                        if first is not None and first > until:
+                            continue
+                        end = self._index(log).offset_of(log, log.size, until, after=True)
+                    for _, line in lines_backward(log, end):
+                        parsed = parse_json_log_line(line)
+                        if parsed is None:
+                            continue
+                        at, entry = parsed
+                        if since is not None and at < since:
+                            return entries[::-1]
+                        entries.append(entry)
+                        if len(entries) >= lines:
+                            break
+            except (OSError, ValueError) as e:
+                # Rotated away or removed between listing and mapping
+                logger.debug(f"Could not read {path}: {str(e)}")
+        return entries[::-1]
+
+    def _range(self, files: List[str], since: Optional[float], until: Optional[float]) -> Iterator[Dict[str, str]]:
+        for path in reversed(files):
+            try:
+                with LogFile(path) as log:
+                    if not log.size:
+                        continue
+                    start = 0
+                    if since is not None:
+                        last = log.last_time()
+                        if last is not None and last < since:
+                            continue
+                        start = self._index(log).offset_of(log, log.size, since)
+                    for _, line in lines_forward(log, start, log.size):
+                        parsed = parse_json_log_line(line)
+                        if parsed is None:
+                            continue
+                        if until is not None and parsed[0] > until:
+                            return
+                        yield parsed[1]
+            except (OSError, ValueError) as e:
+                logger.debug(f"Could not read {path}: {str(e)}")
+
+    def _index(self, log: LogFile) -> TimeIndex:
+        with self._lock:
+            index = self._indexes.get(log.key)
+            if index is None:
+                index = self._indexes[log.key] = TimeIndex(self.stride)
+                if len(self._indexes) > MAX_TRACKED:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(log.key)
+        return index
+
+    def _locate(self, container_id: str) -> Optional[str]:
+        if not JSON_LOG_READER_ENABLED:
+            return None
+        with self._lock:
+            path = self._paths.get(container_id)
+            missing_since = self._missing.get(container_id)
+        if path is not None:
+            return path
+        if missing_since is not None and time.monotonic() - missing_since < MISSING_RETRY_SECONDS:
+            return None
+
+        try:
+            log_path, driver = self.resolve(container_id)
+        except Exception as e:
+            logger.debug(f"Could not resolve container {container_id}: {str(e)}")
+            return None
+
+        path = None
+        if driver == "json-file" and isinstance(log_path, str) and log_path:
+            # LogPath is the daemon's path: keep the <id>/<id>-json.log part under our log directory
+            candidate = os.path.join(self.log_dir, os.path.basename(os.path.dirname(log_path)), os.path.basename(log_path))
+            if os.access(candidate, os.R_OK):
+                path = candidate
+
+        with self._lock:
+            if len(self._paths) + len(self._missing) >= MAX_TRACKED:
+                self._paths.clear()
+                self._missing.clear()
+            if path is None:
+                self._missing[container_id] = time.monotonic()
+            else:
+                self._paths[container_id] = path
+        return path
+
+    def _forget(self, container_id: str) -> None:
+        with self._lock:
+            self._paths.pop(container_id, None)
+
+def resolve_log_path(container_id: str) -> Tuple[str, str]:
+    """
+    Get a local container's log file path and logging driver from the Docker API.
+
+    Args:
+        container_id (str): Container ID, short ID or name
+
+    Returns:
+        Tuple[str, str]: Log path as seen by the daemon, and the driver name
+    """
+    attrs = get_client().containers.get(container_id).attrs
+    return attrs.get("LogPath"), attrs.get("HostConfig", {}).get("LogConfig", {}).get("Type")
+
+# Shared reader for the local daemon's containers
+local_logs = JsonLogReader()
@@ -0,0 +1,246 @@
+import os
+import time
+import heapq
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.container_stats import LogFilter, LogStream
+from backend.docker_async import get_executor, lane_size, LOG_READER_LANE
+from backend.json_logs import parse_log_time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Containers in one merged log stream
+MAX_MERGED_CONTAINERS = int(os.getenv("MAX_MERGED_CONTAINERS", "20"))
+# Lines read ahead per container while waiting for the others
+LOG_MERGE_BUFFER_LINES = int(os.getenv("LOG_MERGE_BUFFER_LINES", "1000"))
+# Follow mode: how long a quiet container may hold back newer lines of the others
+LOG_MERGE_WINDOW_MS = float(os.getenv("LOG_MERGE_WINDOW_MS", "250"))
+
+POLL_SECONDS = 0.5
+# How long close() waits for the readers to finish
+READER_JOIN_SECONDS = 2.0
+
+# Workers of the reader lane not yet promised to a merged stream. A stream
+# takes one per source up front, so its readers never queue behind other
+# streams' readers, which would stall its merge.
+_reader_permits = threading.BoundedSemaphore(lane_size(LOG_READER_LANE))
+
+def parse_container_refs(values: Iterable[str], remote_host: str = None) -> List[Tuple[str, Optional[str]]]:
+    """
+    Split "container" or "container@host" references, dropping duplicates.
+
+    Args:
+        values (Iterable[str]): References, possibly comma-separated
+        remote_host (str, optional): Host of references without one
+
+    Returns:
+        List[Tuple[str, Optional[str]]]: Container ID or name and its Docker host, in order
+    """
+    refs = []
+    for value in values:
+        for part in value.split(","):
+            container_id, _, host = part.strip().partition("@")
+            ref = (container_id, host or remote_host or None)
+            if container_id and ref not in refs:
+                refs.append(ref)
+    return refs
+
+class MergedLogStream:
+    """
+    Timestamp-ordered k-way merge of several containers' log streams.
+
+    Every source is read on a worker of the bounded log reader lane into a
+    shared queue; a per-source
+    semaphore caps the lines read ahead, so memory stays bounded per input
+    however fast one container logs. The merge keeps each source's oldest
+    pending line in a heap and emits the earliest once every source has a
+    line pending or has ended. In follow mode a source that has been quiet for
+    ``window`` seconds no longer holds the others back, which bounds the delay
+    of a live line at the cost of possible reordering across sources whose
+    clocks or delivery differ by more than the window. Entries get the fields
+    of their source (container, host) added. ``start`` takes the readers'
+    workers, or raises RuntimeError when the lane cannot take every source.
+    ``close`` may be called from another thread to end the stream.
+    """
+
+    def __init__(
+        self,
+        sources: List[Tuple[Dict[str, Any], Iterable[Dict[str, Any]]]],
+        follow: bool = False,
+        window: float = None,
+        buffer_lines: int = None
+    ):
+        self.sources = sources
+        self.follow = follow
+        self.window = LOG_MERGE_WINDOW_MS / 1000 if window is None else window
+        self.buffer_lines = buffer_lines or LOG_MERGE_BUFFER_LINES
+        self.lines_merged = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._slots = [threading.BoundedSemaphore(self.buffer_lines) for _ in sources]
+        self._closed = threading.Event()
+        self._readers: List[Future] = []
+        self._started = False
+
+    def start(self) -> None:
+        """
+        Start reading every source on the log reader lane.
+
+        Raises:
+            RuntimeError: If the lane has no worker left for every source
+        """
+        if self._started:
+            return
+        taken = 0
+        while taken < len(self.sources) and _reader_permits.acquire(blocking=False):
+            taken += 1
+        if taken < len(self.sources):
+            for _ in range(taken):
+                _reader_permits.release()
+            raise RuntimeError(f"Too many merged log readers (limit {lane_size(LOG_READER_LANE)})")
+        self._started = True
+        executor = get_executor(LOG_READER_LANE)
+        for index, (_, source) in enumerate(self.sources):
+            try:
+                self._readers.append(executor.submit(self._read, index, source))
+            except RuntimeError:
+                # The lane is shutting down: give back the permits of the readers not started
+                for _ in range(len(self.sources) - index):
+                    _reader_permits.release()
+                raise
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        count = len(self.sources)
+        pending: List[deque] = [deque() for _ in range(count)]
+        heads: List[Tuple[float, int, int, Dict[str, Any]]] = []
+        in_heap = [False] * count
+        ended = [False] * count
+        last_time = [0.0] * count
+        last_seen = [time.monotonic()] * count
+        sequence = 0
+
+        try:
+            self.start()
+            while not self._closed.is_set():
+                now = time.monotonic()
+                # Sources the next line has to wait for
+                blocking = [
+                    index for index in range(count)
+                    if not ended[index] and not in_heap[index]
+                    and not (self.follow and now - last_seen[index] >= self.window)
+                ]
+                if heads and not blocking:
+                    _, _, index, entry = heapq.heappop(heads)
+                    in_heap[index] = False
+                    self._slots[index].release()
+                    self.lines_merged += 1
+                    yield entry
+                    if pending[index]:
+                        heapq.heappush(heads, pending[index].popleft())
+                        in_heap[index] = True
+                    continue
+                if all(ended) and not heads:
+                    return
+
+                timeout = POLL_SECONDS
+                if self.follow and blocking:
+                    timeout = min(timeout, max(min(last_seen[index] for index in blocking) + self.window - now, 0.001))
+                try:
+                    index, entry, final = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+
+                last_seen[index] = time.monotonic()
+                if final:
+                    # A failed source ends with its error, the others go on
+                    ended[index] = True
+                    if entry is not None:
+                        yield entry
+                    continue
+                at = parse_log_time(entry.get("timestamp") or "")
+                if at is None:
+                    at = last_time[index]
+                last_time[index] = at
+                item = (at, sequence, index, entry)
+                sequence += 1
+                if in_heap[index]:
+                    pending[index].append(item)
+                else:
+                    heapq.heappush(heads, item)
+                    in_heap[index] = True
+        finally:
+            self.close()
+
+    def close(self, wait_readers: bool = True) -> None:
+        """
+        Stop every source, unblocking follow-mode reads waiting for new lines.
+
+        Args:
+            wait_readers (bool, optional): Wait (up to READER_JOIN_SECONDS) for the
+                readers to finish; pass False from an event loop
+        """
+        self._closed.set()
+        for _, source in self.sources:
+            close = getattr(source, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+        if wait_readers and self._readers:
+            _, running = wait(self._readers, timeout=READER_JOIN_SECONDS)
+            if running:
+                logger.warning(f"{len(running)} log readers still running after close")
+
+    def _read(self, index: int, source: Iterable[Dict[str, Any]]) -> None:
+        fields = self.sources[index][0]
+        try:
+            for entry in source:
+                while not self._slots[index].acquire(timeout=POLL_SECONDS):
+                    if self._closed.is_set():
+                        return
+                if self._closed.is_set():
+                    return
+                entry.update(fields)
+                self._queue.put((index, entry, False))
+            self._queue.put((index, None, True))
+        except Exception as e:
+            if not self._closed.is_set():
+                logger.error(f"Error reading logs of {fields}: {str(e)}")
+                self._queue.put((index, dict(fields, error=str(e)), True))
+        finally:
+            _reader_permits.release()
+
+def merged_container_logs(
+    refs: List[Tuple[str, Optional[str]]],
+    tail: Optional[int] = 100,
+    follow: bool = True,
+    since: Optional[float] = None,
+    log_filter: LogFilter = None
+) -> MergedLogStream:
+    """
+    Merge the log streams of several containers, possibly on different Docker hosts.
+
+    Args:
+        refs (List[Tuple[str, Optional[str]]]): Container ID or name and Docker host of each input
+        tail (int, optional): Lines to start from in each container's log, None for all
+        follow (bool, optional): Keep streaming new lines
+        since (float, optional): Epoch timestamp of the earliest line
+        log_filter (LogFilter, optional): Filter applied to every container's lines
+
+    Returns:
+        MergedLogStream: One timeline of entries, each with its container (and host)
+    """
+    sources = []
+    for container_id, host in refs:
+        fields = {"container": container_id}
+        if host:
+            fields["host"] = host
+        sources.append((fields, LogStream(container_id, tail, follow, since, log_filter, host)))
+    return MergedLogStream(sources, follow)
@@ -1,23 +1,44 @@
 import os
+import json
 import toml
+import asyncio
+import ipaddress
 import logging
+import threading
+import time
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional
+from starlette.background import BackgroundTask
+from typing import Annotated, Callable, List, Dict, Any, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import local modules
-from backend.docker_scan import get_running_containers, get_container_by_name
-from backend.zeronsd_writer import generate_config, reload_zeronsd
-from backend.container_stats import get_container_stats, get_container_logs
-from backend.dns_logs import log_dns_access, get_recent_dns_accesses
-from backend.config_manager import get_disabled_containers, set_disabled_containers
+from backend.docker_scan import get_running_containers, matches_labels, project_fields
+from backend.zeronsd_writer import generate_config, reload_zeronsd, get_reload_stats
+from backend.container_stats import get_container_stats, prime_container_stats, get_container_logs, LogFilter, LogStream
+from backend.log_merge import merged_container_logs, parse_container_refs, MAX_MERGED_CONTAINERS
+from backend.cgroup_stats import local_stats
+from backend.json_logs import local_logs
+from backend.dns_logs import get_store as get_dns_log_store, log_dns_accesses, get_recent_dns_accesses, load_recent_dns_accesses, migrate_legacy_dns_logs, get_dns_hits, MAX_REPORTED_ERRORS
+from backend.config_manager import get_disabled_containers, update_disabled_containers, settings_version, migrate_legacy_settings
+from backend.state_store import get_state_store, close_state_stores, ALIAS_RECORD_TYPES
+from backend.inventory import inventory
+from backend.reload_scheduler import ReloadScheduler
+from backend.stats_stream import stats_broadcaster
+from backend.stats_history import stats_history
+from backend.docker_clients import pool as docker_pool
+from backend.domain_index import DomainIndex, config_mtime
+from backend.conditional import ConditionalRoutes, ConditionalGetMiddleware, CompressionMiddleware
+from backend.fleet import configured_hosts, iter_fleet_scan, scan_fleet, summarize_fleet, validate_timeout, fleet_pool
+from backend.docker_async import run_docker, iterate_in_thread, shutdown_executors, lane_size, SLOW_LANE, FANOUT_LANE
+from backend.tracing import TracingMiddleware, TRACING_ENABLED, tracer, span
+from backend.metrics import MetricsMiddleware, CONTAINER_LISTINGS, CONTENT_TYPE as METRICS_CONTENT_TYPE, callback as metrics_callback, register_caches, render as render_metrics
 
 # Initialize FastAPI app
 app = FastAPI(title="ZeroDeploy", description="Local DNS management for Docker containers", version="1.1")
@@ -29,27 +50,125 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Trace-Id"],
 )
 
+# Polled endpoints answer If-None-Match with 304; larger bodies are gzipped
+conditional_routes = ConditionalRoutes()
+app.add_middleware(ConditionalGetMiddleware, routes=conditional_routes)
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")))
+# Outermost, so request latencies include compression and 304s answered before routing
+app.add_middleware(MetricsMiddleware)
+# Opt-in request tracing: nested spans, a Server-Timing header and buffered traces
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
 # Environment variables
 DOMAIN_SUFFIX = os.getenv("DOMAIN_SUFFIX", "vexinet.local")
 DNS_CONFIG_PATH = os.getenv("DNS_CONFIG_PATH", "/app/config/config.toml")
+INVENTORY_ENABLED = os.getenv("INVENTORY_ENABLED", "true").lower() == "true"
+STATS_HISTORY_ENABLED = os.getenv("STATS_HISTORY_ENABLED", "false").lower() == "true"
+DNS_LOG_BATCH_SIZE = int(os.getenv("DNS_LOG_BATCH_SIZE", "5000"))
+MAX_LOG_STREAMS = int(os.getenv("MAX_LOG_STREAMS", "64"))
+SSE_KEEPALIVE_SECONDS = 15
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Container ID / name / FQDN / address index, kept current by the inventory
+domain_index = DomainIndex(DOMAIN_SUFFIX)
+
+def index_inventory_event(action: str, payload: Any) -> None:
+    """Inventory listener: update the domain index, re-reading config.toml after every seed"""
+    domain_index.apply_inventory_event(action, payload)
+    if action == "reset":
+        domain_index.refresh_config(DNS_CONFIG_PATH)
+
+inventory.add_listener(index_inventory_event)
+
+def containers_version(params) -> Optional[str]:
+    """State version behind /api/containers: inventory generation plus persisted settings"""
+    if params.get("remote_host") or not inventory.is_ready():
+        return None
+    return f"{inventory.generation}:{settings_version()}"
+
+def domains_version(params) -> Optional[str]:
+    """State version behind /api/domains: the domain index version and the config.toml mtime (one stat)"""
+    if params.get("remote_host") or not inventory.is_ready():
+        return None
+    # Edits by another worker or an external writer change the tag before the index has re-read them
+    return f"{domain_index.version}:{config_mtime(DNS_CONFIG_PATH)}"
+
+def dns_logs_version(params) -> Optional[str]:
+    """State version behind /api/dns/logs: the access log sequence number"""
+    return str(get_dns_log_store().sequence)
+
+conditional_routes.register("/api/containers", containers_version)
+conditional_routes.register("/api/domains", domains_version)
+conditional_routes.register("/api/dns/logs", dns_logs_version)
+
+def cache_counts() -> Dict[str, tuple]:
+    """Hits and misses of the caches in front of Docker and the polled endpoints, read at scrape time"""
+    counts = {
+        "docker_clients": (docker_pool.hits, docker_pool.misses),
+        "inventory": (CONTAINER_LISTINGS.labels("inventory").value, CONTAINER_LISTINGS.labels("daemon").value)
+    }
+    for path, stats in conditional_routes.stats().items():
+        counts[f"etag:{path}"] = (stats["not_modified"], stats["requests"] - stats["not_modified"])
+    return counts
+
+register_caches(cache_counts)
+metrics_callback("zerodeploy_dns_log_entries", "DNS access events in the state store", "gauge", (),
+                 lambda: {(): get_state_store().dns_access_count()})
+metrics_callback("zerodeploy_local_stats_reads_total", "Local container stats read from cgroup files, or left to the Docker API", "counter", ("source",),
+                 lambda: {("cgroup",): local_stats.reads, ("docker_fallback",): local_stats.fallbacks})
+metrics_callback("zerodeploy_local_log_reads_total", "Local container logs read from json-file logs, or left to the Docker API", "counter", ("source",),
+                 lambda: {("json_file",): local_logs.reads, ("docker_fallback",): local_logs.fallbacks})
+metrics_callback("zerodeploy_state_db_bytes", "Size of the state database and its write-ahead log", "gauge", ("file",),
+                 lambda: {(name,): size for name, size in get_state_store().file_sizes().items()})
+
+def list_running_containers(remote_host: str = None, labels: List[str] = None) -> List[Dict[str, Any]]:
+    """Get running containers, answering from the in-memory inventory when it is live"""
+    if not remote_host and inventory.is_ready():
+        CONTAINER_LISTINGS.labels("inventory").inc()
+        with span("inventory.snapshot"):
+            return [container for container in inventory.snapshot() if matches_labels(container, labels)]
+    CONTAINER_LISTINGS.labels("daemon").inc()
+    return get_running_containers(remote_host, labels)
+
+def sample_container_stats(container_id: str) -> Dict[str, Any]:
+    """Get a local container's stats for the history sampler, reusing a live stream's sample"""
+    return stats_broadcaster.latest(container_id) or get_container_stats(container_id)
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 # API routes
 @app.get("/api/containers", response_model=List[Dict[str, Any]])
-async def list_containers(remote_host: str = None):
-    """Get all running containers with their DNS status"""
+async def list_containers(
+    remote_host: str = None,
+    fields: Optional[str] = None,
+    label: Annotated[Optional[List[str]], Query()] = None
+):
+    """Get all running containers with their DNS status, optionally filtered by label and projected to some fields"""
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
     try:
-        containers = get_running_containers(remote_host)
+        # Validate the projection before touching the daemon
+        project_fields([], selected)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        containers = await run_docker(list_running_containers, remote_host, label)
 
         # Apply local overrides for DNS status
         if not remote_host:  # Only apply persistence for local host for now
-            disabled_ids = get_disabled_containers()
+            with span("settings.disabled"):
+                disabled_ids = await run_docker(get_disabled_containers)
             for container in containers:
                 if container['id'] in disabled_ids:
                     container['dns_enabled'] = False
 
-        return containers
+        return project_fields(containers, selected)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -63,167 +182,725 @@ async def scan_remote_host(request: Request):
         if not remote_host:
             raise HTTPException(status_code=400, detail="Remote host URL is required")
             
-        containers = get_running_containers(remote_host)
+        containers = await run_docker(get_running_containers, remote_host)
         # Remote host persistence logic is not implemented yet,
         # as settings.json is local to this container.
         return {"success": True, "containers": containers, "remote_host": remote_host}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/domains", response_model=Dict[str, Any])
-async def get_domains(remote_host: str = None):
-    """Get current DNS configuration"""
+@app.get("/api/fleet/hosts", response_model=Dict[str, Any])
+async def get_fleet_hosts():
+    """Get the Docker hosts configured for fleet scans"""
+    return {"hosts": configured_hosts()}
+
+@app.post("/api/fleet/scan")
+async def scan_fleet_hosts(request: Request):
+    """Scan many Docker hosts concurrently; unreachable hosts are reported as degraded"""
     try:
-        # Parse the current config.toml
-        config_services = []
-        if os.path.exists(DNS_CONFIG_PATH):
-            try:
+        data = await request.json()
+    except Exception:
+        data = {}
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    hosts = data.get("hosts") or configured_hosts()
+    try:
+        timeout = validate_timeout(data.get("timeout"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not hosts:
+        raise HTTPException(status_code=400, detail="No hosts given and DOCKER_HOSTS is not set")
+    if not isinstance(hosts, list):
+        raise HTTPException(status_code=400, detail="hosts must be a list of Docker host URLs")
+
+    if not data.get("stream"):
+        return await scan_fleet(hosts, timeout)
+
+    async def results():
+        # One line per host as it answers, then the summary
+        started = time.perf_counter()
+        answered = []
+        async for result in iter_fleet_scan(hosts, timeout):
+            answered.append(result)
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"summary": summarize_fleet(answered, time.perf_counter() - started)}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson", headers=SSE_HEADERS)
+
+def sync_domain_index() -> None:
+    """Bring the domain index up to date: rescan containers when the inventory is not live, re-read a changed config.toml"""
+    if not inventory.is_ready():
+        domain_index.replace_containers(get_running_containers())
+    domain_index.refresh_config(DNS_CONFIG_PATH)
+
+def build_domains(remote_host: str = None) -> Dict[str, Any]:
+    """Build the domain view from config.toml and the running containers"""
+    if not remote_host and inventory.is_ready():
+        # Served from the maintained index; one stat tells whether config.toml was rewritten
+        domain_index.refresh_config(DNS_CONFIG_PATH)
+        with span("domains.index"):
+            domains = domain_index.domains()
+        return {"domains": domains, "domain_suffix": DOMAIN_SUFFIX, "remote_host": remote_host}
+
+    # Parse the current config.toml
+    config_services = []
+    if os.path.exists(DNS_CONFIG_PATH):
+        try:
+            with span("config.toml_load"):
                 config_data = toml.load(DNS_CONFIG_PATH)
-                config_services = config_data.get("services", [])
-            except Exception as e:
-                logger.error(f"Error parsing {DNS_CONFIG_PATH}: {e}")
+            config_services = config_data.get("services", [])
+        except Exception as e:
+            logger.error(f"Error parsing {DNS_CONFIG_PATH}: {e}")
 
-        # Create a mapping of FQDN to entry for quick lookup
-        dns_entries = {s.get("name"): s for s in config_services if "name" in s}
+    # Create a mapping of FQDN to entry for quick lookup
+    dns_entries = {s.get("name"): s for s in config_services if "name" in s}
 
-        containers = get_running_containers(remote_host)
+    with span("containers.list"):
+        containers = list_running_containers(remote_host)
 
-        # Apply local overrides for DNS status
-        if not remote_host:
+    # Apply local overrides for DNS status
+    if not remote_host:
+        with span("settings.disabled"):
             disabled_ids = get_disabled_containers()
-            for container in containers:
-                if container['id'] in disabled_ids:
-                    container['dns_enabled'] = False
+        for container in containers:
+            if container['id'] in disabled_ids:
+                container['dns_enabled'] = False
+
+    domains = {}
+    
+    for container in containers:
+        container_name = container["name"]
+        fqdn = f"{container_name}.{DOMAIN_SUFFIX}"
+
+        # Check if this container has an entry in config.toml
+        entry = dns_entries.get(fqdn)
 
-        domains = {}
+        if entry:
+            domains[container_name] = {
+                "name": fqdn,
+                "enabled": True,
+                "address": entry.get("address", container.get("ip_address", ""))
+            }
+        else:
+            domains[container_name] = {
+                "name": fqdn,
+                "enabled": False,
+                "address": container.get("ip_address", "")
+            }
         
-        for container in containers:
-            container_name = container["name"]
-            fqdn = f"{container_name}.{DOMAIN_SUFFIX}"
-
-            # Check if this container has an entry in config.toml
-            entry = dns_entries.get(fqdn)
-
-            if entry:
-                domains[container_name] = {
-                    "name": fqdn,
-                    "enabled": True,
-                    "address": entry.get("address", container.get("ip_address", ""))
-                }
-            else:
-                domains[container_name] = {
-                    "name": fqdn,
-                    "enabled": False,
-                    "address": container.get("ip_address", "")
-                }
-            
-        return {"domains": domains, "domain_suffix": DOMAIN_SUFFIX, "remote_host": remote_host}
+    return {"domains": domains, "domain_suffix": DOMAIN_SUFFIX, "remote_host": remote_host}
+
+@app.get("/api/domains", response_model=Dict[str, Any])
+async def get_domains(remote_host: str = None):
+    """Get current DNS configuration"""
+    try:
+        return await run_docker(build_domains, remote_host)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def apply_domain_update(container_configs: List[Dict[str, Any]], persisted_configs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Regenerate the DNS config, persist disabled containers and reload ZeroNSD if the records changed"""
+    # Generate new config
+    changes = generate_config(container_configs, domain_suffix=DOMAIN_SUFFIX, aliases=get_state_store().aliases())
+    
+    if not changes:
+        raise HTTPException(status_code=500, detail="Failed to generate DNS configuration")
+    
+    # Save disabled containers for persistence (only for local host)
+    if persisted_configs:
+        # The last entry for a container wins
+        requested = {}
+        for container in persisted_configs:
+            container_id = container.get("id")
+            if container_id:
+                requested[container_id] = container.get("dns_enabled", True)
+
+        # One locked read-modify-write, so concurrent updates cannot drop each other's changes
+        updated_disabled = update_disabled_containers(
+            enabled=[container_id for container_id, enabled in requested.items() if enabled],
+            disabled=[container_id for container_id, enabled in requested.items() if not enabled]
+        )
+        domain_index.set_disabled(updated_disabled)
+
+    # Reload ZeroNSD only when the rendered config changed
+    if changes["written"]:
+        domain_index.refresh_config(DNS_CONFIG_PATH)
+    reload_success = reload_zeronsd() if changes["written"] else True
+    return {"success": reload_success, "changes": changes}
+
+# Bursts of domain updates are merged into one generate-and-reload cycle per window
+reload_scheduler = ReloadScheduler(apply_domain_update)
+
 @app.post("/api/domains", response_model=Dict[str, Any])
-async def update_domains(request: Request):
+async def update_domains(request: Request, wait: bool = True):
     """Update DNS configuration based on container data"""
     try:
         data = await request.json()
         container_configs = data.get("containers", [])
         remote_host = data.get("remote_host")
         
-        # Generate new config
-        success = generate_config(container_configs, domain_suffix=DOMAIN_SUFFIX)
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to generate DNS configuration")
+        ticket = reload_scheduler.submit(container_configs, remote_host)
+        if not wait:
+            return {"success": True, "message": "DNS configuration update queued", "remote_host": remote_host, "ticket": ticket.id}
+
+        result = await asyncio.wrap_future(ticket.future)
         
-        # Save disabled containers for persistence (only for local host)
-        if not remote_host:
-            # Load current disabled list
-            current_disabled = get_disabled_containers()
+        return {
+            "success": result["success"],
+            "message": "DNS configuration updated" if result["changes"]["written"] else "DNS configuration unchanged",
+            "remote_host": remote_host,
+            "changes": result["changes"],
+            "ticket": ticket.id,
+            "merged_requests": ticket.batch_size
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-            # Process the incoming update
-            updated_disabled = set(current_disabled)
+async def refresh_domain_index() -> None:
+    """Make sure lookups see current data; while the inventory keeps the index live only a changed config.toml is re-read"""
+    if not inventory.is_ready() or domain_index.config_changed(DNS_CONFIG_PATH):
+        await run_docker(sync_domain_index)
 
-            for container in container_configs:
-                container_id = container.get("id")
-                if not container_id:
-                    continue
+@app.get("/api/domains/lookup/{key}", response_model=Dict[str, Any])
+async def lookup_domain(key: str):
+    """Find a container's DNS record by ID, short ID, name, FQDN or address"""
+    await refresh_domain_index()
+    record = domain_index.lookup(key)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"No DNS record for {key}")
+    return record.to_dict()
 
-                is_enabled = container.get("dns_enabled", True)
+@app.get("/api/domains/reverse/{address}", response_model=Dict[str, Any])
+async def reverse_lookup_domain(address: str):
+    """Find the names pointing at an address, as a PTR query would"""
+    try:
+        ptr = ipaddress.ip_address(address).reverse_pointer
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid IP address: {address}")
+    await refresh_domain_index()
+    records = domain_index.reverse(address)
+    if not records:
+        raise HTTPException(status_code=404, detail=f"No DNS record for {address}")
+    return {"address": address, "ptr": ptr, "names": [record.fqdn for record in records], "records": [record.to_dict() for record in records]}
 
-                if is_enabled:
-                    # If explicitly enabled, remove from disabled list
-                    if container_id in updated_disabled:
-                        updated_disabled.remove(container_id)
-                else:
-                    # If explicitly disabled, add to disabled list
-                    updated_disabled.add(container_id)
+@app.get("/api/domains/index", response_model=Dict[str, Any])
+async def get_domain_index_stats():
+    """Get the domain index size and version"""
+    return domain_index.stats()
 
-            set_disabled_containers(list(updated_disabled))
+def local_container_configs() -> List[Dict[str, Any]]:
+    """Get the local containers with their persisted DNS status, as the UI submits them"""
+    containers = list_running_containers()
+    disabled_ids = get_disabled_containers()
+    for container in containers:
+        if container['id'] in disabled_ids:
+            container['dns_enabled'] = False
+    return containers
 
-        # Reload ZeroNSD
-        reload_success = reload_zeronsd()
-        
-        return {"success": reload_success, "message": "DNS configuration updated", "remote_host": remote_host}
+async def rerender_domains() -> Dict[str, Any]:
+    """Regenerate the DNS config for the local containers through the reload scheduler"""
+    containers = await run_docker(local_container_configs)
+    ticket = reload_scheduler.submit(containers)
+    return await asyncio.wrap_future(ticket.future)
+
+def alias_name(name: str) -> str:
+    """Qualify a bare alias name with the domain suffix"""
+    name = name.rstrip(".")
+    return name if "." in name else f"{name}.{DOMAIN_SUFFIX}"
+
+@app.get("/api/aliases", response_model=List[Dict[str, Any]])
+async def list_aliases():
+    """Get the custom DNS aliases"""
+    try:
+        return await run_docker(get_state_store().aliases)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.put("/api/aliases/{name}", response_model=Dict[str, Any])
+async def set_alias(name: str, request: Request):
+    """Point an alias at a fixed address ({"address"}) or at a container ({"container_id"})"""
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    address = data.get("address")
+    container_id = data.get("container_id")
+    record_type = data.get("type", "A")
+    if record_type not in ALIAS_RECORD_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid alias type: {record_type!r}, expected one of {', '.join(ALIAS_RECORD_TYPES)}")
+    if container_id is not None and (not isinstance(container_id, str) or not container_id):
+        raise HTTPException(status_code=400, detail="container_id must be a non-empty string")
+    if address is not None:
+        try:
+            if not isinstance(address, str):
+                raise ValueError(address)
+            parsed = ipaddress.ip_address(address)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid IP address: {address}")
+        if parsed.version != (6 if record_type == "AAAA" else 4):
+            raise HTTPException(status_code=400, detail=f"{address} is not an IPv{6 if record_type == 'AAAA' else 4} address for a {record_type} record")
+    try:
+        await run_docker(get_state_store().set_alias, alias_name(name), address, container_id, record_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        result = await rerender_domains()
+        return {"success": result["success"], "name": alias_name(name), "changes": result["changes"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/api/aliases/{name}", response_model=Dict[str, Any])
+async def delete_alias(name: str):
+    """Remove a custom DNS alias"""
+    if not await run_docker(get_state_store().remove_alias, alias_name(name)):
+        raise HTTPException(status_code=404, detail=f"No alias named {alias_name(name)}")
+    try:
+        result = await rerender_domains()
+        return {"success": result["success"], "name": alias_name(name), "changes": result["changes"]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/domains/tickets/{ticket_id}", response_model=Dict[str, Any])
+async def get_domain_update_ticket(ticket_id: str):
+    """Poll the status of a queued DNS configuration update"""
+    ticket = reload_scheduler.get_ticket(ticket_id)
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Unknown or expired ticket")
+    return ticket.status()
+
+@app.get("/api/domains/scheduler", response_model=Dict[str, Any])
+async def get_domain_scheduler_stats():
+    """Get how many domain updates were merged into each reload cycle"""
+    return reload_scheduler.stats()
+
 @app.post("/api/reload", response_model=Dict[str, Any])
 async def force_reload():
     """Force reload of ZeroNSD configuration"""
     try:
-        success = reload_zeronsd()
+        success = await run_docker(reload_zeronsd)
         return {"success": success, "message": "DNS service reloaded"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
         
+@app.get("/api/reload/stats", response_model=Dict[str, Any])
+async def reload_stats():
+    """Get ZeroNSD reload counters and measured resolution gaps"""
+    return get_reload_stats()
+
+@app.get("/api/inventory", response_model=Dict[str, Any])
+async def get_inventory_status():
+    """Get the state of the in-memory container inventory"""
+    return inventory.status()
+
+@app.get("/api/cache/stats", response_model=Dict[str, Any])
+async def get_cache_stats():
+    """Get conditional GET counters and 304 hit ratios per polled endpoint"""
+    return conditional_routes.stats()
+
+@app.get("/api/docker/pool", response_model=Dict[str, Any])
+async def get_docker_pool_stats():
+    """Get Docker client pool hit counters and per-host connection reuse, including the fleet scan pool"""
+    stats = docker_pool.stats()
+    stats["fleet"] = fleet_pool.stats()
+    return stats
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Expose request, Docker API, config generation, reload and cache metrics in the Prometheus text format"""
+    # Scrape-time values query the state store, so render off the event loop
+    return Response(await run_docker(render_metrics), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/traces", response_model=Dict[str, Any])
+async def list_traces(limit: int = 50, min_duration_ms: float = 0):
+    """Get the buffered request traces, newest first (send X-ZeroDeploy-Trace: 1 or profile to force one)"""
+    return {"enabled": TRACING_ENABLED, **tracer.stats(), "traces": tracer.traces(limit, min_duration_ms)}
+
+@app.get("/api/traces/{trace_id}", response_model=Dict[str, Any])
+async def get_trace(trace_id: int):
+    """Get one trace with its nested spans"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace.to_dict()
+
+@app.get("/api/traces/{trace_id}/profile")
+async def get_trace_profile(trace_id: int):
+    """Get the stacks sampled during a profiled request, in collapsed (flamegraph) format"""
+    trace = tracer.get(trace_id)
+    if trace is None or not trace.profiling:
+        raise HTTPException(status_code=404, detail=f"No profile for trace {trace_id}")
+    return Response(trace.collapsed_stacks(), media_type="text/plain")
+
 @app.get("/api/containers/{container_id}/stats", response_model=Dict[str, Any])
 async def get_stats(container_id: str, remote_host: str = None):
     """Get statistics for a specific container"""
     try:
-        stats = get_container_stats(container_id, remote_host)
+        stats = await run_docker(get_container_stats, container_id, remote_host, lane=SLOW_LANE)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def collect_container_stats(container_id: str, remote_host: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """Read one container's stats for a bulk request, capturing errors per container"""
+    latest = stats_broadcaster.latest(container_id, remote_host)
+    if latest:
+        return {"id": container_id, "status": "ok", "stats": latest}
+    async with semaphore:
+        try:
+            stats = await run_docker(get_container_stats, container_id, remote_host, lane=FANOUT_LANE)
+            return {"id": container_id, "status": "ok", "stats": stats}
+        except Exception as e:
+            return {"id": container_id, "status": "error", "error": str(e)}
+
+async def prime_bulk_stats(container_id: str, remote_host: str, semaphore: asyncio.Semaphore) -> None:
+    """Take a local container's CPU baseline before a bulk read, unless a live stream already has its stats"""
+    if stats_broadcaster.latest(container_id, remote_host):
+        return
+    async with semaphore:
+        await run_docker(prime_container_stats, container_id, remote_host, lane=FANOUT_LANE)
+
+@app.post("/api/containers/stats", response_model=Dict[str, Any])
+async def get_bulk_stats(request: Request):
+    """Get statistics for many containers (a list of IDs or "all") in one call"""
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPException(status_code=400, detail="Request body must be an object")
+        container_ids = data.get("containers", "all")
+        if container_ids != "all" and (
+            not isinstance(container_ids, list) or not all(isinstance(container_id, str) for container_id in container_ids)
+        ):
+            raise HTTPException(status_code=400, detail='containers must be a list of container IDs or "all"')
+        remote_host = data.get("remote_host")
+        concurrency = data.get("concurrency") or lane_size(FANOUT_LANE)
+        if not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1:
+            raise HTTPException(status_code=400, detail="concurrency must be a positive integer")
+        concurrency = min(concurrency, lane_size(FANOUT_LANE))
+
+        started = time.perf_counter()
+        if container_ids == "all":
+            containers = await run_docker(list_running_containers, remote_host)
+            container_ids = [container["id"] for container in containers]
+
+        # Fan the two-sample stats reads out concurrently under the limit
+        semaphore = asyncio.Semaphore(concurrency)
+        if not remote_host:
+            # Baseline every cold local container first, so their CPU windows overlap
+            await asyncio.gather(*(
+                prime_bulk_stats(container_id, remote_host, semaphore) for container_id in container_ids
+            ))
+        results = await asyncio.gather(*(
+            collect_container_stats(container_id, remote_host, semaphore) for container_id in container_ids
+        ))
+
+        failed = sum(1 for result in results if result["status"] != "ok")
+        return {
+            "remote_host": remote_host,
+            "count": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "containers": results
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/containers/{container_id}/stats/stream")
+async def stream_stats(container_id: str, request: Request, remote_host: str = None):
+    """Stream live statistics for a container as server-sent events"""
+    try:
+        subscription, queue = stats_broadcaster.subscribe(container_id, remote_host)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def events():
+        try:
+            # Late joiners get the last sample straight away
+            if subscription.latest:
+                yield sse_event("stats", subscription.latest)
+            while not await request.is_disconnected():
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    break
+                yield sse_event(*item)
+        finally:
+            stats_broadcaster.unsubscribe(subscription, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/api/stats/streams", response_model=Dict[str, Any])
+async def get_stats_streams():
+    """Get the active shared stats streams and their viewer counts"""
+    return stats_broadcaster.stats()
+
+@app.get("/api/containers/{container_id}/stats/history", response_model=Dict[str, Any])
+async def get_stats_history(
+    container_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    resolution: Optional[str] = None
+):
+    """Get recorded statistics for a container over a time range, without calling the daemon"""
+    try:
+        history = stats_history.query(container_id, start, end, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"No stats history for container {container_id}")
+    return history
+
+@app.get("/api/stats/history", response_model=Dict[str, Any])
+async def get_stats_history_status():
+    """Get the stats history sampler status and buffer sizes"""
+    return stats_history.stats()
+
 @app.get("/api/containers/{container_id}/logs", response_model=List[Dict[str, Any]])
-async def get_logs(container_id: str, lines: int = Query(100, ge=1, le=1000), remote_host: str = None):
-    """Get logs for a specific container"""
+async def get_logs(
+    container_id: str,
+    lines: int = Query(100, ge=1, le=1000),
+    remote_host: str = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None
+):
+    """Get logs for a specific container, optionally limited to a time range"""
     try:
-        logs = get_container_logs(container_id, lines, remote_host)
+        logs = await run_docker(get_container_logs, container_id, lines, remote_host, since, until, lane=SLOW_LANE)
         return logs
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+log_stream_slots = threading.BoundedSemaphore(MAX_LOG_STREAMS)
+
+def take_log_stream_slot() -> Callable[[], None]:
+    """Take a log stream slot without waiting, or answer 503; returns the slot's release, safe to call twice"""
+    if not log_stream_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail=f"Too many concurrent log streams (limit {MAX_LOG_STREAMS})")
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            log_stream_slots.release()
+    return release
+
+@app.get("/api/containers/{container_id}/logs/stream")
+async def stream_logs(
+    container_id: str,
+    tail: Optional[int] = Query(100, ge=0),
+    follow: bool = True,
+    since: Optional[float] = None,
+    contains: Optional[str] = None,
+    level: Optional[str] = None,
+    remote_host: str = None
+):
+    """Stream a container's logs as NDJSON, optionally following new lines and filtering them"""
+    try:
+        log_filter = LogFilter(contains, level.split(",") if level else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    log_stream = LogStream(container_id, tail, follow, since, log_filter, remote_host)
+    release = take_log_stream_slot()
+
+    async def lines():
+        try:
+            async for entry in iterate_in_thread(log_stream, log_stream.close):
+                yield json.dumps(entry) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            release()
+
+    # The background task also frees the slot of a response whose body never started
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=SSE_HEADERS, background=BackgroundTask(release))
+
+@app.get("/api/logs/stream")
+async def stream_merged_logs(
+    container: List[str] = Query(...),
+    tail: Optional[int] = Query(100, ge=0),
+    follow: bool = True,
+    since: Optional[float] = None,
+    contains: Optional[str] = None,
+    level: Optional[str] = None,
+    remote_host: str = None
+):
+    """Stream several containers' logs as one timestamp-ordered NDJSON timeline (container or container@host)"""
+    refs = parse_container_refs(container, remote_host)
+    if not refs or len(refs) > MAX_MERGED_CONTAINERS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_MERGED_CONTAINERS} containers can be merged")
+    try:
+        log_filter = LogFilter(contains, level.split(",") if level else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    merged = merged_container_logs(refs, tail, follow, since, log_filter)
+    release = take_log_stream_slot()
+    try:
+        merged.start()
+    except RuntimeError as e:
+        release()
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def lines():
+        try:
+            # The merge thread waits for the readers once it ends, not the event loop
+            async for entry in iterate_in_thread(merged, lambda: merged.close(wait_readers=False)):
+                yield json.dumps(entry) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            release()
+
+    # The background task also frees the slot of a response whose body never started
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=SSE_HEADERS, background=BackgroundTask(release))
+
 @app.get("/api/dns/logs", response_model=List[Dict[str, Any]])
 async def get_dns_logs(count: int = Query(5, ge=1, le=100)):
     """Get recent DNS access logs"""
     try:
-        logs = get_recent_dns_accesses(count)
+        logs = await run_docker(get_recent_dns_accesses, count)
         return logs
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/dns/hits", response_model=Dict[str, Any])
+async def get_dns_hit_counts(window: float = Query(3600, gt=0, le=90 * 86400), limit: int = Query(100, ge=1, le=1000)):
+    """Get DNS accesses per domain over the last `window` seconds, busiest first"""
+    try:
+        return await run_docker(get_dns_hits, window, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/state/stats", response_model=Dict[str, Any])
+async def get_state_stats():
+    """Get the state database's row counts, imported legacy files and sizes"""
+    try:
+        return await run_docker(get_state_store().stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/dns/logs")
 async def add_dns_log(request: Request):
     """Add a DNS access log entry"""
     try:
         data = await request.json()
-        ip_address = data.get("ip_address")
-        domain = data.get("domain")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be JSON")
+    try:
+        result = await run_docker(log_dns_accesses, [data])
         
-        if not ip_address or not domain:
-            raise HTTPException(status_code=400, detail="IP address and domain are required")
+        if result["rejected"]:
+            raise HTTPException(status_code=400, detail=result["errors"][0]["error"])
             
-        log_dns_access(ip_address, domain)
         return {"success": True, "message": "DNS access logged successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/dns/logs/batch", response_model=Dict[str, Any])
+async def add_dns_logs_batch(request: Request):
+    """Add DNS access log entries in bulk, as a JSON array or an NDJSON stream"""
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            result = await ingest_ndjson(request)
+        else:
+            try:
+                data = await request.json()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Request body must be JSON")
+            if isinstance(data, dict) and "entries" not in data:
+                raise HTTPException(status_code=400, detail="Request body must be an array or an object with entries")
+            entries = data["entries"] if isinstance(data, dict) else data
+            if not isinstance(entries, list):
+                entries = [entries]
+            result = await run_docker(log_dns_accesses, entries)
+        
+        return {"success": True, **result}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def ingest_ndjson(request: Request) -> Dict[str, Any]:
+    """Parse an NDJSON body incrementally and commit it in batches of DNS_LOG_BATCH_SIZE lines"""
+    accepted = 0
+    rejected = 0
+    errors = []
+    batch = []
+    batch_start = 0
+    buffer = b""
+
+    async def commit():
+        nonlocal accepted, rejected, batch, batch_start
+        result = await run_docker(log_dns_accesses, batch)
+        accepted += result["accepted"]
+        rejected += result["rejected"]
+        errors.extend({"index": batch_start + e["index"], "error": e["error"]} for e in result["errors"])
+        batch_start += len(batch)
+        batch = []
+
+    async for chunk in request.stream():
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                batch.append(json.loads(line))
+            except ValueError:
+                # Keep the position so the error index matches the input line
+                batch.append(None)
+            if len(batch) >= DNS_LOG_BATCH_SIZE:
+                await commit()
+
+    if buffer.strip():
+        try:
+            batch.append(json.loads(buffer))
+        except ValueError:
+            batch.append(None)
+    if batch:
+        await commit()
+
+    return {"accepted": accepted, "rejected": rejected, "errors": errors[:MAX_REPORTED_ERRORS]}
+
 # Mount static files for frontend
 @app.on_event("startup")
 async def startup_event():
+    # One-time import of settings.json and the DNS log files into the state store
+    await run_docker(migrate_legacy_settings)
+    await run_docker(migrate_legacy_dns_logs)
+    domain_index.set_disabled(await run_docker(get_disabled_containers))
+    if INVENTORY_ENABLED:
+        inventory.start()
+    await run_docker(load_recent_dns_accesses)
+    if STATS_HISTORY_ENABLED:
+        stats_history.start(list_running_containers, sample_container_stats)
     app.mount("/", StaticFiles(directory="../frontend", html=True), name="frontend")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    inventory.stop()
+    reload_scheduler.stop()
+    await run_docker(stats_history.stop)
+    docker_pool.close_all()
+    fleet_pool.close_all()
+    shutdown_executors()
+    close_state_stores()
+
 # Run the server if executed directly
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
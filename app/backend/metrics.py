@@ -0,0 +1,446 @@
+import re
+import math
+import time
+import bisect
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from in-memory answers to slow remote daemons
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Name suffix, labels and value of one exposed line
+Sample = Tuple[str, Dict[str, str], float]
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + "}"
+
+class CounterValue:
+    """
+    One labelled counter series.
+    """
+
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+class GaugeValue(CounterValue):
+    """
+    One labelled gauge series.
+    """
+
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+class HistogramValue:
+    """
+    One labelled histogram series: per-bucket counts, sum and count.
+
+    Observations only touch their own bucket; the cumulative counts Prometheus
+    expects are computed when the metrics are rendered.
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        # One slot per bound plus +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        # bisect_left puts values equal to a bound in that bucket (le = "less or equal")
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "Timer":
+        """
+        Time a block of code and observe its duration in seconds.
+
+        Returns:
+            Timer: Context manager
+        """
+        return Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+class Timer:
+    """
+    Context manager observing the time spent in a block.
+    """
+
+    __slots__ = ('series', 'started')
+
+    def __init__(self, series: HistogramValue):
+        self.series = series
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.series.observe(time.perf_counter() - self.started)
+
+class Metric:
+    """
+    A metric family: a name, help text, label names and one series per label values.
+
+    Series are created on first use and looked up without locking afterwards, so
+    recording on a hot path costs a dict lookup and the series' own lock.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        """
+        Get the series for a set of label values.
+
+        Args:
+            *values: One value per label name, in order
+
+        Returns:
+            The series (CounterValue, GaugeValue or HistogramValue)
+        """
+        key = tuple(str(value) for value in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = self._new_series()
+        return series
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._series.items())
+        samples = []
+        for key, series in items:
+            samples.extend(self._series_samples(dict(zip(self.labelnames, key)), series))
+        return samples
+
+    def _new_series(self) -> Any:
+        raise NotImplementedError
+
+    def _series_samples(self, labels: Dict[str, str], series: Any) -> List[Sample]:
+        return [("", labels, series.value)]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_series(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_series(self) -> GaugeValue:
+        return GaugeValue()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _series_samples(self, labels: Dict[str, str], series: HistogramValue) -> List[Sample]:
+        counts, total = series.snapshot()
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            samples.append(("_bucket", {**labels, "le": format_value(bound)}, cumulative))
+        samples.append(("_sum", labels, total))
+        samples.append(("_count", labels, cumulative))
+        return samples
+
+class CallbackMetric(Metric):
+    """
+    A counter or gauge read from existing state when the metrics are scraped.
+
+    Used for values other modules already keep (pool hits, row counts...), so
+    nothing is recorded on their hot paths.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Sequence[str], read: Callable[[], Dict[Tuple, float]]):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.read = read
+
+    def samples(self) -> List[Sample]:
+        return [
+            ("", dict(zip(self.labelnames, (str(value) for value in key))), value)
+            for key, value in self.read().items()
+        ]
+
+class Registry:
+    """
+    The set of metric families exposed on /metrics.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        """
+        Render every metric family in the Prometheus text exposition format.
+
+        A family whose callback fails is skipped, so one broken source never
+        hides the others.
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                logger.warning(f"Could not collect metric {metric.name}: {str(e)}")
+                continue
+            lines.append(f"# HELP {metric.name} {escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{metric.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+def callback(name: str, documentation: str, kind: str, labelnames: Sequence[str], read: Callable[[], Dict[Tuple, float]]) -> CallbackMetric:
+    return REGISTRY.register(CallbackMetric(name, documentation, kind, labelnames, read))
+
+def render() -> str:
+    """
+    Render the shared registry.
+
+    Returns:
+        str: Prometheus exposition text
+    """
+    return REGISTRY.render()
+
+# Instruments recorded on hot paths
+HTTP_REQUEST_SECONDS = histogram(
+    "zerodeploy_http_request_duration_seconds",
+    "HTTP request latency by route template, until the last body chunk is sent",
+    ("method", "route", "status")
+)
+DOCKER_API_REQUESTS = counter(
+    "zerodeploy_docker_api_requests_total",
+    "Docker Engine API requests by host, endpoint and status",
+    ("host", "method", "endpoint", "status")
+)
+DOCKER_API_SECONDS = histogram(
+    "zerodeploy_docker_api_request_duration_seconds",
+    "Docker Engine API round trips (time to response headers) by host and endpoint",
+    ("host", "endpoint")
+)
+CONTAINER_SCAN_SECONDS = histogram(
+    "zerodeploy_container_scan_duration_seconds",
+    "Duration of get_running_containers by host",
+    ("host",)
+)
+CONTAINER_LISTINGS = counter(
+    "zerodeploy_container_listings_total",
+    "Container listings served from the in-memory inventory or by scanning the daemon",
+    ("source",)
+)
+CONFIG_GENERATION_SECONDS = histogram(
+    "zerodeploy_config_generation_duration_seconds",
+    "Duration of ZeroNSD config generation by outcome (written, unchanged, error)",
+    ("outcome",)
+)
+RELOAD_SECONDS = histogram(
+    "zerodeploy_zeronsd_reload_duration_seconds",
+    "Duration of ZeroNSD reloads by method (signal, restart, watch, failed)",
+    ("method",)
+)
+
+# Docker API path segments that are collections or actions rather than object IDs or names
+_API_VERSION = re.compile(r"^v\d+\.\d+$")
+_DOCKER_RESOURCES = {"containers", "networks", "images", "volumes", "exec", "services", "tasks", "nodes", "secrets", "configs", "plugins"}
+_COLLECTION_ACTIONS = {"json", "create", "prune", "load", "search", "get"}
+
+def docker_endpoint(path: str) -> str:
+    """
+    Turn a Docker API path into a low-cardinality endpoint label.
+
+    The API version prefix is dropped and object IDs or names become {id},
+    e.g. /v1.47/containers/3f2a.../stats -> /containers/{id}/stats.
+
+    Args:
+        path (str): Request path
+
+    Returns:
+        str: Endpoint label
+    """
+    parts = [part for part in path.split("/") if part]
+    if parts and _API_VERSION.match(parts[0]):
+        parts = parts[1:]
+    if len(parts) > 1 and parts[0] in _DOCKER_RESOURCES and parts[1] not in _COLLECTION_ACTIONS:
+        parts[1] = "{id}"
+    return "/" + "/".join(parts[:3])
+
+def instrument_docker_client(client: Any, host: str) -> None:
+    """
+    Count and time every Docker API request a client makes.
+
+    docker-py's APIClient is a requests Session, so a response hook sees each
+    round trip once its headers arrive, streamed responses included.
+
+    Args:
+        client: docker.DockerClient to instrument
+        host (str): Host label ("local" or the remote URL)
+    """
+    def record(response, *args, **kwargs):
+        try:
+            endpoint = docker_endpoint(urlsplit(response.request.url).path)
+            DOCKER_API_REQUESTS.labels(host, response.request.method, endpoint, response.status_code).inc()
+            DOCKER_API_SECONDS.labels(host, endpoint).observe(response.elapsed.total_seconds())
+        except Exception as e:
+            logger.debug(f"Could not record Docker API request: {str(e)}")
+
+    client.api.hooks["response"].append(record)
+
+def register_caches(read: Callable[[], Dict[str, Tuple[float, float]]]) -> None:
+    """
+    Expose cache hit and miss counters kept elsewhere.
+
+    Args:
+        read (Callable): Returns (hits, misses) keyed by cache name
+    """
+    def counts(index: int) -> Callable[[], Dict[Tuple, float]]:
+        return lambda: {(name,): values[index] for name, values in read().items()}
+
+    callback("zerodeploy_cache_hits_total", "Cache hits by cache", "counter", ("cache",), counts(0))
+    callback("zerodeploy_cache_misses_total", "Cache misses by cache", "counter", ("cache",), counts(1))
+
+class MetricsMiddleware:
+    """
+    Record the latency of every HTTP request by method, route template and status.
+
+    The route template (/api/containers/{container_id}/stats) is used rather than
+    the raw path so container IDs do not create new series. Requests answered
+    before routing (304s from the conditional GET middleware) fall back to the
+    path when it is a parameterless route; everything else (frontend files,
+    unknown paths) is labelled "other".
+    """
+
+    def __init__(self, app: ASGIApp, histogram: Histogram = HTTP_REQUEST_SECONDS):
+        self.app = app
+        self.histogram = histogram
+        self._static_paths: Optional[set] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.histogram.labels(scope["method"], self._route(scope), status).observe(time.perf_counter() - started)
+
+    def _route(self, scope: Scope) -> str:
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        if path:
+            return path
+        if self._static_paths is None:
+            routes = getattr(scope.get("app"), "routes", [])
+            self._static_paths = {route.path for route in routes if hasattr(route, "path") and "{" not in route.path}
+        return scope["path"] if scope["path"] in self._static_paths else "other"
@@ -0,0 +1,215 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How many finished tickets are kept around for polling
+MAX_TICKETS = 1000
+
+class ReloadTicket:
+    """
+    Handle for a submitted domain update. The ``future`` resolves to the result
+    of the generate-and-reload cycle the update was merged into.
+    """
+
+    def __init__(self, container_configs: List[Dict[str, Any]], remote_host: str = None):
+        self.id = uuid.uuid4().hex
+        self.container_configs = container_configs
+        self.remote_host = remote_host
+        self.submitted_at = time.time()
+        self.completed_at: Optional[float] = None
+        self.batch_size: Optional[int] = None
+        self.future: Future = Future()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the ticket for polling clients.
+
+        Returns:
+            Dict[str, Any]: Ticket status and, once done, its result or error
+        """
+        data = {
+            'id': self.id,
+            'status': 'pending',
+            'remote_host': self.remote_host,
+            'submitted_at': datetime.fromtimestamp(self.submitted_at).isoformat(),
+            'completed_at': datetime.fromtimestamp(self.completed_at).isoformat() if self.completed_at else None,
+            'batch_size': self.batch_size
+        }
+        if self.future.done():
+            error = self.future.exception()
+            if error:
+                data['status'] = 'failed'
+                data['error'] = str(error)
+            else:
+                data['status'] = 'done'
+                data['result'] = self.future.result()
+        return data
+
+class ReloadScheduler:
+    """
+    Background scheduler that coalesces bursts of domain updates.
+
+    Updates submitted within ``window`` seconds of the first pending one are
+    merged and applied with a single call to ``apply_fn``, so a burst causes at
+    most one generate-and-reload cycle per window.
+
+    Each submission is a snapshot of one host's containers, so within a batch
+    the latest snapshot of a host replaces its earlier ones wholesale.
+    ``apply_fn`` receives the latest snapshot of every host in the batch and
+    the one of the local host, whose DNS state is persisted.
+    """
+
+    def __init__(self, apply_fn: Callable[[List[Dict[str, Any]], List[Dict[str, Any]]], Dict[str, Any]], window: float = None):
+        self.apply_fn = apply_fn
+        self.window = window if window is not None else int(os.getenv("DNS_RELOAD_WINDOW_MS", "500")) / 1000.0
+        self._pending: List[ReloadTicket] = []
+        self._tickets: "OrderedDict[str, ReloadTicket]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.requests = 0
+        self.cycles = 0
+        self.failed_cycles = 0
+        self.merged_requests = 0
+        self.max_batch_size = 0
+        self.recent_batch_sizes = deque(maxlen=100)
+
+    def submit(self, container_configs: List[Dict[str, Any]], remote_host: str = None) -> ReloadTicket:
+        """
+        Queue a domain update for the next cycle.
+
+        Args:
+            container_configs (List[Dict[str, Any]]): Container configs from the request
+            remote_host (str, optional): Remote Docker host the configs came from
+
+        Returns:
+            ReloadTicket: Ticket that completes when the update has been applied
+        """
+        ticket = ReloadTicket(container_configs, remote_host)
+        with self._condition:
+            self._ensure_worker()
+            self._pending.append(ticket)
+            self._tickets[ticket.id] = ticket
+            while len(self._tickets) > MAX_TICKETS:
+                self._tickets.popitem(last=False)
+            self.requests += 1
+            self._condition.notify()
+        return ticket
+
+    def get_ticket(self, ticket_id: str) -> Optional[ReloadTicket]:
+        """
+        Look up a recently submitted ticket.
+
+        Args:
+            ticket_id (str): Ticket ID returned by submit
+
+        Returns:
+            Optional[ReloadTicket]: The ticket, or None if unknown or expired
+        """
+        with self._condition:
+            return self._tickets.get(ticket_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get counters describing how many requests were merged per cycle.
+
+        Returns:
+            Dict[str, Any]: Scheduler statistics
+        """
+        with self._condition:
+            recent = list(self.recent_batch_sizes)
+            return {
+                'window_ms': int(self.window * 1000),
+                'pending': len(self._pending),
+                'requests': self.requests,
+                'cycles': self.cycles,
+                'failed_cycles': self.failed_cycles,
+                'merged_per_cycle_avg': round(self.merged_requests / self.cycles, 2) if self.cycles else 0.0,
+                'merged_per_cycle_max': self.max_batch_size,
+                'recent_batch_sizes': recent
+            }
+
+    def stop(self) -> None:
+        """
+        Stop the worker thread after the cycle in progress.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _ensure_worker(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="reload-scheduler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+
+                # Let the burst settle for one window after its first update
+                deadline = self._pending[0].submitted_at + self.window
+                while not self._stopped:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch = self._pending
+                self._pending = []
+
+            self._apply(batch)
+
+    def _apply(self, batch: List[ReloadTicket]) -> None:
+        # Every submission is the full container list of its host: the last
+        # one per host replaces the earlier ones instead of being merged by ID
+        snapshots: "OrderedDict[Optional[str], List[Dict[str, Any]]]" = OrderedDict()
+        for ticket in batch:
+            snapshots.pop(ticket.remote_host or None, None)
+            snapshots[ticket.remote_host or None] = [
+                config for config in ticket.container_configs
+                if config.get("id") or config.get("name")
+            ]
+        merged = [config for configs in snapshots.values() for config in configs]
+        persisted = snapshots.get(None, [])
+
+        try:
+            result = self.apply_fn(merged, persisted)
+            error = None
+        except Exception as e:
+            logger.error(f"Domain update cycle failed: {str(e)}")
+            result = None
+            error = e
+
+        completed_at = time.time()
+        with self._condition:
+            self.cycles += 1
+            if error:
+                self.failed_cycles += 1
+            self.merged_requests += len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self.recent_batch_sizes.append(len(batch))
+
+        logger.info(f"Applied {len(batch)} merged domain update(s) in one cycle")
+        for ticket in batch:
+            ticket.completed_at = completed_at
+            ticket.batch_size = len(batch)
+            if error:
+                ticket.future.set_exception(error)
+            else:
+                ticket.future.set_result(result)
@@ -0,0 +1,581 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Embedded database holding settings, per-container overrides and DNS access events
+STATE_DB_FILE = os.getenv("STATE_DB_FILE", "/data/zerodeploy.db")
+
+# Rows per executemany call when importing legacy files
+IMPORT_BATCH_SIZE = 5000
+
+# Record types an alias can carry: aliases always resolve to an address
+ALIAS_RECORD_TYPES = ("A", "AAAA")
+
+# Schema migrations, applied in order; PRAGMA user_version records how many ran
+SCHEMA = [
+    """
+    CREATE TABLE settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE disabled_containers (
+        container_id TEXT PRIMARY KEY,
+        disabled_at REAL NOT NULL
+    );
+    CREATE TABLE aliases (
+        name TEXT PRIMARY KEY,
+        container_id TEXT,
+        address TEXT,
+        record_type TEXT NOT NULL DEFAULT 'A',
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX aliases_container ON aliases (container_id);
+    CREATE TABLE dns_access (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        timestamp TEXT NOT NULL,
+        ip_address TEXT NOT NULL,
+        domain TEXT NOT NULL
+    );
+    -- (ts, domain) covers "hits per domain since T" without touching the table
+    CREATE INDEX dns_access_ts ON dns_access (ts, domain);
+    CREATE INDEX dns_access_domain ON dns_access (domain, ts);
+    CREATE INDEX dns_access_client ON dns_access (ip_address, ts);
+    CREATE TABLE imports (
+        source TEXT PRIMARY KEY,
+        imported_at REAL NOT NULL,
+        rows INTEGER NOT NULL
+    );
+    CREATE TABLE counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    """,
+    # Seed the maintained dns_access row counter from the rows already stored
+    """
+    INSERT OR REPLACE INTO counters (name, value) SELECT 'dns_access', COUNT(*) FROM dns_access;
+    """
+]
+
+def parse_timestamp(timestamp: Any) -> Optional[float]:
+    """
+    Convert an ISO 8601 timestamp to seconds since the epoch.
+
+    Args:
+        timestamp (Any): Timestamp string; naive values are local time
+
+    Returns:
+        Optional[float]: Epoch seconds, or None if the value cannot be parsed
+    """
+    if not isinstance(timestamp, str) or not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+class StateStore:
+    """
+    SQLite state store in WAL mode.
+
+    Each thread gets its own connection, so readers never wait for the
+    writer. Writes run in short ``BEGIN IMMEDIATE`` transactions, serialised
+    in-process by a lock and across processes by SQLite's busy timeout.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._write_lock = threading.Lock()
+        self._connections_lock = threading.Lock()
+        self._schema_ready = False
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it (and the schema) on first use.
+
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode; only power loss can drop the last
+        # commits. Transactions that are acknowledged as stored (DNS log batches) ask for FULL.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._connections_lock:
+            self._connections.append(conn)
+            if not self._schema_ready:
+                self._migrate_schema(conn)
+                self._schema_ready = True
+        return conn
+
+    def _migrate_schema(self, conn: sqlite3.Connection) -> None:
+        while conn.execute("PRAGMA user_version").fetchone()[0] < len(SCHEMA):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process (uvicorn worker) may have migrated while this one waited for the lock
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < len(SCHEMA):
+                    # executescript would commit the open transaction, so run statements one by one
+                    for statement in SCHEMA[version].split(";"):
+                        if statement.strip():
+                            conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {version + 1}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if version < len(SCHEMA):
+                logger.info(f"Applied state schema version {version + 1} to {self.path}")
+
+    @contextmanager
+    def transaction(self, durable: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Run a write transaction on this thread's connection.
+
+        Args:
+            durable (bool, optional): fsync the write-ahead log at commit
+                (synchronous=FULL), so the transaction survives a power loss
+                once this returns
+
+        Yields:
+            sqlite3.Connection: Connection inside BEGIN IMMEDIATE; committed on
+            success, rolled back on error
+        """
+        conn = self.connection()
+        with self._write_lock:
+            if durable:
+                conn.execute("PRAGMA synchronous=FULL")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                if durable:
+                    conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self) -> None:
+        """
+        Close every connection opened by this store.
+        """
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+            self._local = threading.local()
+
+    # Settings and per-container overrides
+
+    def settings_generation(self) -> int:
+        """
+        Get a counter bumped by every settings or override change, from any process.
+
+        Returns:
+            int: Generation number
+        """
+        row = self.connection().execute("SELECT value FROM counters WHERE name = 'settings'").fetchone()
+        return row[0] if row else 0
+
+    def load_settings(self) -> Dict[str, Any]:
+        """
+        Read the settings, with the disabled containers under "disabled_containers".
+
+        Returns:
+            Dict[str, Any]: Settings dictionary
+        """
+        conn = self.connection()
+        settings = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM settings")}
+        settings["disabled_containers"] = self.disabled_containers()
+        return settings
+
+    def save_settings(self, conn: sqlite3.Connection, settings: Dict[str, Any]) -> None:
+        """
+        Replace the settings inside an open transaction.
+
+        Args:
+            conn (sqlite3.Connection): Connection from transaction()
+            settings (Dict[str, Any]): Settings dictionary
+        """
+        values = dict(settings)
+        disabled = set(values.pop("disabled_containers", []) or [])
+        current = {row[0] for row in conn.execute("SELECT container_id FROM disabled_containers")}
+        self._change_disabled(conn, current - disabled, disabled - current)
+
+        conn.execute("DELETE FROM settings")
+        conn.executemany(
+            "INSERT INTO settings (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in values.items()]
+        )
+        self._bump(conn, "settings")
+
+    def disabled_containers(self) -> List[str]:
+        """
+        List the containers whose DNS was disabled by the user.
+
+        Returns:
+            List[str]: Container IDs, sorted
+        """
+        return [row[0] for row in self.connection().execute("SELECT container_id FROM disabled_containers ORDER BY container_id")]
+
+    def update_disabled(self, enabled: Iterable[str] = (), disabled: Iterable[str] = ()) -> Set[str]:
+        """
+        Enable and disable containers in one transaction.
+
+        Args:
+            enabled (Iterable[str]): IDs to remove from the disabled set
+            disabled (Iterable[str]): IDs to add to the disabled set
+
+        Returns:
+            Set[str]: The disabled container IDs after the update
+        """
+        with self.transaction() as conn:
+            self._change_disabled(conn, set(enabled), set(disabled))
+            self._bump(conn, "settings")
+            return {row[0] for row in conn.execute("SELECT container_id FROM disabled_containers")}
+
+    def _change_disabled(self, conn: sqlite3.Connection, enabled: Set[str], disabled: Set[str]) -> None:
+        conn.executemany("DELETE FROM disabled_containers WHERE container_id = ?", [(i,) for i in enabled - disabled])
+        now = time.time()
+        conn.executemany(
+            "INSERT OR IGNORE INTO disabled_containers (container_id, disabled_at) VALUES (?, ?)",
+            [(i, now) for i in disabled]
+        )
+
+    # Custom aliases
+
+    def aliases(self) -> List[Dict[str, Any]]:
+        """
+        List the custom DNS aliases.
+
+        Returns:
+            List[Dict[str, Any]]: Aliases sorted by name
+        """
+        rows = self.connection().execute(
+            "SELECT name, container_id, address, record_type, updated_at FROM aliases ORDER BY name"
+        )
+        return [
+            {"name": name, "container_id": container_id, "address": address, "type": record_type, "updated_at": updated_at}
+            for name, container_id, address, record_type, updated_at in rows
+        ]
+
+    def set_alias(self, name: str, address: Optional[str] = None, container_id: Optional[str] = None, record_type: str = "A") -> None:
+        """
+        Create or replace an alias pointing at a fixed address or at a container.
+
+        Args:
+            name (str): Fully qualified alias name
+            address (Optional[str]): Fixed address
+            container_id (Optional[str]): Container whose address the alias follows
+            record_type (str): A or AAAA
+
+        Raises:
+            ValueError: If neither or both targets are given, or the record type is not supported
+        """
+        if (address is None) == (container_id is None):
+            raise ValueError("An alias needs exactly one of address or container_id")
+        if record_type not in ALIAS_RECORD_TYPES:
+            raise ValueError(f"Unsupported alias type {record_type!r}, expected one of {', '.join(ALIAS_RECORD_TYPES)}")
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO aliases (name, container_id, address, record_type, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (name, container_id, address, record_type, time.time())
+            )
+            self._bump(conn, "settings")
+
+    def remove_alias(self, name: str) -> bool:
+        """
+        Delete an alias.
+
+        Args:
+            name (str): Alias name
+
+        Returns:
+            bool: True if the alias existed
+        """
+        with self.transaction() as conn:
+            removed = conn.execute("DELETE FROM aliases WHERE name = ?", (name,)).rowcount > 0
+            if removed:
+                self._bump(conn, "settings")
+            return removed
+
+    # DNS access events
+
+    def record_dns_accesses(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Insert DNS access events in one transaction, with one fsync at commit.
+
+        Args:
+            entries (List[Dict[str, Any]]): Events with timestamp, ip_address and domain
+
+        Returns:
+            int: ID of the last inserted event
+        """
+        if not entries:
+            return self.last_dns_access_id()
+        now = time.time()
+        rows = [
+            (parse_timestamp(entry["timestamp"]) or now, entry["timestamp"], entry["ip_address"], entry["domain"])
+            for entry in entries
+        ]
+        # The batch is reported as accepted once this returns, so it must be on disk
+        with self.transaction(durable=True) as conn:
+            conn.executemany("INSERT INTO dns_access (ts, timestamp, ip_address, domain) VALUES (?, ?, ?, ?)", rows)
+            self._bump(conn, "dns_access", len(rows))
+            return conn.execute("SELECT MAX(id) FROM dns_access").fetchone()[0]
+
+    def last_dns_access_id(self) -> int:
+        """
+        Get the ID of the newest DNS access event.
+
+        Returns:
+            int: Event ID, 0 if there are none
+        """
+        return self.connection().execute("SELECT MAX(id) FROM dns_access").fetchone()[0] or 0
+
+    def dns_access_count(self) -> int:
+        """
+        Count the stored DNS access events.
+
+        Reads the counter maintained in the same transactions as every insert
+        and prune, where COUNT(*) scans the whole table on every call.
+
+        Returns:
+            int: Number of events
+        """
+        row = self.connection().execute("SELECT value FROM counters WHERE name = 'dns_access'").fetchone()
+        return row[0] if row else 0
+
+    def recent_dns_accesses(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Get the newest DNS access events.
+
+        Args:
+            count (int): Maximum number of events
+
+        Returns:
+            List[Dict[str, Any]]: Events, newest first
+        """
+        rows = self.connection().execute(
+            "SELECT timestamp, ip_address, domain FROM dns_access ORDER BY id DESC LIMIT ?", (count,)
+        )
+        return [{"timestamp": timestamp, "ip_address": ip_address, "domain": domain} for timestamp, ip_address, domain in rows]
+
+    def dns_hits(self, since: float, until: Optional[float] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Count DNS accesses per domain in a time window, with an index range scan.
+
+        Args:
+            since (float): Window start, epoch seconds
+            until (Optional[float]): Window end, epoch seconds (open-ended if None)
+            limit (int): Maximum number of domains
+
+        Returns:
+            List[Dict[str, Any]]: Domains with hit counts and last access time, busiest first
+        """
+        rows = self.connection().execute(
+            "SELECT domain, COUNT(*) AS hits, MAX(ts) FROM dns_access "
+            "WHERE ts >= ? AND ts < ? GROUP BY domain ORDER BY hits DESC, domain LIMIT ?",
+            (since, until if until is not None else float("inf"), limit)
+        )
+        return [{"domain": domain, "hits": hits, "last_seen": last_seen} for domain, hits, last_seen in rows]
+
+    def domain_hits(self, domain: str, since: float) -> int:
+        """
+        Count the accesses to one domain since a point in time.
+
+        Args:
+            domain (str): Domain name
+            since (float): Window start, epoch seconds
+
+        Returns:
+            int: Number of accesses
+        """
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM dns_access WHERE domain = ? AND ts >= ?", (domain, since)
+        ).fetchone()[0]
+
+    def prune_dns_accesses(self, before: float) -> int:
+        """
+        Delete DNS access events older than a point in time.
+
+        Args:
+            before (float): Cutoff, epoch seconds
+
+        Returns:
+            int: Number of deleted events
+        """
+        with self.transaction() as conn:
+            deleted = conn.execute("DELETE FROM dns_access WHERE ts < ?", (before,)).rowcount
+            self._bump(conn, "dns_access", -deleted)
+            return deleted
+
+    # Legacy file imports
+
+    def imported(self, source: str) -> bool:
+        """
+        Check whether a legacy file was already imported.
+
+        Args:
+            source (str): Path of the legacy file
+
+        Returns:
+            bool: True if it was imported
+        """
+        return self.connection().execute("SELECT 1 FROM imports WHERE source = ?", (source,)).fetchone() is not None
+
+    def import_settings(self, source: str, settings: Dict[str, Any]) -> None:
+        """
+        Import a legacy settings dictionary, keeping values already in the store.
+
+        Args:
+            source (str): Path of the legacy file
+            settings (Dict[str, Any]): Parsed settings
+        """
+        with self.transaction() as conn:
+            values = dict(settings)
+            disabled = values.pop("disabled_containers", []) or []
+            self._change_disabled(conn, set(), set(disabled))
+            conn.executemany(
+                "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in values.items()]
+            )
+            self._bump(conn, "settings")
+            self._record_import(conn, source, len(disabled) + len(values))
+
+    def import_dns_accesses(self, source: str, entries: Iterable[Dict[str, Any]]) -> int:
+        """
+        Import legacy DNS access events in one transaction.
+
+        Args:
+            source (str): Path of the legacy file
+            entries (Iterable[Dict[str, Any]]): Events, oldest first
+
+        Returns:
+            int: Number of imported events
+        """
+        now = time.time()
+        imported = 0
+        with self.transaction() as conn:
+            batch = []
+            for entry in entries:
+                timestamp = entry.get("timestamp") or ""
+                batch.append((parse_timestamp(timestamp) or now, timestamp, entry.get("ip_address", ""), entry.get("domain", "")))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    conn.executemany("INSERT INTO dns_access (ts, timestamp, ip_address, domain) VALUES (?, ?, ?, ?)", batch)
+                    imported += len(batch)
+                    batch = []
+            conn.executemany("INSERT INTO dns_access (ts, timestamp, ip_address, domain) VALUES (?, ?, ?, ?)", batch)
+            imported += len(batch)
+            self._bump(conn, "dns_access", imported)
+            self._record_import(conn, source, imported)
+        return imported
+
+    def _record_import(self, conn: sqlite3.Connection, source: str, rows: int) -> None:
+        conn.execute("INSERT OR REPLACE INTO imports (source, imported_at, rows) VALUES (?, ?, ?)", (source, time.time(), rows))
+
+    def _bump(self, conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Describe the store: row counts, imports and file sizes.
+
+        Returns:
+            Dict[str, Any]: Store statistics
+        """
+        conn = self.connection()
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("settings", "disabled_containers", "aliases", "dns_access")
+        }
+        imports = [
+            {"source": source, "imported_at": imported_at, "rows": rows}
+            for source, imported_at, rows in conn.execute("SELECT source, imported_at, rows FROM imports ORDER BY imported_at")
+        ]
+        sizes = self.file_sizes()
+        return {
+            "path": self.path,
+            "schema_version": conn.execute("PRAGMA user_version").fetchone()[0],
+            "journal_mode": conn.execute("PRAGMA journal_mode").fetchone()[0],
+            "rows": counts,
+            "imports": imports,
+            "size_bytes": sizes["db"],
+            "wal_bytes": sizes["wal"]
+        }
+
+    def file_sizes(self) -> Dict[str, int]:
+        """
+        Get the size of the database file and its write-ahead log.
+
+        Returns:
+            Dict[str, int]: Bytes keyed by "db" and "wal"
+        """
+        wal_path = self.path + "-wal"
+        return {
+            "db": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "wal": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        }
+
+_stores: Dict[str, StateStore] = {}
+_stores_lock = threading.Lock()
+
+def get_state_store(path: Optional[str] = None) -> StateStore:
+    """
+    Get the shared store for a database file.
+
+    Args:
+        path (Optional[str]): Database path, STATE_DB_FILE by default
+
+    Returns:
+        StateStore: Store for that path
+    """
+    path = path or STATE_DB_FILE
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = StateStore(path)
+                _stores[path] = store
+    return store
+
+def close_state_stores() -> None:
+    """
+    Close every shared store.
+    """
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
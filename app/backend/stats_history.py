@@ -0,0 +1,524 @@
+import os
+import sys
+import json
+import time
+import bisect
+import struct
+import logging
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# History settings
+STATS_HISTORY_FILE = os.getenv("STATS_HISTORY_FILE", "/data/stats_history.bin")
+STATS_HISTORY_INTERVAL = float(os.getenv("STATS_HISTORY_INTERVAL", "10"))
+STATS_HISTORY_MAX_CONTAINERS = int(os.getenv("STATS_HISTORY_MAX_CONTAINERS", "128"))
+STATS_HISTORY_WORKERS = int(os.getenv("STATS_HISTORY_WORKERS", "8"))
+STATS_HISTORY_FLUSH_SECONDS = float(os.getenv("STATS_HISTORY_FLUSH_SECONDS", "300"))
+
+# Columns kept per bucket. Gauges are averaged over the bucket, counters
+# (cumulative byte totals) keep their last value so rates can be derived.
+METRICS = ('cpu_percent', 'memory_usage', 'memory_percent', 'rx_bytes', 'tx_bytes', 'read_bytes', 'write_bytes')
+GAUGES = (True, True, True, False, False, False, False)
+
+# (name, bucket width in seconds, buckets kept): 1 hour, 1 day and 30 days
+RESOLUTIONS = (
+    ('10s', 10, 360),
+    ('1m', 60, 1440),
+    ('1h', 3600, 720)
+)
+
+FILE_MAGIC = b"ZDSH1\n"
+
+def sample_values(sample: Dict[str, Any]) -> Tuple[float, ...]:
+    """
+    Extract the history columns from a formatted stats sample.
+
+    Args:
+        sample (Dict[str, Any]): Sample as returned by get_container_stats
+
+    Returns:
+        Tuple[float, ...]: One value per entry of METRICS
+    """
+    cpu = sample.get('cpu', {})
+    memory = sample.get('memory', {})
+    network = sample.get('network', {})
+    disk = sample.get('disk', {})
+    return (
+        float(cpu.get('usage_percent', 0)),
+        float(memory.get('usage', 0)),
+        float(memory.get('usage_percent', 0)),
+        float(network.get('rx_bytes', 0)),
+        float(network.get('tx_bytes', 0)),
+        float(disk.get('read_bytes', 0)),
+        float(disk.get('write_bytes', 0))
+    )
+
+class SeriesRing:
+    """
+    Fixed-capacity columnar ring buffer of closed buckets at one resolution.
+
+    Timestamps and every metric live in their own ``array('d')``, which grows
+    until ``capacity`` and is then overwritten in place from ``head`` (the
+    oldest bucket). Samples accumulate in an open bucket until a sample for a
+    later bucket arrives.
+    """
+
+    def __init__(self, name: str, resolution: int, capacity: int):
+        self.name = name
+        self.resolution = resolution
+        self.capacity = capacity
+        self.times = array('d')
+        self.columns = [array('d') for _ in METRICS]
+        self.head = 0
+        self.open_start: Optional[float] = None
+        self.open_count = 0
+        self.open_values = [0.0] * len(METRICS)
+
+    @property
+    def retention(self) -> int:
+        return self.resolution * self.capacity
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, index: int) -> float:
+        # Logical (oldest-first) view over the timestamps, used for bisection
+        return self.times[(self.head + index) % len(self.times)]
+
+    def add(self, timestamp: float, values: Tuple[float, ...]) -> None:
+        start = timestamp - timestamp % self.resolution
+        if self.open_start is not None and start != self.open_start:
+            if start < self.open_start:
+                # Late sample for a bucket that is already closed
+                return
+            self._close()
+
+        if self.open_start is None:
+            self.open_start = start
+            self.open_count = 0
+            self.open_values = [0.0] * len(METRICS)
+
+        self.open_count += 1
+        for i, value in enumerate(values):
+            if GAUGES[i]:
+                self.open_values[i] += value
+            else:
+                self.open_values[i] = value
+
+    def append(self, timestamp: float, values: List[float]) -> None:
+        if len(self.times) < self.capacity:
+            self.times.append(timestamp)
+            for column, value in zip(self.columns, values):
+                column.append(value)
+        else:
+            self.times[self.head] = timestamp
+            for column, value in zip(self.columns, values):
+                column[self.head] = value
+            self.head = (self.head + 1) % self.capacity
+
+    def points(self, start: float, end: float) -> List[Dict[str, float]]:
+        first = bisect.bisect_left(self, start)
+        last = bisect.bisect_right(self, end)
+        size = len(self.times)
+        points = []
+        for index in range(first, last):
+            physical = (self.head + index) % size
+            point = {'timestamp': self.times[physical]}
+            for name, column in zip(METRICS, self.columns):
+                point[name] = column[physical]
+            points.append(point)
+
+        # The open bucket is still filling but is the freshest data there is
+        if self.open_start is not None and start <= self.open_start <= end:
+            point = {'timestamp': self.open_start}
+            point.update(zip(METRICS, self._open_bucket()))
+            points.append(point)
+        return points
+
+    def ordered(self) -> Tuple[array, List[array]]:
+        # Copies of the columns in oldest-first order, for persistence
+        order = lambda column: column[self.head:] + column[:self.head]
+        return order(self.times), [order(column) for column in self.columns]
+
+    def _open_bucket(self) -> List[float]:
+        return [
+            round(value / self.open_count, 4) if GAUGES[i] else value
+            for i, value in enumerate(self.open_values)
+        ]
+
+    def _close(self) -> None:
+        self.append(self.open_start, self._open_bucket())
+        self.open_start = None
+
+class ContainerHistory:
+    """
+    Stats history of one container at every resolution.
+    """
+
+    def __init__(self, container_id: str, name: str):
+        self.container_id = container_id
+        self.name = name
+        self.last_seen = 0.0
+        self.tiers = [SeriesRing(name, resolution, capacity) for name, resolution, capacity in RESOLUTIONS]
+
+    def add(self, timestamp: float, values: Tuple[float, ...]) -> None:
+        self.last_seen = timestamp
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+
+    def tier(self, name: str) -> Optional[SeriesRing]:
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        return None
+
+class StatsHistory:
+    """
+    Bounded in-memory time series of container stats, rolled up to 10 s,
+    1 min and 1 h buckets.
+
+    Memory is bounded by ``max_containers`` (least recently updated
+    containers are evicted) and the fixed capacity of every resolution.
+    A background sampler records up to ``max_containers`` running containers
+    each ``interval`` seconds and the buffers are periodically written to a segment file so
+    history survives restarts.
+    """
+
+    def __init__(self, path: str = STATS_HISTORY_FILE, max_containers: int = None, interval: float = None):
+        self.path = path
+        self.max_containers = max_containers or STATS_HISTORY_MAX_CONTAINERS
+        self.interval = interval or STATS_HISTORY_INTERVAL
+        self._containers: "OrderedDict[str, ContainerHistory]" = OrderedDict()
+        self._names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.sample_errors = 0
+        self.evictions = 0
+        self.skipped = 0
+        self.last_sweep_at: Optional[float] = None
+        self.last_sweep_ms: Optional[float] = None
+        self.last_saved_at: Optional[float] = None
+
+    def record(self, container_id: str, name: str, sample: Dict[str, Any], timestamp: float = None) -> None:
+        """
+        Add one stats sample to a container's history.
+
+        Args:
+            container_id (str): The ID of the container
+            name (str): The container name
+            sample (Dict[str, Any]): Sample as returned by get_container_stats
+            timestamp (float, optional): Sample time, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        values = sample_values(sample)
+        evicted = []
+        with self._lock:
+            history = self._containers.get(container_id)
+            if history is None:
+                history = ContainerHistory(container_id, name)
+                self._containers[container_id] = history
+                while len(self._containers) > self.max_containers:
+                    evicted.append(self._containers.popitem(last=False)[1])
+                    self.evictions += 1
+            else:
+                self._containers.move_to_end(container_id)
+            if name and history.name != name:
+                self._names.pop(history.name, None)
+                history.name = name
+            self._names[history.name] = container_id
+            for stale in evicted:
+                if self._names.get(stale.name) == stale.container_id:
+                    del self._names[stale.name]
+            history.add(timestamp, values)
+            self.samples += 1
+
+    def query(
+        self,
+        container: str,
+        start: float = None,
+        end: float = None,
+        resolution: str = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a container's history over a time range.
+
+        Args:
+            container (str): Container ID or name
+            start (float, optional): Range start as a Unix timestamp, defaults to one hour ago
+            end (float, optional): Range end as a Unix timestamp, defaults to now
+            resolution (str, optional): "10s", "1m" or "1h"; by default the finest
+                resolution that still covers ``start``
+
+        Returns:
+            Optional[Dict[str, Any]]: The series, or None if the container has no history
+        """
+        end = time.time() if end is None else end
+        start = end - 3600 if start is None else start
+        with self._lock:
+            history = self._containers.get(container) or self._containers.get(self._names.get(container, ''))
+            if history is None:
+                return None
+
+            if resolution:
+                tier = history.tier(resolution)
+                if tier is None:
+                    raise ValueError(f"Unknown resolution {resolution}, expected one of {', '.join(name for name, _, _ in RESOLUTIONS)}")
+            else:
+                tier = next((tier for tier in history.tiers if tier.retention >= end - start), history.tiers[-1])
+
+            return {
+                'id': history.container_id,
+                'name': history.name,
+                'resolution': tier.name,
+                'interval_seconds': tier.resolution,
+                'start': start,
+                'end': end,
+                'metrics': list(METRICS),
+                'points': tier.points(start, end)
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Describe the sampler and the memory held by the buffers.
+
+        Returns:
+            Dict[str, Any]: History statistics
+        """
+        with self._lock:
+            buckets = sum(len(tier) for history in self._containers.values() for tier in history.tiers)
+            containers = len(self._containers)
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'interval_seconds': self.interval,
+            'containers': containers,
+            'max_containers': self.max_containers,
+            'resolutions': [{'name': name, 'interval_seconds': resolution, 'buckets': capacity} for name, resolution, capacity in RESOLUTIONS],
+            'buckets': buckets,
+            'buffer_bytes': buckets * (len(METRICS) + 1) * 8,
+            'samples': self.samples,
+            'sample_errors': self.sample_errors,
+            'evictions': self.evictions,
+            'skipped': self.skipped,
+            'last_sweep_at': self.last_sweep_at,
+            'last_sweep_ms': self.last_sweep_ms,
+            'last_saved_at': self.last_saved_at
+        }
+
+    def start(
+        self,
+        list_containers: Callable[[], List[Dict[str, Any]]],
+        fetch_stats: Callable[[str], Dict[str, Any]]
+    ) -> None:
+        """
+        Load the saved history and start sampling in the background.
+
+        Args:
+            list_containers (Callable): Returns the running containers
+            fetch_stats (Callable): Returns a formatted stats sample for a container ID
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self.load()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(list_containers, fetch_stats),
+            name="stats-history",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the sampler and write the history to disk.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+        self._thread = None
+        self.save()
+
+    def sweep(
+        self,
+        list_containers: Callable[[], List[Dict[str, Any]]],
+        fetch_stats: Callable[[str], Dict[str, Any]],
+        executor: ThreadPoolExecutor
+    ) -> int:
+        """
+        Sample the running containers once.
+
+        At most ``max_containers`` are sampled, containers that already have
+        a history first, so a fleet larger than the limit keeps a stable set
+        of histories instead of evicting all of them on every sweep.
+
+        Args:
+            list_containers (Callable): Returns the running containers
+            fetch_stats (Callable): Returns a formatted stats sample for a container ID
+            executor (ThreadPoolExecutor): Pool the stats reads run on
+
+        Returns:
+            int: Number of containers sampled
+        """
+        started = time.perf_counter()
+        timestamp = time.time()
+        containers = self._select(list_containers())
+        futures = [(container, executor.submit(fetch_stats, container['id'])) for container in containers]
+
+        sampled = 0
+        for container, future in futures:
+            try:
+                self.record(container['id'], container.get('name', ''), future.result(), timestamp)
+                sampled += 1
+            except Exception as e:
+                self.sample_errors += 1
+                logger.debug(f"Could not sample stats for {container['id']}: {str(e)}")
+
+        self.last_sweep_at = timestamp
+        self.last_sweep_ms = round((time.perf_counter() - started) * 1000, 3)
+        return sampled
+
+    def _select(self, containers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            tracked = [container for container in containers if container['id'] in self._containers]
+            untracked = [container for container in containers if container['id'] not in self._containers]
+        selected = (tracked + untracked)[:self.max_containers]
+        skipped = len(containers) - len(selected)
+        if skipped:
+            self.skipped += skipped
+            logger.debug(f"Stats history limit of {self.max_containers} containers reached, skipped {skipped}")
+        return selected
+
+    def save(self) -> bool:
+        """
+        Atomically write the closed buckets of every container to the segment file.
+
+        The file is a JSON header describing each series followed by the raw
+        column arrays, so loading is a handful of ``frombytes`` calls.
+
+        Returns:
+            bool: True if the file was written
+        """
+        if not self.path:
+            return False
+
+        with self._lock:
+            header = {'byteorder': sys.byteorder, 'metrics': list(METRICS), 'containers': []}
+            blobs = []
+            for history in self._containers.values():
+                tiers = []
+                for tier in history.tiers:
+                    times, columns = tier.ordered()
+                    tiers.append({'name': tier.name, 'count': len(times)})
+                    blobs.append(times.tobytes())
+                    blobs.extend(column.tobytes() for column in columns)
+                header['containers'].append({
+                    'id': history.container_id,
+                    'name': history.name,
+                    'last_seen': history.last_seen,
+                    'tiers': tiers
+                })
+
+        encoded = json.dumps(header).encode('utf-8')
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.stats_history.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(FILE_MAGIC)
+                    f.write(struct.pack('<I', len(encoded)))
+                    f.write(encoded)
+                    for blob in blobs:
+                        f.write(blob)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+            self.last_saved_at = time.time()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save stats history: {str(e)}")
+            return False
+
+    def load(self) -> int:
+        """
+        Replace the in-memory history with the contents of the segment file.
+
+        Returns:
+            int: Number of containers loaded
+        """
+        if not self.path or not os.path.exists(self.path):
+            return 0
+
+        try:
+            with open(self.path, 'rb') as f:
+                if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                    raise ValueError("not a stats history file")
+                header_size, = struct.unpack('<I', f.read(4))
+                header = json.loads(f.read(header_size).decode('utf-8'))
+                if header.get('metrics') != list(METRICS):
+                    raise ValueError("metrics do not match this version")
+
+                loaded: "OrderedDict[str, ContainerHistory]" = OrderedDict()
+                for entry in header['containers']:
+                    history = ContainerHistory(entry['id'], entry['name'])
+                    history.last_seen = entry['last_seen']
+                    for saved in entry['tiers']:
+                        tier = history.tier(saved['name'])
+                        columns = [_read_array(f, saved['count'], header['byteorder']) for _ in range(len(METRICS) + 1)]
+                        # Keep only the newest buckets if the capacity shrank
+                        keep = min(saved['count'], tier.capacity)
+                        tier.times = columns[0][saved['count'] - keep:]
+                        tier.columns = [column[saved['count'] - keep:] for column in columns[1:]]
+                    loaded[history.container_id] = history
+        except Exception as e:
+            logger.error(f"Failed to load stats history from {self.path}: {str(e)}")
+            return 0
+
+        while len(loaded) > self.max_containers:
+            loaded.popitem(last=False)
+        with self._lock:
+            self._containers = loaded
+            self._names = {history.name: history.container_id for history in loaded.values()}
+        logger.info(f"Loaded stats history for {len(loaded)} containers")
+        return len(loaded)
+
+    def _run(self, list_containers: Callable, fetch_stats: Callable) -> None:
+        next_save = time.monotonic() + STATS_HISTORY_FLUSH_SECONDS
+        with ThreadPoolExecutor(max_workers=STATS_HISTORY_WORKERS, thread_name_prefix="stats-history") as executor:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                try:
+                    self.sweep(list_containers, fetch_stats, executor)
+                except Exception as e:
+                    logger.error(f"Stats history sweep failed: {str(e)}")
+
+                if time.monotonic() >= next_save:
+                    self.save()
+                    next_save = time.monotonic() + STATS_HISTORY_FLUSH_SECONDS
+
+                # Keep a steady cadence regardless of how long the sweep took
+                self._stop.wait(max(self.interval - (time.monotonic() - started), 0))
+
+def _read_array(f, count: int, byteorder: str) -> array:
+    values = array('d')
+    values.frombytes(f.read(count * values.itemsize))
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    return values
+
+# Shared history for the application
+stats_history = StatsHistory()
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import docker
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+from docker.types import CancellableStream
+
+from backend.docker_clients import get_client, lease
+from backend.container_stats import format_container_stats
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Samples buffered per viewer before the oldest ones are dropped
+VIEWER_QUEUE_SIZE = 5
+
+def open_stats_stream(client: docker.DockerClient, container_id: str) -> CancellableStream:
+    """
+    Start a container's streaming stats read in a form another thread can close.
+
+    docker-py's ``stats(stream=True)`` is a plain generator over the HTTP
+    response: it can only be left between samples and keeps the connection
+    open until it is garbage collected. The request is made directly instead
+    and wrapped in docker-py's CancellableStream, whose ``close`` shuts the
+    socket down and ends a blocked read.
+
+    Args:
+        client (docker.DockerClient): Client of the container's host
+        container_id (str): The ID of the container
+
+    Returns:
+        CancellableStream: Decoded stats samples
+    """
+    api = client.api
+    response = api.get(f"{api.base_url}/v{api.api_version}/containers/{container_id}/stats", params={"stream": True}, stream=True)
+    try:
+        response.raise_for_status()
+    except Exception as e:
+        response.close()
+        raise docker.errors.create_api_error_from_http_exception(e)
+    samples = (json.loads(line) for line in response.iter_lines() if line)
+    return CancellableStream(samples, response)
+
+class StatsSubscription:
+    """
+    One streaming stats read from the daemon, shared by every viewer of a container.
+
+    A background thread consumes the daemon's streaming stats and pushes each
+    formatted sample to the viewers' asyncio queues. Once the last viewer has
+    left the daemon stream is closed, which also ends a read waiting for the
+    next sample.
+    """
+
+    def __init__(self, container_id: str, remote_host: str = None):
+        self.container_id = container_id
+        self.remote_host = remote_host
+        self.viewers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self.latest: Optional[Dict[str, Any]] = None
+        self.samples = 0
+        self.started_at = time.time()
+        self._stop = threading.Event()
+        self._stream: Optional[CancellableStream] = None
+        self._stream_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"stats-{container_id[:12]}", daemon=True)
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._close_stream()
+
+    def _close_stream(self) -> None:
+        with self._stream_lock:
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception as e:
+                logger.debug(f"Error closing the stats stream of {self.container_id}: {str(e)}")
+
+    def _run(self) -> None:
+        try:
+            with lease(self.remote_host):
+                client = get_client(self.remote_host)
+                container = client.containers.get(self.container_id)
+                stream = open_stats_stream(client, container.id)
+                with self._stream_lock:
+                    self._stream = stream
+                if self._stop.is_set():
+                    # Stopped while the stream was being opened
+                    self._close_stream()
+                for raw in stream:
+                    if self._stop.is_set():
+                        break
+                    sample = format_container_stats(self.container_id, container.name, raw)
+                    self.latest = sample
+                    self.samples += 1
+                    self._publish(("stats", sample))
+        except docker.errors.NotFound:
+            self._publish(("error", {"detail": f"Container {self.container_id} not found"}))
+        except Exception as e:
+            if not self._stop.is_set():
+                logger.error(f"Stats stream for {self.container_id} failed: {str(e)}")
+                self._publish(("error", {"detail": str(e)}))
+        finally:
+            self._stop.set()
+            self._close_stream()
+            # Tell the remaining viewers that the stream has ended
+            self._publish(None)
+
+    def _publish(self, item: Optional[Tuple[str, Dict[str, Any]]]) -> None:
+        for loop, queue in list(self.viewers):
+            try:
+                loop.call_soon_threadsafe(_offer, queue, item)
+            except RuntimeError:
+                # The viewer's event loop has been closed
+                pass
+
+def _offer(queue: asyncio.Queue, item: Any) -> None:
+    # Slow viewers lose their oldest samples rather than holding up the stream
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+class StatsBroadcaster:
+    """
+    Reference-counted registry of shared stats streams keyed by host and container.
+    """
+
+    def __init__(self, max_streams: int = None):
+        self.max_streams = max_streams or int(os.getenv("MAX_STATS_STREAMS", "64"))
+        self._subscriptions: Dict[Tuple[Optional[str], str], StatsSubscription] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, container_id: str, remote_host: str = None) -> Tuple[StatsSubscription, asyncio.Queue]:
+        """
+        Join the shared stats stream for a container, starting it if needed.
+        Must be called from the viewer's event loop.
+
+        Args:
+            container_id (str): The ID of the container to watch
+            remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+
+        Returns:
+            Tuple[StatsSubscription, asyncio.Queue]: The subscription and the viewer's queue
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=VIEWER_QUEUE_SIZE)
+        key = (remote_host, container_id)
+
+        with self._lock:
+            subscription = self._subscriptions.get(key)
+            if subscription is None or subscription.stopping:
+                if len(self._subscriptions) >= self.max_streams:
+                    raise RuntimeError(f"Too many concurrent stats streams (limit {self.max_streams})")
+                subscription = StatsSubscription(container_id, remote_host)
+                self._subscriptions[key] = subscription
+                subscription.viewers = {(loop, queue)}
+                subscription.start()
+                logger.info(f"Started shared stats stream for {container_id}")
+            else:
+                # Replace rather than mutate the set the stream thread iterates
+                subscription.viewers = subscription.viewers | {(loop, queue)}
+
+        return subscription, queue
+
+    def unsubscribe(self, subscription: StatsSubscription, queue: asyncio.Queue) -> None:
+        """
+        Leave a stats stream, stopping it when no viewers remain.
+
+        Args:
+            subscription (StatsSubscription): Subscription returned by subscribe
+            queue (asyncio.Queue): The viewer's queue
+        """
+        with self._lock:
+            subscription.viewers = {viewer for viewer in subscription.viewers if viewer[1] is not queue}
+            if subscription.viewers:
+                return
+            subscription.stop()
+            key = (subscription.remote_host, subscription.container_id)
+            if self._subscriptions.get(key) is subscription:
+                del self._subscriptions[key]
+        logger.info(f"Stopped shared stats stream for {subscription.container_id}")
+
+    def latest(self, container_id: str, remote_host: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the last sample of a live stream, if one is running for the container.
+
+        Args:
+            container_id (str): The ID of the container
+            remote_host (str, optional): Remote Docker host URL (e.g., tcp://192.168.1.100:2375)
+
+        Returns:
+            Optional[Dict[str, Any]]: The last sample, or None if there is no live stream
+        """
+        subscription = self._subscriptions.get((remote_host, container_id))
+        if subscription is None or subscription.stopping:
+            return None
+        return subscription.latest
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Describe the active streams and their viewer counts.
+
+        Returns:
+            Dict[str, Any]: Stream statistics
+        """
+        with self._lock:
+            return {
+                'max_streams': self.max_streams,
+                'streams': [
+                    {
+                        'container_id': subscription.container_id,
+                        'remote_host': subscription.remote_host,
+                        'viewers': len(subscription.viewers),
+                        'samples': subscription.samples
+                    }
+                    for subscription in self._subscriptions.values()
+                ]
+            }
+
+# Shared broadcaster for all viewers
+stats_broadcaster = StatsBroadcaster()
@@ -0,0 +1,379 @@
+import os
+import sys
+import time
+import random
+import logging
+import itertools
+import threading
+import contextvars
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tracing is opt-in: without it the middleware is not installed and span() is a no-op
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+# Share of requests traced on their own; the trace header always forces one
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+# "1" traces the request, "profile" also samples its stacks
+TRACE_HEADER = "x-zerodeploy-trace"
+PROFILE_MODE = "profile"
+
+# Innermost open span of the current request, with its trace
+_current: contextvars.ContextVar[Optional[Tuple["Trace", "Span"]]] = contextvars.ContextVar("zerodeploy_trace", default=None)
+
+class Span:
+    """
+    A timed step of a traced request, with its nested steps.
+    """
+
+    __slots__ = ('name', 'attributes', 'started', 'ended', 'children')
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.ended or time.perf_counter()) - self.started) * 1000
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'start_ms': round((self.started - origin) * 1000, 3),
+            'duration_ms': round(self.duration_ms, 3),
+            'attributes': self.attributes,
+            'children': [child.to_dict(origin) for child in list(self.children)]
+        }
+
+    def walk(self):
+        for child in list(self.children):
+            yield child
+            yield from child.walk()
+
+class Trace:
+    """
+    One traced request: its root span, outcome and, in profile mode, sampled stacks.
+    """
+
+    def __init__(self, trace_id: int, method: str, path: str, profiling: bool = False):
+        self.id = trace_id
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.timestamp = time.time()
+        self.root = Span("request")
+        self.profiling = profiling
+        self.profile: Counter = Counter()
+        self.samples = 0
+        # Threads currently inside one of this trace's spans, with their nesting depth
+        self.threads: Dict[int, int] = {}
+        self.loop_thread = threading.get_ident()
+        self._lock = threading.Lock()
+
+    def enter_thread(self, ident: int) -> None:
+        with self._lock:
+            self.threads[ident] = self.threads.get(ident, 0) + 1
+
+    def exit_thread(self, ident: int) -> None:
+        with self._lock:
+            depth = self.threads.get(ident, 1) - 1
+            if depth:
+                self.threads[ident] = depth
+            else:
+                self.threads.pop(ident, None)
+
+    def active_threads(self) -> List[int]:
+        with self._lock:
+            return [self.loop_thread] + [ident for ident in self.threads if ident != self.loop_thread]
+
+    def server_timing(self) -> str:
+        """
+        Build a Server-Timing header: time per span name, plus the total so far.
+
+        Spans with the same name (one per container, per retry...) are summed.
+
+        Returns:
+            str: Header value
+        """
+        totals: Dict[str, List[float]] = {}
+        for span in self.root.walk():
+            entry = totals.setdefault(span.name, [0.0, 0])
+            entry[0] += span.duration_ms
+            entry[1] += 1
+
+        metrics = []
+        for name, (duration, count) in totals.items():
+            metric = f"{name};dur={duration:.1f}"
+            if count > 1:
+                metric += f';desc="{count} calls"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(metrics)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'timestamp': self.timestamp,
+            'method': self.method,
+            'path': self.path,
+            'route': self.route,
+            'status': self.status,
+            'duration_ms': round(self.root.duration_ms, 3),
+            'profiled': self.profiling
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = self.summary()
+        result['spans'] = self.root.to_dict(self.root.started)
+        if self.profiling:
+            result['profile_samples'] = self.samples
+        return result
+
+    def collapsed_stacks(self) -> str:
+        """
+        Render the sampled stacks in the collapsed format read by flamegraph.pl,
+        speedscope and similar tools: one "frame;frame;frame count" line per stack.
+
+        Returns:
+            str: Collapsed stacks
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.profile.most_common())
+
+class _SpanScope:
+    __slots__ = ('trace', 'span', 'token')
+
+    def __init__(self, trace: Trace, parent: Span, name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span = Span(name, attributes)
+        parent.children.append(self.span)
+
+    def __enter__(self) -> Span:
+        self.token = _current.set((self.trace, self.span))
+        self.trace.enter_thread(threading.get_ident())
+        self.span.started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, *exc) -> None:
+        self.span.ended = time.perf_counter()
+        self.trace.exit_thread(threading.get_ident())
+        _current.reset(self.token)
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+_NOOP = _NoopScope()
+
+def span(name: str, **attributes: Any):
+    """
+    Time a step of the current request as a nested span.
+
+    Outside a traced request this returns a shared no-op context manager, so
+    instrumented code costs one context variable lookup.
+
+    Args:
+        name (str): Span name, also used as the Server-Timing metric name
+        **attributes: Extra details stored with the span
+
+    Returns:
+        Context manager yielding the Span, or None when not tracing
+    """
+    current = _current.get()
+    if current is None:
+        return _NOOP
+    return _SpanScope(current[0], current[1], name, attributes)
+
+def annotate(**attributes: Any) -> None:
+    """
+    Add details to the innermost open span of the current request, if traced.
+
+    Args:
+        **attributes: Details to store
+    """
+    current = _current.get()
+    if current is not None:
+        current[1].attributes.update(attributes)
+
+class StackSampler(threading.Thread):
+    """
+    Sampling profiler for one traced request.
+
+    Every interval it records the stacks of the event loop thread and of the
+    worker threads currently inside the request's spans. It is meant for
+    profiling a single request on a quiet server: the event loop thread also
+    runs whatever else is in flight.
+    """
+
+    def __init__(self, trace: Trace, interval: float):
+        super().__init__(name="trace-sampler", daemon=True)
+        self.trace = trace
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._names: Dict[int, str] = {}
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def sample(self) -> None:
+        frames = sys._current_frames()
+        for ident in self.trace.active_threads():
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(self._thread_name(ident))
+            self.trace.profile[";".join(reversed(stack))] += 1
+        self.trace.samples += 1
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._names.get(ident)
+        if name is None:
+            self._names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self._names.get(ident, f"thread-{ident}")
+        return name
+
+class Tracer:
+    """
+    Decides which requests are traced and keeps the latest traces in a ring buffer.
+    """
+
+    def __init__(self, sample_rate: float = None, buffer_size: int = None, profile_interval_ms: float = None):
+        self.sample_rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.profile_interval = (profile_interval_ms or PROFILE_INTERVAL_MS) / 1000
+        self._traces: deque = deque(maxlen=buffer_size or TRACE_BUFFER_SIZE)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.traced = 0
+        self.profiled = 0
+
+    def start(self, method: str, path: str, mode: Optional[str]) -> Optional[Trace]:
+        """
+        Start a trace for a request if it is forced by the trace header or sampled.
+
+        Args:
+            method (str): HTTP method
+            path (str): Request path
+            mode (Optional[str]): Trace header value
+
+        Returns:
+            Optional[Trace]: The trace, or None if the request is not traced
+        """
+        if not mode and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return None
+        return Trace(next(self._ids), method, path, profiling=mode == PROFILE_MODE)
+
+    def record(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+            self.traced += 1
+            if trace.profiling:
+                self.profiled += 1
+
+    def get(self, trace_id: int) -> Optional[Trace]:
+        with self._lock:
+            for trace in self._traces:
+                if trace.id == trace_id:
+                    return trace
+        return None
+
+    def traces(self, limit: int = 50, min_duration_ms: float = 0) -> List[Dict[str, Any]]:
+        """
+        Get summaries of the buffered traces, newest first.
+
+        Args:
+            limit (int, optional): Maximum number of traces
+            min_duration_ms (float, optional): Only traces at least this slow
+
+        Returns:
+            List[Dict[str, Any]]: Trace summaries
+        """
+        with self._lock:
+            traces = list(self._traces)
+        summaries = [trace.summary() for trace in reversed(traces) if trace.root.duration_ms >= min_duration_ms]
+        return summaries[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'sample_rate': self.sample_rate,
+                'buffer_size': self._traces.maxlen,
+                'buffered': len(self._traces),
+                'traced': self.traced,
+                'profiled': self.profiled
+            }
+
+class TracingMiddleware:
+    """
+    Trace sampled requests: time nested spans, answer with a Server-Timing
+    header and an X-Trace-Id, and keep the trace for the traces endpoints.
+
+    Untraced requests pass straight through after the sampling decision.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = self.tracer.start(scope["method"], scope["path"], Headers(scope=scope).get(TRACE_HEADER))
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["Server-Timing"] = trace.server_timing()
+                headers["X-Trace-Id"] = str(trace.id)
+            await send(message)
+
+        sampler = StackSampler(trace, self.tracer.profile_interval) if trace.profiling else None
+        token = _current.set((trace, trace.root))
+        if sampler:
+            sampler.start()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            trace.root.ended = time.perf_counter()
+            _current.reset(token)
+            if sampler:
+                sampler.stop()
+            trace.route = getattr(scope.get("route"), "path", None) or None
+            if trace.status is None:
+                trace.status = 500
+            self.tracer.record(trace)
+
+# Shared tracer behind the middleware and the traces endpoints
+tracer = Tracer()
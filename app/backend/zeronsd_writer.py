@@ -1,9 +1,18 @@
 import os
+import time
 import toml
+import random
+import socket
+import struct
 import docker
 import logging
+import tempfile
+import threading
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from backend.dns_logs import log_dns_access
+from backend.docker_clients import get_client
+from backend.metrics import CONFIG_GENERATION_SECONDS, RELOAD_SECONDS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,89 +22,257 @@ logger = logging.getLogger(__name__)
 DEFAULT_CONFIG_TEMPLATE = "../config/config.template.toml"
 DEFAULT_CONFIG_OUTPUT = "/app/config/config.toml"
 DEFAULT_DOMAIN_SUFFIX = "vexinet.local"
+DEFAULT_ZERONSD_CONTAINER = "zeronsd"
+DEFAULT_RELOAD_MODE = "restart"
+RELOAD_MODES = ("restart", "signal")
+DEFAULT_RELOAD_SIGNAL = "SIGHUP"
+# Longest a resolution probe runs, however long the reload call takes
+MAX_PROBE_SECONDS = 60.0
+
+# Last rendered settings and records per output path, and parsed templates by mtime
+_last_render: Dict[str, Dict[str, Any]] = {}
+_template_cache: Dict[str, Any] = {}
+_render_lock = threading.Lock()
+
+# ZeroNSD container ID found by the last lookup
+_zeronsd_container_id: Optional[str] = None
+
+# Reload counters and measured resolution gaps, updated under _stats_lock
+_stats_lock = threading.Lock()
+RELOAD_STATS: Dict[str, Any] = {
+    "mode": DEFAULT_RELOAD_MODE,
+    "reloads": 0,
+    "failures": 0,
+    "fallback_restarts": 0,
+    "last_method": None,
+    "last_reload_at": None,
+    "probes": 0,
+    "last_gap_ms": None,
+    "max_gap_ms": 0.0
+}
 
 def generate_config(
     containers: List[Dict[str, Any]],
     template_path: str = None,
     output_path: str = None,
-    domain_suffix: str = None
-) -> bool:
+    domain_suffix: str = None,
+    aliases: List[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Generate ZeroNSD configuration file based on container information.
+
+    The record set rendered last time is kept in memory and compared with the
+    new one. The file is only rewritten (atomically, through a temporary file
+    and a rename) when the diff is not empty.
     
     Args:
         containers (List[Dict[str, Any]]): List of container information dictionaries
         template_path (str, optional): Path to template config file
         output_path (str, optional): Path to output config file
         domain_suffix (str, optional): Domain suffix to use for DNS entries
+        aliases (List[Dict[str, Any]], optional): Custom aliases from the state store
         
     Returns:
-        bool: True if config was generated successfully, False otherwise
+        Optional[Dict[str, Any]]: The record diff ("added", "removed" and "changed"
+        names, "settings_changed" and whether the file was "written"), or None if
+        the config could not be generated
     """
+    started = time.perf_counter()
     try:
         # Use default values if not provided
         template_path = template_path or os.getenv("CONFIG_TEMPLATE_PATH", DEFAULT_CONFIG_TEMPLATE)
         output_path = output_path or os.getenv("DNS_CONFIG_PATH", DEFAULT_CONFIG_OUTPUT)
         domain_suffix = domain_suffix or os.getenv("DOMAIN_SUFFIX", DEFAULT_DOMAIN_SUFFIX)
         
-        # Load template if it exists, otherwise create a base config
-        if os.path.exists(template_path):
-            try:
-                config = toml.load(template_path)
-                logger.info(f"Loaded template from {template_path}")
-            except Exception as e:
-                logger.warning(f"Failed to load template: {str(e)}. Creating new config.")
-                config = create_base_config(domain_suffix)
-        else:
-            logger.info(f"Template not found at {template_path}. Creating new config.")
-            config = create_base_config(domain_suffix)
+        config = load_template(template_path, domain_suffix)
+        records = build_records(containers, domain_suffix, aliases)
+
+        with _render_lock:
+            previous = _last_render.get(output_path)
+            if previous is None or not os.path.exists(output_path):
+                previous = load_rendered_config(output_path)
+
+            diff = diff_records(previous["records"], records)
+            diff["settings_changed"] = previous["settings"] != config
+            has_changes = bool(diff["added"] or diff["removed"] or diff["changed"] or diff["settings_changed"])
+            diff["written"] = has_changes
+
+            if has_changes:
+                output = dict(config)
+                output["services"] = list(records.values())
+                write_config_atomic(output, output_path)
+                logger.info(
+                    f"Generated ZeroNSD config at {output_path} with {len(records)} services "
+                    f"(+{len(diff['added'])} -{len(diff['removed'])} ~{len(diff['changed'])})"
+                )
+            else:
+                logger.info(f"ZeroNSD config at {output_path} is up to date, skipping write")
+
+            _last_render[output_path] = {"settings": config, "records": records}
+
+        CONFIG_GENERATION_SECONDS.labels("written" if has_changes else "unchanged").observe(time.perf_counter() - started)
+        return diff
         
-        # Ensure services section exists
-        if "services" not in config:
-            config["services"] = []
-        else:
-            # Clear existing services to rebuild them
-            config["services"] = []
+    except Exception as e:
+        logger.error(f"Error generating config: {str(e)}")
+        CONFIG_GENERATION_SECONDS.labels("error").observe(time.perf_counter() - started)
+        return None
+
+def load_template(template_path: str, domain_suffix: str) -> Dict[str, Any]:
+    """
+    Load the template settings (everything except services), cached by mtime.
+    
+    Args:
+        template_path (str): Path to template config file
+        domain_suffix (str): Domain suffix used when no template is available
         
-        # Add entries for each container
-        for container in containers:
-            # Skip containers that have DNS disabled
-            if not container.get("dns_enabled", True):
-                continue
-                
-            # Get container name and IP address
-            name = container.get("name", "")
-            ip_address = container.get("ip_address", "")
-            
-            # Skip if no IP address or name
-            if not name or not ip_address:
-                logger.warning(f"Skipping container with missing data: {name}")
-                continue
-                
-            # Create DNS entry
-            service_entry = {
-                "name": f"{name}.{domain_suffix}",
-                "type": "A",
-                "address": ip_address
-            }
-            
-            # Add to services list
-            config["services"].append(service_entry)
-            logger.info(f"Added DNS entry for {name}.{domain_suffix} -> {ip_address}")
+    Returns:
+        Dict[str, Any]: Template settings without the services section
+    """
+    # Load template if it exists, otherwise create a base config
+    if os.path.exists(template_path):
+        mtime = os.stat(template_path).st_mtime_ns
+        cached = _template_cache.get(template_path)
+        if cached and cached[0] == mtime:
+            return dict(cached[1])
+        try:
+            config = toml.load(template_path)
+            logger.info(f"Loaded template from {template_path}")
+        except Exception as e:
+            logger.warning(f"Failed to load template: {str(e)}. Creating new config.")
+            config = create_base_config(domain_suffix)
+        # Existing services are rebuilt from the containers
+        config.pop("services", None)
+        _template_cache[template_path] = (mtime, config)
+        return dict(config)
+
+    logger.info(f"Template not found at {template_path}. Creating new config.")
+    config = create_base_config(domain_suffix)
+    config.pop("services", None)
+    return config
+
+def build_records(
+    containers: List[Dict[str, Any]],
+    domain_suffix: str,
+    aliases: List[Dict[str, Any]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the DNS records for the containers that have DNS enabled, plus the
+    custom aliases.
+    
+    Args:
+        containers (List[Dict[str, Any]]): List of container information dictionaries
+        domain_suffix (str): Domain suffix to use for DNS entries
+        aliases (List[Dict[str, Any]], optional): Aliases pointing at a fixed
+            address or following a container's address
         
-        # Write config to file
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    Returns:
+        Dict[str, Dict[str, Any]]: Service entries keyed by FQDN
+    """
+    records = {}
+
+    # Add entries for each container
+    for container in containers:
+        # Skip containers that have DNS disabled
+        if not container.get("dns_enabled", True):
+            continue
+            
+        # Get container name and IP address
+        name = container.get("name", "")
+        ip_address = container.get("ip_address", "")
         
-        with open(output_path, "w") as f:
-            toml.dump(config, f)
+        # Skip if no IP address or name
+        if not name or not ip_address:
+            logger.warning(f"Skipping container with missing data: {name}")
+            continue
             
-        logger.info(f"Generated ZeroNSD config at {output_path} with {len(config['services'])} services")
-        return True
+        # Create DNS entry
+        fqdn = f"{name}.{domain_suffix}"
+        records[fqdn] = {
+            "name": fqdn,
+            "type": "A",
+            "address": ip_address
+        }
+
+    # Aliases never shadow a container's own record
+    addresses = {c.get("id"): c.get("ip_address") for c in containers if c.get("dns_enabled", True)}
+    for alias in aliases or []:
+        name = alias["name"]
+        address = addresses.get(alias["container_id"]) if alias.get("container_id") else alias.get("address")
+        if name in records or not address:
+            continue
+        records[name] = {
+            "name": name,
+            "type": alias.get("type") or "A",
+            "address": address
+        }
+
+    return records
+
+def diff_records(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compute the difference between two record sets keyed by FQDN.
+    
+    Args:
+        old (Dict[str, Dict[str, Any]]): Previously rendered records
+        new (Dict[str, Dict[str, Any]]): Newly built records
         
+    Returns:
+        Dict[str, Any]: Sorted lists of added, removed and changed names
+    """
+    return {
+        "added": sorted(name for name in new if name not in old),
+        "removed": sorted(name for name in old if name not in new),
+        "changed": sorted(name for name in new if name in old and old[name] != new[name])
+    }
+
+def load_rendered_config(output_path: str) -> Dict[str, Any]:
+    """
+    Load the settings and records of an already rendered config file.
+    
+    Args:
+        output_path (str): Path to the rendered config file
+        
+    Returns:
+        Dict[str, Any]: Settings and records, empty if the file is missing or invalid
+    """
+    if not os.path.exists(output_path):
+        return {"settings": None, "records": {}}
+    try:
+        config = toml.load(output_path)
     except Exception as e:
-        logger.error(f"Error generating config: {str(e)}")
-        return False
+        logger.warning(f"Could not parse existing config {output_path}: {str(e)}")
+        return {"settings": None, "records": {}}
+
+    services = config.pop("services", [])
+    records = {service["name"]: service for service in services if "name" in service}
+    return {"settings": config, "records": records}
+
+def write_config_atomic(config: Dict[str, Any], output_path: str) -> None:
+    """
+    Write a config file through a temporary file and a rename, so readers
+    never see a partially written file.
+    
+    Args:
+        config (Dict[str, Any]): Configuration to write
+        output_path (str): Path to output config file
+    """
+    # Ensure directory exists
+    output_dir = os.path.dirname(output_path) or "."
+    os.makedirs(output_dir, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".toml", dir=output_dir)
+    try:
+        with os.fdopen(fd, "w") as f:
+            toml.dump(config, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, output_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
 
 def create_base_config(domain_suffix: str) -> Dict[str, Any]:
     """
@@ -114,36 +291,230 @@ def create_base_config(domain_suffix: str) -> Dict[str, Any]:
 
 def reload_zeronsd() -> bool:
     """
-    Reload the ZeroNSD container to apply configuration changes.
+    Reload ZeroNSD so it serves the current configuration.
+
+    The reload strategy comes from ZERONSD_RELOAD_MODE:
+    "restart" (default) restarts the container, and "signal" sends
+    ZERONSD_RELOAD_SIGNAL to the running container so it re-reads config.toml
+    in place. A failed signal falls back to a restart. Only enable "signal"
+    for a ZeroNSD build that reloads its configuration on that signal. When
+    probing is enabled, the probe runs from before the reload is issued until
+    its window has passed after it, so the outage is measured either way.
     
     Returns:
         bool: True if reload was successful, False otherwise
     """
+    mode = os.getenv("ZERONSD_RELOAD_MODE", DEFAULT_RELOAD_MODE).lower()
+    if mode not in RELOAD_MODES:
+        logger.warning(f"Unknown ZERONSD_RELOAD_MODE {mode!r}, restarting ZeroNSD instead")
+        mode = DEFAULT_RELOAD_MODE
+    with _stats_lock:
+        RELOAD_STATS["mode"] = mode
+    started = time.perf_counter()
+    probe = None
+
     try:
-        # Initialize Docker client
-        client = docker.from_env()
+        # Get the shared Docker client
+        client = get_client()
         
         # Find ZeroNSD container
-        zeronsd_container = None
-        containers = client.containers.list()
-        
-        for container in containers:
-            if container.name == "zeronsd":
-                zeronsd_container = container
-                break
+        zeronsd_container = find_zeronsd_container(client)
                 
         if not zeronsd_container:
             logger.error("ZeroNSD container not found")
+            _record_failure(started)
             return False
+
+        probe = start_resolution_probe()
+
+        if mode == "signal":
+            reload_signal = os.getenv("ZERONSD_RELOAD_SIGNAL", DEFAULT_RELOAD_SIGNAL)
+            try:
+                zeronsd_container.kill(signal=reload_signal)
+                logger.info(f"Sent {reload_signal} to ZeroNSD container to reload its configuration")
+                _record_reload("signal", started)
+                return True
+            except docker.errors.APIError as e:
+                logger.warning(f"Signal reload of ZeroNSD failed, falling back to restart: {str(e)}")
+                with _stats_lock:
+                    RELOAD_STATS["fallback_restarts"] += 1
             
         # Restart container
         zeronsd_container.restart(timeout=10)
         logger.info("ZeroNSD container restarted successfully")
+        _record_reload("restart", started)
         return True
         
     except docker.errors.DockerException as e:
         logger.error(f"Docker error reloading ZeroNSD: {str(e)}")
+        _record_failure(started)
         return False
     except Exception as e:
         logger.error(f"Error reloading ZeroNSD: {str(e)}")
-        return False
\ No newline at end of file
+        _record_failure(started)
+        return False
+    finally:
+        if probe:
+            probe.reload_issued()
+
+def find_zeronsd_container(client):
+    """
+    Find the ZeroNSD container, reusing the container ID found last time.
+    
+    Args:
+        client: Docker client
+        
+    Returns:
+        The ZeroNSD container object, or None if it is not running
+    """
+    global _zeronsd_container_id
+
+    if _zeronsd_container_id:
+        try:
+            return client.containers.get(_zeronsd_container_id)
+        except docker.errors.NotFound:
+            _zeronsd_container_id = None
+
+    name = os.getenv("ZERONSD_CONTAINER", DEFAULT_ZERONSD_CONTAINER)
+    # Let the daemon filter by name instead of listing every container
+    for container in client.containers.list(filters={"name": f"^/{name}$"}):
+        if container.name == name:
+            _zeronsd_container_id = container.id
+            return container
+    return None
+
+def get_reload_stats() -> Dict[str, Any]:
+    """
+    Get ZeroNSD reload counters and the DNS resolution gaps measured during reloads.
+    
+    Returns:
+        Dict[str, Any]: Reload statistics
+    """
+    with _stats_lock:
+        return dict(RELOAD_STATS)
+
+def _record_reload(method: str, started: float) -> None:
+    with _stats_lock:
+        RELOAD_STATS["reloads"] += 1
+        RELOAD_STATS["last_method"] = method
+        RELOAD_STATS["last_reload_at"] = datetime.now().isoformat()
+    RELOAD_SECONDS.labels(method).observe(time.perf_counter() - started)
+
+def _record_failure(started: float) -> None:
+    with _stats_lock:
+        RELOAD_STATS["failures"] += 1
+    RELOAD_SECONDS.labels("failed").observe(time.perf_counter() - started)
+
+def start_resolution_probe() -> Optional["ResolutionProbe"]:
+    """
+    Start a probe that measures the DNS resolution gap around a reload.
+
+    Probing is enabled by setting ZERONSD_PROBE_NAME to a name ZeroNSD serves.
+    The probe's first query establishes a baseline and it is started before
+    the reload is issued, so a blocking restart is inside the measured span.
+    Call ``reload_issued`` on it once the reload call has returned.
+    
+    Returns:
+        Optional[ResolutionProbe]: The running probe, or None if probing is disabled
+    """
+    name = os.getenv("ZERONSD_PROBE_NAME")
+    if not name:
+        return None
+    probe = ResolutionProbe(
+        name,
+        os.getenv("ZERONSD_PROBE_SERVER", "127.0.0.1"),
+        port=int(os.getenv("ZERONSD_PROBE_PORT", "53")),
+        window=float(os.getenv("ZERONSD_PROBE_WINDOW", "3")),
+        interval=float(os.getenv("ZERONSD_PROBE_INTERVAL", "0.05"))
+    )
+    probe.baseline = probe.resolve()
+    probe.start()
+    return probe
+
+class ResolutionProbe(threading.Thread):
+    """
+    Background thread that repeatedly resolves a name and records the longest
+    span without a successful answer.
+
+    It runs until ``window`` seconds after ``reload_issued`` was called, and at
+    most MAX_PROBE_SECONDS in total.
+    """
+
+    def __init__(self, name: str, server: str, port: int = 53, window: float = 3.0, interval: float = 0.05):
+        super().__init__(name="zeronsd-probe", daemon=True)
+        self.query_name = name
+        self.server = server
+        self.port = port
+        self.window = window
+        self.interval = interval
+        self.baseline = True
+        self._issued_at: Optional[float] = None
+
+    def reload_issued(self) -> None:
+        """
+        Mark the reload call as returned; the probe goes on for its window.
+        """
+        self._issued_at = time.monotonic()
+
+    def _running(self, started: float) -> bool:
+        now = time.monotonic()
+        if now - started >= MAX_PROBE_SECONDS:
+            return False
+        return self._issued_at is None or now - self._issued_at < self.window
+
+    def run(self) -> None:
+        started = time.monotonic()
+        last_ok = started if self.baseline else None
+        failed_since_ok = not self.baseline
+        max_gap = 0.0
+        queries = 0
+
+        while self._running(started):
+            ok = self.resolve()
+            queries += 1
+            now = time.monotonic()
+            if ok:
+                if failed_since_ok:
+                    max_gap = max(max_gap, now - (last_ok or started))
+                last_ok = now
+                failed_since_ok = False
+            else:
+                failed_since_ok = True
+            time.sleep(self.interval)
+
+        if failed_since_ok:
+            max_gap = max(max_gap, time.monotonic() - (last_ok or started))
+
+        gap_ms = round(max_gap * 1000, 1)
+        with _stats_lock:
+            RELOAD_STATS["probes"] += 1
+            RELOAD_STATS["last_gap_ms"] = gap_ms
+            RELOAD_STATS["max_gap_ms"] = max(RELOAD_STATS["max_gap_ms"], gap_ms)
+        logger.info(f"DNS resolution gap during ZeroNSD reload: {gap_ms} ms over {queries} queries")
+
+    def resolve(self) -> bool:
+        """
+        Send one A query for the probe name.
+
+        Returns:
+            bool: True if the server answered with at least one record
+        """
+        query_id = random.randint(0, 0xFFFF)
+        header = struct.pack(">HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+        question = b"".join(
+            struct.pack("B", len(label)) + label.encode("ascii")
+            for label in self.query_name.rstrip(".").split(".")
+        ) + b"\x00" + struct.pack(">HH", 1, 1)
+
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(self.interval * 4)
+                sock.sendto(header + question, (self.server, self.port))
+                response, _ = sock.recvfrom(512)
+        except OSError:
+            return False
+
+        if len(response) < 12:
+            return False
+        response_id, flags, _, answers, _, _ = struct.unpack(">HHHHHH", response[:12])
+        return response_id == query_id and flags & 0x000F == 0 and answers > 0
@@ -0,0 +1,179 @@
+"""
+Benchmark the HTTP API end to end: the FastAPI app runs under uvicorn against
+the fake Docker daemon, and concurrent keep-alive clients measure p50/p99
+latency and throughput for the main routes, with and without the in-memory
+container inventory.
+
+    python benchmarks/bench_api.py --containers 200 --requests 500 --concurrency 8
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+# Make the backend package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import uvicorn
+
+import backend.state_store as state_store
+from fake_docker import FakeDockerDaemon
+from harness import summarize, quiet_logs
+
+# Routes measured, by result name
+ROUTES = {
+    'containers': '/api/containers',
+    'containers_projected': '/api/containers?fields=id,name,ip_address',
+    'domains': '/api/domains',
+    'dns_logs': '/api/dns/logs?count=50',
+    'domain_lookup': '/api/domains/lookup/svc-1',
+    'domain_index': '/api/domains/index'
+}
+
+# Routes also measured as conditional GETs, replaying the ETag of the first response
+CONDITIONAL_ROUTES = ('containers', 'domains')
+
+class ApiServer:
+    """The FastAPI app served by uvicorn on a free local port, in a background thread"""
+
+    def __init__(self, app):
+        # Lifespan is off: the startup hook mounts the frontend and starts background workers
+        self.server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, lifespan='off', log_level='warning', access_log=False))
+        self.thread = threading.Thread(target=self.server.run, name='bench-api', daemon=True)
+
+    def __enter__(self) -> 'ApiServer':
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline or not self.thread.is_alive():
+                raise RuntimeError('uvicorn did not start')
+            time.sleep(0.01)
+        self.port = self.server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(10)
+
+def drive(port: int, path: str, requests: int, concurrency: int, headers: dict = None) -> dict:
+    """Send requests from concurrency keep-alive clients and summarize latency and throughput"""
+    per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(count):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        samples = []
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                connection.request('GET', path, headers=headers or {})
+                response = connection.getresponse()
+                response.read()
+                samples.append(time.perf_counter() - started)
+                with lock:
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+        finally:
+            connection.close()
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = [sample for result in executor.map(worker, per_worker) for sample in result]
+    result = summarize(samples, time.perf_counter() - started)
+    result['statuses'] = {str(status): count for status, count in sorted(statuses.items())}
+    return result
+
+def fetch_etag(port: int, path: str) -> str:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        return response.getheader('ETag') or ''
+    finally:
+        connection.close()
+
+def run(containers: int, networks: int, latency_ms: float, requests: int, concurrency: int) -> dict:
+    quiet_logs()
+    tmp_dir = tempfile.mkdtemp()
+    previous_env = {name: os.environ.get(name) for name in ('DOCKER_HOST', 'DNS_CONFIG_PATH')}
+
+    import backend.main as main
+    import backend.config_manager as config_manager
+    import backend.dns_logs as dns_logs
+    from backend.dns_logs import log_dns_accesses
+    from backend.docker_clients import pool as docker_pool
+
+    # Keep every file the app reads or writes in the temporary directory, never the deployed
+    # state database, settings.json, DNS logs or ZeroNSD config
+    redirected = {
+        (state_store, 'STATE_DB_FILE'): os.path.join(tmp_dir, 'state.db'),
+        (config_manager, 'SETTINGS_FILE'): os.path.join(tmp_dir, 'settings.json'),
+        (dns_logs, 'DEFAULT_LOG_FILE'): os.path.join(tmp_dir, 'dns_access.jsonl'),
+        (main, 'DNS_CONFIG_PATH'): os.path.join(tmp_dir, 'config.toml')
+    }
+    previous = {target: getattr(*target) for target in redirected}
+    for (module, name), value in redirected.items():
+        setattr(module, name, value)
+    os.environ['DNS_CONFIG_PATH'] = redirected[(main, 'DNS_CONFIG_PATH')]
+
+    results = {
+        'benchmark': 'api',
+        'containers': containers,
+        'latency_ms': latency_ms,
+        'requests_per_route': requests,
+        'concurrency': concurrency
+    }
+    try:
+        log_dns_accesses([{'ip_address': f'10.0.0.{i % 250 + 1}', 'domain': f'svc-{i % 50}.vexinet.local'} for i in range(1000)])
+        with FakeDockerDaemon(containers, networks, latency_ms) as daemon, ApiServer(main.app) as server:
+            os.environ['DOCKER_HOST'] = daemon.url
+            docker_pool.close_all()
+
+            for mode in ('scan', 'inventory'):
+                if mode == 'inventory':
+                    main.inventory.start()
+                    deadline = time.time() + 10
+                    while not main.inventory.is_ready() and time.time() < deadline:
+                        time.sleep(0.01)
+                daemon.requests.clear()
+                routes = {}
+                for name, path in ROUTES.items():
+                    routes[name] = drive(server.port, path, requests, concurrency)
+                for name in CONDITIONAL_ROUTES:
+                    etag = fetch_etag(server.port, ROUTES[name])
+                    routes[f'{name}_not_modified'] = drive(server.port, ROUTES[name], requests, concurrency, {'If-None-Match': etag})
+                routes['daemon_requests'] = dict(daemon.requests)
+                results[mode] = routes
+    finally:
+        main.inventory.stop()
+        docker_pool.close_all()
+        dns_logs._stores.clear()
+        state_store.close_state_stores()
+        for (module, name), value in previous.items():
+            setattr(module, name, value)
+        for name, value in previous_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(tmp_dir)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--containers', type=int, default=200)
+    parser.add_argument('--networks', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(run(args.containers, args.networks, args.latency_ms, args.requests, args.concurrency), indent=2))
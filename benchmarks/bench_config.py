@@ -0,0 +1,67 @@
+"""
+Benchmark ZeroNSD config generation: the first render, a re-render with no
+record changes (diffed in memory, no write) and a re-render after one
+container changed address.
+
+    python benchmarks/bench_config.py --containers 500
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+# Make the backend package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.zeronsd_writer import generate_config, build_records
+from harness import measure, quiet_logs
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'config', 'config.template.toml')
+
+def make_containers(count: int) -> list:
+    return [
+        {'id': f'{i:064x}', 'name': f'svc-{i}', 'ip_address': f'10.{i // 62500}.{i // 250 % 250}.{i % 250 + 2}', 'dns_enabled': i % 10 != 0}
+        for i in range(count)
+    ]
+
+def run(containers: int, iterations: int) -> dict:
+    quiet_logs()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        items = make_containers(containers)
+        counter = [0]
+
+        def first_render():
+            # A fresh output path each time, so every call renders and writes the file
+            counter[0] += 1
+            generate_config(items, TEMPLATE, os.path.join(tmp_dir, f'cold-{counter[0]}.toml'), 'bench.local')
+
+        output = os.path.join(tmp_dir, 'config.toml')
+        generate_config(items, TEMPLATE, output, 'bench.local')
+
+        def changed_render():
+            counter[0] += 1
+            items[1]['ip_address'] = f'10.255.{counter[0] // 250 % 250}.{counter[0] % 250}'
+            generate_config(items, TEMPLATE, output, 'bench.local')
+
+        return {
+            'benchmark': 'config',
+            'containers': containers,
+            'build_records': measure(lambda: build_records(items, 'bench.local'), iterations),
+            'generate_config_first_render': measure(first_render, iterations),
+            'generate_config_unchanged': measure(lambda: generate_config(items, TEMPLATE, output, 'bench.local'), iterations),
+            'generate_config_one_change': measure(changed_render, iterations),
+            'config_bytes': os.path.getsize(output)
+        }
+    finally:
+        shutil.rmtree(tmp_dir)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--containers', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.containers, args.iterations), indent=2))
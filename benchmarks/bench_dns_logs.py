@@ -0,0 +1,66 @@
+"""
+Benchmark the DNS access log store: single inserts, validated batches,
+reads of the newest entries and per-domain hit counts over the last hour.
+
+    python benchmarks/bench_dns_logs.py --entries 20000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+# Make the backend package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.state_store import close_state_stores
+from backend.dns_logs import log_dns_access, log_dns_accesses, get_recent_dns_accesses, get_dns_hits
+from harness import measure, quiet_logs
+
+def run(entries: int, batch_size: int, tail_count: int) -> dict:
+    quiet_logs()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, 'state.db')
+
+        started = time.perf_counter()
+        for i in range(entries):
+            log_dns_access(f'10.0.{i // 256 % 256}.{i % 256}', f'svc{i % 50}.vexinet.local', db_path=db_path)
+        single_seconds = time.perf_counter() - started
+
+        batched_path = os.path.join(tmp_dir, 'batched.db')
+        batch = [{'ip_address': '10.0.0.1', 'domain': 'svc.vexinet.local'}] * batch_size
+        started = time.perf_counter()
+        for _ in range(entries // batch_size):
+            log_dns_accesses(batch, db_path=batched_path)
+        batched_seconds = time.perf_counter() - started
+
+        reads = 200
+        tail = measure(lambda: get_recent_dns_accesses(tail_count, db_path=db_path), reads)
+        hits = measure(lambda: get_dns_hits(3600, db_path=db_path), reads)
+
+        return {
+            'benchmark': 'dns_logs',
+            'entries': entries,
+            'single_inserts_per_second': round(entries / single_seconds),
+            'batch_size': batch_size,
+            'batched_inserts_per_second': round((entries // batch_size) * batch_size / batched_seconds),
+            'tail_count': tail_count,
+            'tail_ms': tail['mean_ms'],
+            'get_recent_dns_accesses': tail,
+            'dns_hits_last_hour': hits
+        }
+    finally:
+        close_state_stores()
+        shutil.rmtree(tmp_dir)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--tail', type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.entries, args.batch_size, args.tail), indent=2))
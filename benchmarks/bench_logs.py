@@ -0,0 +1,76 @@
+"""
+Benchmark local json-file log reads: a tail and a time range in the middle of
+a large rotated log, against a full scan of every line (the daemon's way of
+finding a tail), and the merged multi-container timeline.
+
+    python benchmarks/bench_logs.py --lines 1000000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+
+# Make the backend package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.json_logs import JsonLogReader, parse_json_log_line
+from backend.log_merge import MergedLogStream
+from fake_json_logs import FakeJsonLogTree, format_time, log_time
+from harness import measure, quiet_logs
+
+def full_scan(files: list, lines: int) -> list:
+    """Decode every line, oldest file first, keeping the last ones"""
+    tail = deque(maxlen=lines)
+    for path in reversed(files):
+        with open(path, 'rb') as f:
+            for line in f:
+                tail.append(parse_json_log_line(line))
+    return list(tail)
+
+def merge_rate(sources: int, lines: int) -> dict:
+    """Lines per second through a merge of interleaved sources"""
+    timelines = [
+        [{'timestamp': format_time(log_time(number)), 'message': f'line {number}', 'level': None} for number in range(source, lines, sources)]
+        for source in range(sources)
+    ]
+    merged = MergedLogStream([({'container': f'svc-{source}'}, iter(timeline)) for source, timeline in enumerate(timelines)])
+    started = time.perf_counter()
+    count = sum(1 for _ in merged)
+    elapsed = time.perf_counter() - started
+    return {'sources': sources, 'lines': count, 'seconds': round(elapsed, 4), 'lines_per_second': round(count / elapsed)}
+
+def run(lines: int, iterations: int) -> dict:
+    quiet_logs()
+    with FakeJsonLogTree(containers=1, lines=lines, rotations=2) as tree:
+        reader = JsonLogReader(tree.log_dir, resolve=tree.resolve)
+        files = reader.log_files('svc-0')
+        middle = log_time(lines // 2)
+
+        tail = measure(lambda: reader.read('svc-0', 100), iterations * 10)
+        # The first range query builds the file's index, later ones reuse it
+        first_range = measure(lambda: list(reader.read('svc-0', since=middle, until=middle + 25)), 1, warmup=0)
+        time_range = measure(lambda: list(reader.read('svc-0', since=middle, until=middle + 25)), iterations * 10)
+        scan = measure(lambda: full_scan(files, 100), 1, warmup=0)
+        size = sum(os.path.getsize(path) for path in files)
+
+    return {
+        'benchmark': 'logs',
+        'lines': lines,
+        'log_bytes': size,
+        'tail_100': tail,
+        'range_first': first_range,
+        'range_indexed': time_range,
+        'full_scan_tail_100': scan,
+        'index_entries': reader.stats()['index_entries'],
+        'merge': merge_rate(4, min(lines, 200000))
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=1000000)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.lines, args.iterations), indent=2))
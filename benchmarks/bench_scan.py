@@ -0,0 +1,63 @@
+"""
+Benchmark container scans against the fake Docker daemon: the full listing
+served by get_running_containers, a label-filtered listing and building the
+container information from list summaries.
+
+    python benchmarks/bench_scan.py --containers 500 --networks 4 --latency-ms 2
+"""
+import os
+import sys
+import json
+import argparse
+
+# Make the backend package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.docker_scan import get_running_containers, build_container_info
+from backend.docker_clients import pool as docker_pool
+from fake_docker import FakeDockerDaemon
+from harness import measure, quiet_logs
+
+class Summary:
+    """List summary wrapped like a docker-py Container"""
+
+    def __init__(self, attrs):
+        self.attrs = attrs
+        self.id = attrs['Id']
+
+def run(containers: int, networks: int, latency_ms: float, iterations: int) -> dict:
+    quiet_logs()
+    with FakeDockerDaemon(containers, networks, latency_ms) as daemon:
+        try:
+            scanned = get_running_containers(remote_host=daemon.url)
+            full = measure(lambda: get_running_containers(remote_host=daemon.url), iterations)
+            filtered = measure(lambda: get_running_containers(remote_host=daemon.url, labels=['tier=web']), iterations)
+            requests = dict(daemon.requests)
+        finally:
+            docker_pool.close_all()
+
+    summaries = [Summary(attrs) for attrs in daemon.summaries]
+    parse = measure(lambda: [build_container_info(summary) for summary in summaries], iterations)
+
+    return {
+        'benchmark': 'scan',
+        'containers': containers,
+        'networks': networks,
+        'latency_ms': latency_ms,
+        'containers_returned': len(scanned),
+        'get_running_containers': full,
+        'get_running_containers_label_filter': filtered,
+        'build_container_info_all': parse,
+        # One list request per scan, never one inspect per container
+        'daemon_requests': requests
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--containers', type=int, default=500)
+    parser.add_argument('--networks', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.containers, args.networks, args.latency_ms, args.iterations), indent=2))
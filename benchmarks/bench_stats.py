@@ -0,0 +1,46 @@
+"""
+Benchmark local container stats read from cgroup v2 files: one container, and
+every container on a simulated host, after the first (priming) sample.
+
+    python benchmarks/bench_stats.py --containers 200
+"""
+import os
+import sys
+import json
+import argparse
+
+# Make the backend package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.cgroup_stats import CgroupStatsReader
+from fake_cgroup import FakeCgroupTree
+from fake_docker import container_id
+from harness import measure, quiet_logs
+
+def run(containers: int, iterations: int) -> dict:
+    quiet_logs()
+    with FakeCgroupTree(containers) as tree:
+        reader = CgroupStatsReader(tree.cgroup_root, tree.proc_root, prime_interval=0, resolve=tree.resolve)
+        ids = [container_id(index) for index in range(containers)]
+        # Resolve every container and keep its first sample
+        for item in ids:
+            reader.sample(item)
+
+        one = measure(lambda: reader.sample(ids[0]), iterations * 10)
+        every = measure(lambda: [reader.sample(item) for item in ids], iterations)
+
+    return {
+        'benchmark': 'stats',
+        'containers': containers,
+        'cgroup_sample_one': one,
+        'cgroup_sample_all': every,
+        'fallbacks': reader.fallbacks
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--containers', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.containers, args.iterations), indent=2))
@@ -0,0 +1,100 @@
+"""
+Fake cgroup v2 hierarchy and /proc for benchmarks and tests: one container
+cgroup (systemd driver layout) per generated container, with cpu.stat,
+memory.*, io.stat, cgroup.procs and a net/dev file for its first process.
+
+    with FakeCgroupTree(containers=200) as tree:
+        reader = CgroupStatsReader(tree.cgroup_root, tree.proc_root, resolve=tree.resolve)
+"""
+import os
+import shutil
+import tempfile
+
+from fake_docker import container_id
+
+HOST_MEMORY_KB = 16 * 1024 * 1024
+
+NET_DEV_HEADER = (
+    "Inter-|   Receive                                                |  Transmit\n"
+    " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n"
+)
+
+class FakeCgroupTree:
+    """
+    Temporary directory laid out like /sys/fs/cgroup and /proc on a cgroup v2 host.
+    """
+
+    def __init__(self, containers: int = 10):
+        self.count = containers
+        self.base = None
+
+    @property
+    def cgroup_root(self) -> str:
+        return os.path.join(self.base, "cgroup")
+
+    @property
+    def proc_root(self) -> str:
+        return os.path.join(self.base, "proc")
+
+    def start(self) -> "FakeCgroupTree":
+        self.base = tempfile.mkdtemp()
+        os.makedirs(self.cgroup_root)
+        os.makedirs(self.proc_root)
+        self._write(os.path.join(self.cgroup_root, "cgroup.controllers"), "cpuset cpu io memory pids\n")
+        self._write(os.path.join(self.proc_root, "meminfo"), f"MemTotal:       {HOST_MEMORY_KB} kB\nMemFree:        1024 kB\n")
+        for index in range(self.count):
+            self.add(index)
+        return self
+
+    def stop(self) -> None:
+        if self.base:
+            shutil.rmtree(self.base, ignore_errors=True)
+
+    def __enter__(self) -> "FakeCgroupTree":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def path(self, index: int) -> str:
+        return os.path.join(self.cgroup_root, "system.slice", f"docker-{container_id(index)}.scope")
+
+    def add(self, index: int, memory_max: str = None) -> None:
+        """Create the cgroup and process files of container index"""
+        path = self.path(index)
+        pid = 1000 + index
+        os.makedirs(path, exist_ok=True)
+        self.set_cpu(index, 1_000_000 * (index + 1))
+        self._write(os.path.join(path, "memory.current"), f"{(index + 1) * 1048576}\n")
+        self._write(os.path.join(path, "memory.max"), (memory_max or ("max" if index % 2 else str(512 * 1048576))) + "\n")
+        self._write(os.path.join(path, "io.stat"), f"8:0 rbytes={4096 * index} wbytes={8192 * index} rios=1 wios=2 dbytes=0 dios=0\n259:0 rbytes=100 wbytes=200 rios=1 wios=1 dbytes=0 dios=0\n")
+        self._write(os.path.join(path, "cgroup.procs"), f"{pid}\n{pid + 100000}\n")
+        self._write(os.path.join(path, "cpuset.cpus.effective"), "0-3\n")
+        net_dir = os.path.join(self.proc_root, str(pid), "net")
+        os.makedirs(net_dir, exist_ok=True)
+        self._write(os.path.join(net_dir, "dev"), NET_DEV_HEADER + (
+            f"    lo: 999999 10 0 0 0 0 0 0 999999 10 0 0 0 0 0 0\n"
+            f"  eth0: {1000 * index} 10 0 0 0 0 0 0 {2000 * index} 20 0 0 0 0 0 0\n"
+            f"  eth1: 5 1 0 0 0 0 0 0 7 1 0 0 0 0 0 0\n"
+        ))
+
+    def set_cpu(self, index: int, usage_usec: int) -> None:
+        self._write(os.path.join(self.path(index), "cpu.stat"), f"usage_usec {usage_usec}\nuser_usec {usage_usec // 2}\nsystem_usec {usage_usec // 2}\n")
+
+    def remove(self, index: int) -> None:
+        shutil.rmtree(self.path(index), ignore_errors=True)
+
+    def resolve(self, requested: str):
+        """Stand-in for the Docker API lookup: accepts full IDs and svc-N names"""
+        if requested.startswith("svc-"):
+            index = int(requested[4:])
+            return container_id(index), requested
+        for index in range(self.count):
+            if container_id(index).startswith(requested):
+                return container_id(index), f"svc-{index}"
+        raise LookupError(f"No such container: {requested}")
+
+    @staticmethod
+    def _write(path: str, content: str) -> None:
+        with open(path, "w") as f:
+            f.write(content)
@@ -0,0 +1,219 @@
+"""
+Fake Docker daemon for benchmarks: serves the Engine API endpoints ZeroDeploy
+uses over HTTP, for N generated containers spread over M networks, with a
+configurable per-request latency.
+
+    with FakeDockerDaemon(containers=500, networks=4, latency_ms=2) as daemon:
+        get_running_containers(remote_host=daemon.url)
+"""
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+API_VERSION = "1.44"
+
+# Strips the /v1.xx prefix docker-py puts in front of every path
+VERSION_PREFIX = re.compile(r'^/v[0-9.]+')
+
+def container_id(index: int) -> str:
+    return hashlib.sha256(f"container-{index}".encode()).hexdigest()
+
+class FakeDockerDaemon:
+    """
+    In-process HTTP server standing in for dockerd.
+
+    Supports /_ping, /version, /containers/json (with label filters),
+    /containers/{id}/json, /containers/{id}/stats, /networks and a silent
+    /events stream. Every request except /events sleeps ``latency_ms`` first.
+    """
+
+    def __init__(self, containers: int = 100, networks: int = 4, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self.networks = [f"net{index}" for index in range(max(networks, 1))]
+        self.summaries = [self._summary(index) for index in range(containers)]
+        self.by_id = {summary["Id"]: (index, summary) for index, summary in enumerate(self.summaries)}
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"tcp://{host}:{port}"
+
+    def start(self) -> "FakeDockerDaemon":
+        handler = type("Handler", (DockerApiHandler,), {"daemon": self})
+        self._stopped.clear()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-dockerd", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> "FakeDockerDaemon":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def count(self, route: str) -> None:
+        with self._lock:
+            self.requests[route] += 1
+
+    def _network(self, index: int) -> dict:
+        network = self.networks[index % len(self.networks)]
+        subnet = index % len(self.networks)
+        return {network: {
+            "NetworkID": hashlib.sha256(network.encode()).hexdigest(),
+            "IPAddress": f"10.{subnet}.{index // 250 % 250}.{index % 250 + 2}",
+            "Gateway": f"10.{subnet}.0.1",
+            "IPPrefixLen": 16
+        }}
+
+    def _summary(self, index: int) -> dict:
+        ports = [{"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8000 + index, "Type": "tcp"}] if index % 3 == 0 else []
+        return {
+            "Id": container_id(index),
+            "Names": [f"/svc-{index}"],
+            "Image": "nginx:latest",
+            "ImageID": "sha256:" + "0" * 64,
+            "Command": "nginx -g 'daemon off;'",
+            "Created": 1_700_000_000 + index,
+            "State": "running",
+            "Status": "Up 5 minutes",
+            "Ports": ports,
+            "Labels": {"com.docker.compose.project": f"proj{index % 5}", "tier": "web" if index % 2 else "db"},
+            "NetworkSettings": {"Networks": self._network(index)}
+        }
+
+    def inspect(self, index: int, summary: dict) -> dict:
+        ports = {"80/tcp": [{"HostIp": "0.0.0.0", "HostPort": str(p["PublicPort"])} for p in summary["Ports"]] or None}
+        return {
+            "Id": summary["Id"],
+            "Name": summary["Names"][0],
+            "Created": "2023-11-14T22:13:20.000000000Z",
+            "State": {"Status": "running", "Running": True, "Pid": 1000 + index},
+            "Config": {"Image": summary["Image"], "Labels": summary["Labels"]},
+            "NetworkSettings": {"Ports": ports, "Networks": summary["NetworkSettings"]["Networks"]}
+        }
+
+    def stats(self, index: int) -> dict:
+        tick = int(time.time() * 10)
+        return {
+            "read": time.strftime("%Y-%m-%dT%H:%M:%S.000000000Z", time.gmtime()),
+            "cpu_stats": {"cpu_usage": {"total_usage": tick * 1_000_000 + index}, "system_cpu_usage": tick * 100_000_000, "online_cpus": 4},
+            "precpu_stats": {"cpu_usage": {"total_usage": (tick - 10) * 1_000_000}, "system_cpu_usage": (tick - 10) * 100_000_000},
+            "memory_stats": {"usage": 50_000_000 + index * 1000, "limit": 2_000_000_000, "stats": {"inactive_file": 1_000_000}},
+            "networks": {"eth0": {"rx_bytes": tick * 100, "tx_bytes": tick * 50}},
+            "blkio_stats": {"io_service_bytes_recursive": []}
+        }
+
+    def list_containers(self, query: dict) -> list:
+        filters = json.loads(query.get("filters", ["{}"])[0] or "{}")
+        selectors = filters.get("label", [])
+        if isinstance(selectors, dict):
+            selectors = [key for key, enabled in selectors.items() if enabled]
+        if not selectors:
+            return self.summaries
+
+        def matches(summary):
+            labels = summary["Labels"]
+            for selector in selectors:
+                key, _, value = selector.partition("=")
+                if key not in labels or ("=" in selector and labels[key] != value):
+                    return False
+            return True
+
+        return [summary for summary in self.summaries if matches(summary)]
+
+class DockerApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    daemon: FakeDockerDaemon = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = VERSION_PREFIX.sub("", parts.path)
+        query = parse_qs(parts.query)
+        daemon = self.daemon
+
+        if path == "/events":
+            daemon.count("events")
+            self._stream_events()
+            return
+
+        if daemon.latency:
+            time.sleep(daemon.latency)
+
+        if path == "/_ping":
+            daemon.count("ping")
+            self._send(200, b"OK", "text/plain")
+        elif path == "/version":
+            daemon.count("version")
+            self._json(200, {"ApiVersion": API_VERSION, "MinAPIVersion": "1.24", "Version": "fake", "Os": "linux", "Arch": "amd64"})
+        elif path == "/containers/json":
+            daemon.count("containers.list")
+            self._json(200, daemon.list_containers(query))
+        elif path == "/networks":
+            daemon.count("networks.list")
+            self._json(200, [{"Name": name, "Id": hashlib.sha256(name.encode()).hexdigest(), "Driver": "bridge"} for name in daemon.networks])
+        elif path.startswith("/containers/"):
+            segments = path.split("/")
+            found = daemon.by_id.get(segments[2]) or next(
+                ((i, s) for i, s in enumerate(daemon.summaries) if s["Names"][0] == "/" + segments[2] or s["Id"].startswith(segments[2])), None
+            )
+            if found is None:
+                daemon.count("not_found")
+                self._json(404, {"message": f"No such container: {segments[2]}"})
+            elif segments[3:] == ["json"]:
+                daemon.count("containers.inspect")
+                self._json(200, daemon.inspect(*found))
+            elif segments[3:] == ["stats"]:
+                daemon.count("containers.stats")
+                self._json(200, daemon.stats(found[0]))
+            else:
+                self._json(404, {"message": "page not found"})
+        else:
+            self._json(404, {"message": "page not found"})
+
+    def _stream_events(self):
+        # Nothing ever happens; hold the stream open until the client or the daemon goes away
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+        while not self.daemon._stopped.wait(0.2):
+            pass
+        self.close_connection = True
+
+    def _json(self, status: int, payload) -> None:
+        self._send(status, json.dumps(payload).encode(), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
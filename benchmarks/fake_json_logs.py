@@ -0,0 +1,94 @@
+"""
+Fake Docker containers directory for benchmarks and tests: one json-file
+driver log per generated container, split over the current file and rotated
+.1, .2, ... files the way the driver rotates them (oldest lines in the highest
+number), one line per STEP_SECONDS from BASE_TIME.
+
+    with FakeJsonLogTree(containers=2, lines=100000, rotations=2) as tree:
+        reader = JsonLogReader(tree.log_dir, resolve=tree.resolve)
+"""
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from fake_docker import container_id
+
+BASE_TIME = 1704067200.0
+STEP_SECONDS = 0.25
+DAEMON_LOG_DIR = "/var/lib/docker/containers"
+
+def log_time(number: int) -> float:
+    """Epoch timestamp of line number"""
+    return BASE_TIME + number * STEP_SECONDS
+
+def format_time(at: float) -> str:
+    """RFC 3339 timestamp with nanoseconds, as the json-file driver writes it"""
+    whole = int(at)
+    nanos = round((at - whole) * 1e9)
+    return datetime.fromtimestamp(whole, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S") + f".{nanos:09d}Z"
+
+def log_line(number: int) -> bytes:
+    stream = "stderr" if number % 10 == 0 else "stdout"
+    return json.dumps({"log": f"line {number} of the service\n", "stream": stream, "time": format_time(log_time(number))}, separators=(",", ":")).encode() + b"\n"
+
+class FakeJsonLogTree:
+    """
+    Temporary directory laid out like /var/lib/docker/containers.
+    """
+
+    def __init__(self, containers: int = 2, lines: int = 1000, rotations: int = 0, drivers: dict = None):
+        self.count = containers
+        self.lines = lines
+        self.rotations = rotations
+        # Container index -> logging driver, json-file by default
+        self.drivers = drivers or {}
+        self.log_dir = None
+
+    def start(self) -> "FakeJsonLogTree":
+        self.log_dir = tempfile.mkdtemp()
+        for index in range(self.count):
+            self.add(index)
+        return self
+
+    def stop(self) -> None:
+        if self.log_dir:
+            shutil.rmtree(self.log_dir, ignore_errors=True)
+
+    def __enter__(self) -> "FakeJsonLogTree":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def path(self, index: int) -> str:
+        full_id = container_id(index)
+        return os.path.join(self.log_dir, full_id, f"{full_id}-json.log")
+
+    def add(self, index: int) -> None:
+        """Write the log files of container index, lines split evenly over the files"""
+        path = self.path(index)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        files = self.rotations + 1
+        per_file = -(-self.lines // files)
+        for number in range(files):
+            # .N holds the oldest lines, the current file the newest
+            suffix = files - 1 - number
+            first, last = number * per_file, min((number + 1) * per_file, self.lines)
+            with open(path + (f".{suffix}" if suffix else ""), "wb") as f:
+                f.writelines(log_line(line) for line in range(first, last))
+
+    def append(self, index: int, data: bytes) -> None:
+        with open(self.path(index), "ab") as f:
+            f.write(data)
+
+    def resolve(self, requested: str):
+        """Stand-in for the Docker API lookup: the daemon's log path and the driver"""
+        for index in range(self.count):
+            full_id = container_id(index)
+            if full_id.startswith(requested) or requested == f"svc-{index}":
+                driver = self.drivers.get(index, "json-file")
+                log_path = os.path.join(DAEMON_LOG_DIR, full_id, f"{full_id}-json.log") if driver == "json-file" else ""
+                return log_path, driver
+        raise LookupError(f"No such container: {requested}")
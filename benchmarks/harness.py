@@ -0,0 +1,109 @@
+"""
+Shared helpers for the benchmarks: timing, percentiles, environment
+description, JSON output and comparison of two result files.
+"""
+import os
+import sys
+import json
+import math
+import time
+import logging
+import platform
+import subprocess
+from typing import Any, Callable, Dict, List, Optional
+
+def quiet_logs() -> None:
+    """Silence the backend's per-operation INFO logs, which would dominate the timings"""
+    logging.getLogger('backend').setLevel(logging.WARNING)
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of samples sorted in ascending order"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, math.ceil(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+def summarize(samples: List[float], wall_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Latency figures in milliseconds for per-operation samples in seconds"""
+    ordered = sorted(samples)
+    total = wall_seconds if wall_seconds is not None else sum(samples)
+    return {
+        'iterations': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 4) if samples else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 4),
+        'p90_ms': round(percentile(ordered, 0.90) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4) if ordered else 0.0,
+        'ops_per_second': round(len(samples) / total, 1) if total > 0 else 0.0
+    }
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 1) -> Dict[str, Any]:
+    """Call fn repeatedly and summarize the per-call latency"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and revision the results were measured on"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        revision = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'revision': revision,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def write_results(results: Dict[str, Any], path: Optional[str]) -> None:
+    """Write results as JSON to a file, or to stdout when no path is given"""
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if not path:
+        print(text)
+        return
+    with open(path, 'w') as f:
+        f.write(text + '\n')
+
+def flatten(results: Any, prefix: str = '') -> Dict[str, float]:
+    """Flatten nested results to dotted keys, keeping only numbers"""
+    flat = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            flat.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        flat[prefix[:-1]] = float(results)
+    return flat
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[Dict[str, Any]]:
+    """
+    Find metrics that got worse than the baseline by more than ``tolerance``.
+
+    Keys ending in ``_ms`` are latencies (higher is worse); keys containing
+    ``per_second`` are throughputs (lower is worse). Other numbers are ignored.
+    """
+    now = flatten(current.get('results', current))
+    before = flatten(baseline.get('results', baseline))
+    regressions = []
+    for key in sorted(now.keys() & before.keys()):
+        old, new = before[key], now[key]
+        if old <= 0:
+            continue
+        if key.endswith('_ms'):
+            change = (new - old) / old
+        elif 'per_second' in key:
+            change = (old - new) / old
+        else:
+            continue
+        if change > tolerance:
+            regressions.append({'metric': key, 'baseline': old, 'current': new, 'worse_by': round(change, 3)})
+    return regressions
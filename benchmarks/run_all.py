@@ -0,0 +1,80 @@
+"""
+Run the benchmark suite and write the results as JSON, optionally comparing
+them with an earlier run.
+
+    python benchmarks/run_all.py --output results.json
+    python benchmarks/run_all.py --quick --compare results.json --fail-on-regression
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_api
+import bench_config
+import bench_dns_logs
+import bench_logs
+import bench_scan
+import bench_stats
+from harness import compare, environment, write_results
+
+# Suite sizes: "full" for comparisons worth keeping, "quick" for a smoke run
+PROFILES = {
+    'full': {'containers': 500, 'networks': 4, 'latency_ms': 2.0, 'iterations': 50, 'dns_entries': 20000, 'log_lines': 1000000, 'requests': 500, 'concurrency': 8},
+    'quick': {'containers': 50, 'networks': 2, 'latency_ms': 0.5, 'iterations': 5, 'dns_entries': 500, 'log_lines': 20000, 'requests': 40, 'concurrency': 4}
+}
+
+BENCHMARKS = {
+    'scan': lambda p: bench_scan.run(p['containers'], p['networks'], p['latency_ms'], p['iterations']),
+    'config': lambda p: bench_config.run(p['containers'], p['iterations']),
+    'dns_logs': lambda p: bench_dns_logs.run(p['dns_entries'], 100, 100),
+    'api': lambda p: bench_api.run(p['containers'], p['networks'], p['latency_ms'], p['requests'], p['concurrency']),
+    'stats': lambda p: bench_stats.run(p['containers'], p['iterations']),
+    'logs': lambda p: bench_logs.run(p['log_lines'], p['iterations'])
+}
+
+def run_suite(parameters: dict, only: list = None) -> dict:
+    """Run the selected benchmarks and return the results with their environment"""
+    results = {}
+    for name, benchmark in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        results[name] = benchmark(parameters)
+    return {'environment': environment(), 'parameters': parameters, 'results': results}
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='Write the results to this file instead of stdout')
+    parser.add_argument('--quick', action='store_true', help='Use small sizes for a fast smoke run')
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='Run only this benchmark (repeatable)')
+    parser.add_argument('--containers', type=int, help='Override the number of simulated containers')
+    parser.add_argument('--networks', type=int, help='Override the number of simulated networks')
+    parser.add_argument('--latency-ms', type=float, help='Override the simulated Docker API latency')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before a metric counts as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 when a regression is found')
+    args = parser.parse_args(argv)
+
+    parameters = dict(PROFILES['quick' if args.quick else 'full'])
+    for key in ('containers', 'networks', 'latency_ms'):
+        if getattr(args, key) is not None:
+            parameters[key] = getattr(args, key)
+
+    results = run_suite(parameters, args.only)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        results['regressions'] = compare(results, baseline, args.tolerance)
+        results['baseline'] = {'environment': baseline.get('environment'), 'path': args.compare}
+    write_results(results, args.output)
+
+    regressions = results.get('regressions') or []
+    for regression in regressions:
+        print(f"Regression: {regression['metric']} {regression['baseline']} -> {regression['current']}", file=sys.stderr)
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Make the backend package importable as ``backend`` for every test module
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.docker_clients import pool as docker_pool
+import backend.config_manager as config_manager
+import backend.dns_logs as dns_logs
+import backend.state_store as state_store
+
+@pytest.fixture(autouse=True)
+def reset_docker_clients():
+    """Drop pooled Docker clients so mocks never leak between tests"""
+    yield
+    docker_pool.close_all()
+
+@pytest.fixture(autouse=True)
+def isolated_state_store(tmp_path, monkeypatch):
+    """Give every test its own state database and legacy files instead of the deployed ones under /data and app/logs"""
+    monkeypatch.setattr(state_store, 'STATE_DB_FILE', str(tmp_path / 'state.db'))
+    monkeypatch.setattr(config_manager, 'SETTINGS_FILE', str(tmp_path / 'settings.json'))
+    monkeypatch.setattr(dns_logs, 'DEFAULT_LOG_FILE', str(tmp_path / 'dns_access.jsonl'))
+    yield
+    dns_logs._stores.clear()
+    state_store.close_state_stores()
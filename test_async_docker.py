@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import time
+import asyncio
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.main import list_containers, get_stats, get_bulk_stats
+from fastapi import HTTPException
+
+def slow_stats(container_id, remote_host=None):
+    # Stand-in for the daemon's blocking two-sample stats read
+    time.sleep(1.0)
+    return {'id': container_id}
+
+class TestAsyncDockerAccess(unittest.IsolatedAsyncioTestCase):
+
+    @patch('backend.main.get_container_stats', side_effect=slow_stats)
+    async def test_stats_calls_run_concurrently(self, mock_stats):
+        started = time.perf_counter()
+        results = await asyncio.gather(*(get_stats(f'c{i}') for i in range(4)))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual([r['id'] for r in results], ['c0', 'c1', 'c2', 'c3'])
+        self.assertLess(elapsed, 2.0)
+
+    @patch('backend.main.get_disabled_containers', return_value=set())
+    @patch('backend.main.get_running_containers', return_value=[{'id': 'a', 'name': 'a', 'dns_enabled': True}])
+    @patch('backend.main.get_container_stats', side_effect=slow_stats)
+    async def test_listing_latency_stays_flat_during_stats(self, mock_stats, mock_list, mock_disabled):
+        stats_calls = [asyncio.create_task(get_stats(f'c{i}')) for i in range(8)]
+
+        latencies = []
+        for _ in range(100):
+            started = time.perf_counter()
+            await list_containers()
+            latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*stats_calls)
+
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"Listing p99 while stats calls are in flight: {p99 * 1000:.2f} ms")
+        self.assertLess(p99, 0.1)
+
+class MockRequest:
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+def slow_stats_or_missing(container_id, remote_host=None):
+    if container_id == 'gone':
+        raise Exception('Container gone not found')
+    return slow_stats(container_id, remote_host)
+
+class TestBulkStats(unittest.IsolatedAsyncioTestCase):
+
+    @patch('backend.main.get_container_stats', side_effect=slow_stats_or_missing)
+    async def test_fan_out_takes_about_one_call(self, mock_stats):
+        ids = [f'c{i}' for i in range(20)] + ['gone']
+        started = time.perf_counter()
+        result = await get_bulk_stats(MockRequest({'containers': ids}))
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual((result['count'], result['succeeded'], result['failed']), (21, 20, 1))
+        self.assertEqual(result['containers'][-1], {'id': 'gone', 'status': 'error', 'error': 'Container gone not found'})
+
+    @patch('backend.main.get_running_containers', return_value=[{'id': 'a'}, {'id': 'b'}])
+    @patch('backend.main.get_container_stats', side_effect=lambda container_id, remote_host=None: {'id': container_id})
+    async def test_all_expands_to_running_containers(self, mock_stats, mock_list):
+        result = await get_bulk_stats(MockRequest({'containers': 'all', 'remote_host': 'tcp://remote:2375'}))
+        mock_list.assert_called_once_with('tcp://remote:2375', None)
+        self.assertEqual([c['id'] for c in result['containers']], ['a', 'b'])
+
+    @patch('backend.main.prime_container_stats')
+    @patch('backend.main.get_container_stats', side_effect=lambda container_id, remote_host=None: {'id': container_id})
+    async def test_local_containers_are_primed_before_they_are_read(self, mock_stats, mock_prime):
+        await get_bulk_stats(MockRequest({'containers': ['a', 'b']}))
+        self.assertEqual(sorted(call.args for call in mock_prime.call_args_list), [('a', None), ('b', None)])
+
+        mock_prime.reset_mock()
+        await get_bulk_stats(MockRequest({'containers': ['a'], 'remote_host': 'tcp://remote:2375'}))
+        mock_prime.assert_not_called()
+
+    @patch('backend.main.get_container_stats')
+    async def test_bad_requests_are_400(self, mock_stats):
+        for data in (['a'], {'containers': 'abc'}, {'containers': {'id': 'a'}}, {'containers': ['a', 1]}, {'containers': ['a'], 'concurrency': 'many'}):
+            with self.assertRaises(HTTPException) as cm:
+                await get_bulk_stats(MockRequest(data))
+            self.assertEqual(cm.exception.status_code, 400)
+        mock_stats.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+sys.path.insert(0, os.path.join(current_dir, 'benchmarks'))
+
+from fake_docker import FakeDockerDaemon
+from harness import summarize, compare
+import bench_api
+import run_all
+from backend.docker_scan import get_running_containers
+from backend.docker_clients import pool as docker_pool
+
+class TestFakeDaemon(unittest.TestCase):
+
+    def test_scan_against_the_fake_daemon(self):
+        with FakeDockerDaemon(containers=25, networks=3) as daemon:
+            try:
+                containers = get_running_containers(remote_host=daemon.url)
+                web = get_running_containers(remote_host=daemon.url, labels=['tier=web'])
+            finally:
+                docker_pool.close_all()
+
+        self.assertEqual(len(containers), 25)
+        self.assertEqual(len(web), 12)
+        self.assertEqual(containers[3]['ip_address'], '10.0.0.5')
+        self.assertEqual(containers[3]['ports'][0]['host_port'], '8003')
+        # One list request per scan, no per-container inspects
+        self.assertEqual(daemon.requests['containers.list'], 2)
+        self.assertNotIn('containers.inspect', daemon.requests)
+
+class TestHarness(unittest.TestCase):
+
+    def test_percentiles_and_comparison(self):
+        summary = summarize([i / 1000 for i in range(1, 101)])
+        self.assertEqual((summary['p50_ms'], summary['p99_ms'], summary['max_ms']), (50.0, 99.0, 100.0))
+
+        baseline = {'results': {'scan': {'full': {'p50_ms': 10.0, 'ops_per_second': 100.0}, 'containers': 5}}}
+        current = {'results': {'scan': {'full': {'p50_ms': 13.0, 'ops_per_second': 90.0}, 'containers': 50}}}
+        regressions = compare(current, baseline, tolerance=0.2)
+        self.assertEqual([r['metric'] for r in regressions], ['scan.full.p50_ms'])
+
+    def test_suite_writes_json(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, 'results.json')
+            self.assertEqual(run_all.main(['--quick', '--only', 'config', '--containers', '20', '--output', output]), 0)
+            with open(output) as f:
+                results = json.load(f)
+        self.assertEqual(results['parameters']['containers'], 20)
+        self.assertIn('p99_ms', results['results']['config']['generate_config_unchanged'])
+        self.assertIn('python', results['environment'])
+
+class TestApiBenchmark(unittest.TestCase):
+
+    def test_routes_are_measured_with_and_without_the_inventory(self):
+        results = bench_api.run(containers=10, networks=2, latency_ms=0, requests=6, concurrency=2)
+        for mode in ('scan', 'inventory'):
+            self.assertEqual(results[mode]['containers']['statuses'], {'200': 6})
+            self.assertEqual(results[mode]['containers_not_modified']['statuses'], {'304': 6})
+        # Served from memory once the inventory is live
+        self.assertNotIn('containers.list', results['inventory']['daemon_requests'])
+        self.assertGreater(results['scan']['daemon_requests']['containers.list'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
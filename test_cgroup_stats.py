@@ -0,0 +1,150 @@
+import unittest
+import sys
+import os
+import time
+from unittest.mock import patch, MagicMock
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+sys.path.insert(0, os.path.join(current_dir, 'benchmarks'))
+
+from fake_cgroup import FakeCgroupTree, HOST_MEMORY_KB
+from fake_docker import container_id
+from backend.cgroup_stats import CgroupStatsReader, parse_cpu_list, parse_io_bytes
+from backend.container_stats import get_container_stats, format_container_stats
+
+def shape(document):
+    """Nested key structure of a stats document"""
+    return {key: shape(value) if isinstance(value, dict) else type(value).__name__ for key, value in document.items()}
+
+class TestCgroupStatsReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = FakeCgroupTree(containers=3).start()
+        self.reader = CgroupStatsReader(self.tree.cgroup_root, self.tree.proc_root, prime_interval=0.01, resolve=self.tree.resolve, min_window=0.05)
+
+    def tearDown(self):
+        self.tree.stop()
+
+    def test_reads_memory_io_and_network(self):
+        self.assertTrue(self.reader.available())
+        limited = self.reader.sample(container_id(2))
+        unlimited = self.reader.sample('svc-1')
+
+        self.assertEqual(limited['name'], 'svc-2')
+        self.assertEqual((limited['memory_usage'], limited['memory_limit']), (3 * 1048576, 512 * 1048576))
+        # No memory limit: the host's memory, as the Docker API reports it
+        self.assertEqual(unlimited['memory_limit'], HOST_MEMORY_KB * 1024)
+        # Both block devices are summed
+        self.assertEqual((limited['block_read'], limited['block_write']), (4096 * 2 + 100, 8192 * 2 + 200))
+        # Loopback is left out, the other interfaces are summed
+        self.assertEqual((limited['network_rx_bytes'], limited['network_tx_bytes']), (2005, 4007))
+        self.assertEqual(limited['online_cpus'], 4)
+
+    def test_cpu_percent_from_previous_sample(self):
+        first = self.reader.sample(container_id(0))
+        # Primed with two reads of unchanged counters
+        self.assertEqual(first['cpu_percent'], 0.0)
+
+        started = time.monotonic()
+        self.tree.set_cpu(0, 1_000_000 + 50_000)
+        time.sleep(0.1)
+        second = self.reader.sample(container_id(0))
+        elapsed = time.monotonic() - started
+        # 50 ms of CPU over at least 100 ms
+        self.assertGreater(second['cpu_percent'], 0.05 / (elapsed + 0.05) * 100)
+        self.assertLessEqual(second['cpu_percent'], 50.0)
+
+    def test_close_samples_share_the_last_window(self):
+        reader = CgroupStatsReader(self.tree.cgroup_root, self.tree.proc_root, prime_interval=0.01, resolve=self.tree.resolve, min_window=0.3)
+        reader.sample(container_id(0))
+        self.tree.set_cpu(0, 1_000_000 + 100_000)
+        time.sleep(0.3)
+        measured = reader.sample(container_id(0))['cpu_percent']
+        self.assertGreater(measured, 0)
+
+        # A second consumer right after neither sees a near-empty window nor resets the first one's
+        self.assertEqual(reader.sample(container_id(0))['cpu_percent'], measured)
+        self.tree.set_cpu(0, 1_000_000 + 200_000)
+        time.sleep(0.3)
+        self.assertGreater(reader.sample(container_id(0))['cpu_percent'], 0)
+
+    def test_primed_containers_share_one_interval(self):
+        reader = CgroupStatsReader(self.tree.cgroup_root, self.tree.proc_root, prime_interval=0.2, resolve=self.tree.resolve)
+        started = time.monotonic()
+        self.assertTrue(all(reader.prime(container_id(i)) for i in range(3)))
+        self.assertFalse(reader.prime('no-such-container'))
+        self.tree.set_cpu(1, 2_000_000 + 20_000)
+        samples = [reader.sample(container_id(i)) for i in range(3)]
+        elapsed = time.monotonic() - started
+
+        # One 200 ms window for the three, not one each
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(samples[0]['cpu_percent'], 0.0)
+        self.assertGreater(samples[1]['cpu_percent'], 0.0)
+        # The baseline is taken once; priming again later keeps it
+        self.assertTrue(reader.prime(container_id(1)))
+        self.assertEqual(reader.sample(container_id(1))['cpu_percent'], samples[1]['cpu_percent'])
+
+    def test_missing_or_removed_cgroup_falls_back(self):
+        self.assertIsNone(self.reader.sample('no-such-container'))
+        self.assertIsNotNone(self.reader.sample(container_id(1)))
+
+        self.tree.remove(1)
+        self.assertIsNone(self.reader.sample(container_id(1)))
+        self.assertEqual((self.reader.reads, self.reader.fallbacks), (1, 2))
+
+        # A failed read is not retried, nor resolved again, right away
+        resolves = MagicMock(wraps=self.tree.resolve)
+        self.reader.resolve = resolves
+        self.assertIsNone(self.reader.sample(container_id(1)))
+        resolves.assert_not_called()
+
+    def test_no_cgroup_v2_hierarchy(self):
+        reader = CgroupStatsReader(self.tree.proc_root, self.tree.proc_root, resolve=self.tree.resolve)
+        self.assertFalse(reader.available())
+
+    def test_parsers(self):
+        self.assertEqual(parse_cpu_list('0-3,6,8-9\n'), 7)
+        self.assertEqual(parse_cpu_list(''), 0)
+        self.assertEqual(parse_io_bytes(''), (0, 0))
+
+class TestLocalFastPath(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = FakeCgroupTree(containers=2).start()
+        self.reader = CgroupStatsReader(self.tree.cgroup_root, self.tree.proc_root, prime_interval=0, resolve=self.tree.resolve)
+
+    def tearDown(self):
+        self.tree.stop()
+
+    @patch('backend.container_stats.get_client')
+    def test_same_document_shape_without_the_daemon(self, mock_get_client):
+        with patch('backend.container_stats.local_stats', self.reader):
+            stats = get_container_stats(container_id(0))
+
+        mock_get_client.assert_not_called()
+        self.assertEqual(stats['id'], container_id(0))
+        self.assertEqual(stats['name'], 'svc-0')
+        self.assertEqual(shape(stats), shape(format_container_stats('x', 'x', {})))
+
+    @patch('backend.container_stats.get_client')
+    def test_remote_and_unknown_containers_use_the_docker_api(self, mock_get_client):
+        container = MagicMock()
+        container.name = 'remote'
+        container.stats.return_value = {}
+        mock_get_client.return_value.containers.get.return_value = container
+
+        with patch('backend.container_stats.local_stats', self.reader):
+            remote = get_container_stats(container_id(0), remote_host='tcp://10.0.0.5:2375')
+            unknown = get_container_stats('elsewhere')
+
+        self.assertEqual((remote['name'], unknown['name']), ('remote', 'remote'))
+        self.assertEqual(container.stats.call_count, 2)
+        self.assertEqual(self.reader.reads, 0)
+
+if __name__ == '__main__':
+    unittest.main()
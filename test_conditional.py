@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import gzip
+import json
+from unittest.mock import patch
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from backend.conditional import ConditionalRoutes, ConditionalGetMiddleware, CompressionMiddleware
+
+async def call(app, path, query=b'', headers=None):
+    """Drive an ASGI app with one GET request and collect the response"""
+    # ASGI spec 2.4 lets streaming responses finish without a disconnect listener
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0', 'spec_version': '2.4'},
+        'method': 'GET', 'path': path, 'raw_path': path.encode(), 'query_string': query,
+        'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        'http_version': '1.1', 'scheme': 'http', 'server': ('test', 80), 'client': ('test', 1), 'root_path': ''
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    body = b''.join(m.get('body', b'') for m in messages[1:])
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body
+
+class TestConditionalGet(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.state = {'version': 1, 'items': list(range(500)), 'handler_calls': 0}
+
+        async def items(request):
+            self.state['handler_calls'] += 1
+            return JSONResponse(self.state['items'])
+
+        async def unversioned(request):
+            self.state['handler_calls'] += 1
+            return JSONResponse({'items': self.state['items']})
+
+        async def stream(request):
+            return StreamingResponse(iter([b'{"a": 1}\n'] * 200), media_type='application/x-ndjson')
+
+        self.routes = ConditionalRoutes()
+        self.routes.register('/items', lambda params: str(self.state['version']))
+        self.routes.register('/unversioned', lambda params: None)
+        inner = Starlette(routes=[Route('/items', items), Route('/unversioned', unversioned), Route('/items/stream', stream)])
+        self.app = CompressionMiddleware(ConditionalGetMiddleware(inner, routes=self.routes), minimum_size=100)
+
+    async def test_versioned_304_skips_handler(self):
+        status, headers, _ = await call(self.app, '/items')
+        self.assertEqual(status, 200)
+        etag = headers['etag']
+
+        status, headers, body = await call(self.app, '/items', headers={'If-None-Match': etag})
+        self.assertEqual((status, body), (304, b''))
+        self.assertEqual(headers['etag'], etag)
+        self.assertEqual(self.state['handler_calls'], 1)
+
+        # A state change or a different query gives a new tag
+        status, _, _ = await call(self.app, '/items', query=b'count=5', headers={'If-None-Match': etag})
+        self.assertEqual(status, 200)
+        self.state['version'] = 2
+        status, headers, _ = await call(self.app, '/items', headers={'If-None-Match': etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers['etag'], etag)
+
+        stats = self.routes.stats()['/items']
+        self.assertEqual((stats['requests'], stats['not_modified'], stats['not_modified_without_handler']), (4, 1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.25)
+
+    async def test_versioned_tags_do_not_match_across_processes(self):
+        _, headers, _ = await call(self.app, '/items')
+        # Another worker, or this one after a restart, has its counters start over
+        with patch('backend.conditional.BOOT_NONCE', 'other-process'):
+            status, headers, _ = await call(self.app, '/items', headers={'If-None-Match': headers['etag']})
+        self.assertEqual(status, 200)
+        self.assertEqual(self.state['handler_calls'], 2)
+
+    async def test_unversioned_falls_back_to_body_hash(self):
+        _, headers, _ = await call(self.app, '/unversioned')
+        status, _, _ = await call(self.app, '/unversioned', headers={'If-None-Match': headers['etag']})
+        self.assertEqual(status, 304)
+
+        self.state['items'] = [1]
+        status, _, body = await call(self.app, '/unversioned', headers={'If-None-Match': headers['etag']})
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), {'items': [1]})
+        self.assertEqual(self.routes.stats()['/unversioned']['body_hashed'], 3)
+
+    async def test_gzip_for_large_bodies_but_not_streams(self):
+        status, headers, body = await call(self.app, '/items', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(headers['content-encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(body)), self.state['items'])
+        self.assertIn('etag', headers)
+
+        _, headers, body = await call(self.app, '/items/stream', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('content-encoding', headers)
+        self.assertEqual(body.count(b'\n'), 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+import threading
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+import backend.config_manager as config_manager
+import backend.state_store as state_store
+from backend.state_store import StateStore
+
+class TestSettingsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = os.path.join(self.temp_dir.name, 'state.db')
+        self.settings_path = os.path.join(self.temp_dir.name, 'settings.json')
+        patcher = patch.object(state_store, 'STATE_DB_FILE', self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(config_manager, 'SETTINGS_FILE', self.settings_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(state_store.close_state_stores)
+
+    def test_steady_state_reads_do_not_query_the_store(self):
+        config_manager.update_disabled_containers(disabled=['a'])
+        with patch.object(StateStore, 'settings_generation', autospec=True) as mock_generation, \
+                patch.object(StateStore, 'load_settings', autospec=True) as mock_load:
+            for _ in range(1000):
+                self.assertEqual(config_manager.get_disabled_containers(), {'a'})
+                config_manager.settings_version()
+        mock_generation.assert_not_called()
+        mock_load.assert_not_called()
+
+    def test_changes_from_other_processes_are_picked_up(self):
+        config_manager.update_disabled_containers(disabled=['a'])
+        version = config_manager.settings_version()
+        # A second connection stands in for another process
+        other = StateStore(self.db_path)
+        self.addCleanup(other.close)
+        other.update_disabled(disabled=['b'])
+
+        # Within the revalidation window the cached copy is served
+        with patch.object(config_manager, 'SETTINGS_REVALIDATE_SECONDS', 3600):
+            self.assertEqual(config_manager.get_disabled_containers(), {'a'})
+        with patch.object(config_manager, 'SETTINGS_REVALIDATE_SECONDS', 0):
+            self.assertEqual(config_manager.get_disabled_containers(), {'a', 'b'})
+            self.assertNotEqual(config_manager.settings_version(), version)
+
+        # Writes run against the store, so other writers' changes are never overwritten
+        other.update_disabled(enabled=['a', 'b'], disabled=['c'])
+        with patch.object(config_manager, 'SETTINGS_REVALIDATE_SECONDS', 3600):
+            self.assertEqual(config_manager.update_disabled_containers(enabled=['x']), {'c'})
+            self.assertEqual(config_manager.get_disabled_containers(), {'c'})
+
+    def test_version_never_blocks_on_the_store(self):
+        config_manager.update_disabled_containers(disabled=['a'])
+        version = config_manager.settings_version()
+        other = StateStore(self.db_path)
+        self.addCleanup(other.close)
+        other.update_disabled(disabled=['b'])
+
+        with patch.object(config_manager, 'SETTINGS_REVALIDATE_SECONDS', 0):
+            # A writer holds the lock: the tag is still served from memory
+            with config_manager._lock:
+                with patch.object(StateStore, 'settings_generation', autospec=True) as mock_generation:
+                    done = threading.Event()
+                    threading.Thread(target=lambda: (config_manager.settings_version(), done.set())).start()
+                    self.assertTrue(done.wait(2))
+                    self.assertEqual(config_manager.settings_version(), version)
+                mock_generation.assert_not_called()
+            # The revalidation started in the background picks the change up
+            with config_manager._background:
+                pass
+        self.assertNotEqual(config_manager.settings_version(), version)
+
+    def test_loaded_settings_are_copies(self):
+        settings = config_manager.load_settings()
+        settings['disabled_containers'].append('a')
+        self.assertEqual(config_manager.get_disabled_containers(), set())
+
+    def test_concurrent_updates_are_not_lost(self):
+        def worker(n):
+            for i in range(25):
+                config_manager.update_disabled_containers(disabled=[f'{n}-{i}'])
+                if i % 5 == 0:
+                    config_manager.update_disabled_containers(enabled=[f'{n}-{i}'])
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expected = {f'{n}-{i}' for n in range(8) for i in range(25) if i % 5}
+        self.assertEqual(config_manager.get_disabled_containers(), expected)
+        self.assertEqual(set(StateStore(self.db_path).disabled_containers()), expected)
+
+    def test_failed_writes_are_rolled_back(self):
+        config_manager.update_disabled_containers(disabled=['a'])
+        with patch.object(StateStore, '_bump', side_effect=RuntimeError('boom')):
+            with self.assertRaises(Exception):
+                config_manager.update_disabled_containers(disabled=['b'])
+            self.assertFalse(config_manager.save_settings({'disabled_containers': ['c']}))
+
+        with patch.object(config_manager, 'SETTINGS_REVALIDATE_SECONDS', 0):
+            self.assertEqual(config_manager.get_disabled_containers(), {'a'})
+
+    def test_legacy_settings_file_is_imported_once(self):
+        with open(self.settings_path, 'w') as f:
+            json.dump({'disabled_containers': ['old1', 'old2'], 'theme': 'dark'}, f)
+
+        # Reads never import it, only the startup migration does
+        self.assertEqual(config_manager.get_disabled_containers(), set())
+        self.assertTrue(os.path.exists(self.settings_path))
+        config_manager.migrate_legacy_settings()
+
+        self.assertEqual(config_manager.get_disabled_containers(), {'old1', 'old2'})
+        self.assertEqual(config_manager.load_settings()['theme'], 'dark')
+        self.assertFalse(os.path.exists(self.settings_path))
+        self.assertTrue(os.path.exists(self.settings_path + '.migrated'))
+
+        # A stale copy of the old file is not imported again
+        config_manager.update_disabled_containers(enabled=['old1'])
+        with open(self.settings_path, 'w') as f:
+            json.dump({'disabled_containers': ['old1']}, f)
+        config_manager.migrate_legacy_settings()
+        with patch.object(config_manager, 'SETTINGS_REVALIDATE_SECONDS', 0):
+            self.assertEqual(config_manager.get_disabled_containers(), {'old2'})
+
+if __name__ == '__main__':
+    unittest.main()
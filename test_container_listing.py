@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import asyncio
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.docker_scan import get_running_containers, build_container_info, project_fields
+from backend.main import list_containers
+from fastapi import HTTPException
+
+def make_summary(container_id, name, labels=None):
+    # Shape of an entry of GET /containers/json, as returned by containers.list(sparse=True)
+    container = MagicMock()
+    container.attrs = {
+        'Id': container_id,
+        'Names': [f'/{name}'],
+        'Image': 'nginx:latest',
+        'State': 'running',
+        'Status': 'Up 2 hours',
+        'Created': 1700000000,
+        'Ports': [
+            {'IP': '0.0.0.0', 'PrivatePort': 80, 'PublicPort': 8080, 'Type': 'tcp'},
+            {'IP': '::', 'PrivatePort': 80, 'PublicPort': 8080, 'Type': 'tcp'},
+            {'PrivatePort': 443, 'Type': 'tcp'}
+        ],
+        'Labels': labels or {},
+        'NetworkSettings': {'Networks': {'bridge': {'IPAddress': '172.17.0.2'}}}
+    }
+    return container
+
+class TestSparseListing(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        patcher = patch('backend.docker_scan.get_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parses_list_summaries(self):
+        self.client.containers.list.return_value = [
+            make_summary('a1', 'web', {'team': 'core'}),
+            make_summary('z1', 'zeronsd'),
+            make_summary('h1', 'hidden', {'subdomain.enabled': 'false'})
+        ]
+        containers = get_running_containers(labels=['team=core'])
+
+        self.client.containers.list.assert_called_once_with(sparse=True, filters={'label': ['team=core']})
+        self.assertEqual(containers, [{
+            'id': 'a1',
+            'name': 'web',
+            'image': 'nginx:latest',
+            'status': 'running',
+            'ip_address': '172.17.0.2',
+            'ports': [{'container_port': '80', 'protocol': 'tcp', 'host_port': '8080'}],
+            'dns_enabled': True,
+            'created': '2023-11-14T22:13:20Z',
+            'labels': {'team': 'core'}
+        }])
+
+    def test_only_false_label_hides_a_container(self):
+        self.client.containers.list.return_value = [
+            make_summary('h1', 'hidden', {'subdomain.enabled': 'False'}),
+            make_summary('o1', 'off', {'subdomain.enabled': 'no'})
+        ]
+        containers = get_running_containers()
+
+        # Other values are listed with DNS turned off, as before
+        self.assertEqual([(c['name'], c['dns_enabled']) for c in containers], [('off', False)])
+
+    def test_parses_each_container_once(self):
+        self.client.containers.list.return_value = [make_summary('a1', 'web'), make_summary('z1', 'zeronsd')]
+
+        with patch('backend.docker_scan.build_container_info', wraps=build_container_info) as build:
+            get_running_containers()
+        self.assertEqual(build.call_count, 2)
+
+    def test_projection(self):
+        containers = [{'id': 'a1', 'name': 'web', 'ip_address': '10.0.0.2', 'labels': {'x': 'y'}}]
+        self.assertEqual(project_fields(containers, ['id', 'ip_address']), [{'id': 'a1', 'ip_address': '10.0.0.2'}])
+        self.assertIs(project_fields(containers, None), containers)
+        with self.assertRaises(ValueError):
+            project_fields(containers, ['secret'])
+
+class TestListingEndpoint(unittest.TestCase):
+
+    @patch('backend.main.get_disabled_containers', return_value={'a1'})
+    @patch('backend.main.inventory')
+    def test_fields_and_labels_from_inventory(self, mock_inventory, mock_disabled):
+        mock_inventory.is_ready.return_value = True
+        mock_inventory.snapshot.return_value = [
+            build_container_info(make_summary('a1', 'web', {'team': 'core'})),
+            build_container_info(make_summary('b1', 'db', {'team': 'data'}))
+        ]
+        result = asyncio.run(list_containers(fields='id,name,dns_enabled', label=['team']))
+        self.assertEqual(result, [
+            {'id': 'a1', 'name': 'web', 'dns_enabled': False},
+            {'id': 'b1', 'name': 'db', 'dns_enabled': True}
+        ])
+
+        result = asyncio.run(list_containers(fields='name', label=['team=data']))
+        self.assertEqual(result, [{'name': 'db'}])
+
+    def test_unknown_field_is_400(self):
+        with self.assertRaises(HTTPException) as cm:
+            asyncio.run(list_containers(fields='id,secret'))
+        self.assertEqual(cm.exception.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+import backend.dns_logs as dns_logs
+import backend.state_store as state_store
+from backend.dns_logs import DnsLogStore, log_dns_access, log_dns_accesses, get_recent_dns_accesses, get_dns_hits, migrate_legacy_dns_logs, validate_dns_access
+from backend.state_store import StateStore
+from fastapi import HTTPException
+
+class DnsLogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'state.db')
+        self.log_file = os.path.join(self.tmp_dir, 'dns_access.jsonl')
+        patcher = patch.object(dns_logs, 'DEFAULT_LOG_FILE', self.log_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        dns_logs._stores.clear()
+        state_store.close_state_stores()
+        shutil.rmtree(self.tmp_dir)
+
+class TestDnsLogStore(DnsLogTestCase):
+
+    def test_recent_accesses_are_newest_first(self):
+        for i in range(10):
+            log_dns_access(f'10.0.0.{i}', f'svc{i}.vexinet.local', db_path=self.db_path)
+
+        recent = get_recent_dns_accesses(3, db_path=self.db_path)
+        self.assertEqual([entry['ip_address'] for entry in recent], ['10.0.0.9', '10.0.0.8', '10.0.0.7'])
+
+    def test_buffer_is_rebuilt_from_the_database(self):
+        for i in range(20):
+            log_dns_access(f'10.0.0.{i}', 'a.local', db_path=self.db_path)
+        dns_logs._stores.clear()
+        state_store.close_state_stores()
+
+        store = DnsLogStore(StateStore(self.db_path), self.log_file, buffer_size=5)
+        self.assertEqual([entry['ip_address'] for entry in store.recent(2)], ['10.0.0.19', '10.0.0.18'])
+        self.assertEqual(store.sequence, 20)
+        store.append([{'timestamp': 'now', 'ip_address': '10.0.0.99', 'domain': 'b.local'}])
+        store.state.close()
+
+        recent = store.recent(10)
+        self.assertEqual(len(recent), 5)
+        self.assertEqual(recent[0]['ip_address'], '10.0.0.99')
+        self.assertEqual(recent[-1]['ip_address'], '10.0.0.16')
+        self.assertEqual(store.sequence, 21)
+
+    def test_buffer_reads_do_not_touch_the_database(self):
+        store = DnsLogStore(StateStore(self.db_path), self.log_file)
+        store.append([{'timestamp': 't', 'ip_address': '10.0.0.1', 'domain': 'a.local'}])
+        with patch.object(StateStore, 'recent_dns_accesses') as mock_recent, \
+                patch.object(StateStore, 'connection') as mock_connection:
+            self.assertEqual(len(store.recent(5)), 1)
+        mock_recent.assert_not_called()
+        mock_connection.assert_not_called()
+        store.state.close()
+
+    def test_legacy_logs_are_migrated_oldest_first(self):
+        legacy = [
+            {'timestamp': '2024-01-01T00:00:02', 'ip_address': '10.0.0.2', 'domain': 'b.local'},
+            {'timestamp': '2024-01-01T00:00:01', 'ip_address': '10.0.0.1', 'domain': 'a.local'}
+        ]
+        with open(os.path.join(self.tmp_dir, 'dns_access.json'), 'w') as f:
+            json.dump(legacy, f)
+        segments = {self.log_file + '.1': 'd.local', self.log_file + '.2': 'c.local', self.log_file: 'e.local'}
+        for path, domain in segments.items():
+            with open(path, 'w') as f:
+                f.write(json.dumps({'timestamp': '2024-01-01T00:00:03', 'ip_address': '10.0.0.3', 'domain': domain}) + '\n{broken\n')
+
+        # Reads never import them, only the startup migration does
+        self.assertEqual(get_recent_dns_accesses(10, db_path=self.db_path), [])
+        self.assertTrue(os.path.exists(self.log_file))
+        migrate_legacy_dns_logs(db_path=self.db_path)
+
+        recent = get_recent_dns_accesses(10, db_path=self.db_path)
+        self.assertEqual([entry['domain'] for entry in recent], ['e.local', 'd.local', 'c.local', 'b.local', 'a.local'])
+        for path in [os.path.join(self.tmp_dir, 'dns_access.json')] + list(segments):
+            self.assertFalse(os.path.exists(path))
+            self.assertTrue(os.path.exists(path + '.migrated'))
+
+    def test_segment_rotated_during_migration_is_imported(self):
+        for path, domain in {self.log_file + '.1': 'a.local', self.log_file: 'b.local'}.items():
+            with open(path, 'w') as f:
+                f.write(json.dumps({'timestamp': '2024-01-01T00:00:01', 'ip_address': '10.0.0.1', 'domain': domain}) + '\n')
+        read = dns_logs.read_legacy_entries
+
+        def rotating_read(path):
+            # A writer still on the old version rotates .1 to .2 after .1 was listed
+            if path == self.log_file + '.1' and not os.path.exists(self.log_file + '.2'):
+                os.replace(path, self.log_file + '.2')
+            return read(path)
+
+        with patch('backend.dns_logs.read_legacy_entries', side_effect=rotating_read):
+            migrate_legacy_dns_logs(db_path=self.db_path)
+
+        recent = get_recent_dns_accesses(10, db_path=self.db_path)
+        self.assertEqual([entry['domain'] for entry in recent], ['b.local', 'a.local'])
+        self.assertTrue(os.path.exists(self.log_file + '.2.migrated'))
+
+class TestDnsQueries(DnsLogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.state = StateStore(self.db_path)
+        self.now = time.time()
+        entries = []
+        for minutes_ago in range(0, 180):
+            for domain, every in (('web.local', 1), ('db.local', 3), ('old.local', 1000)):
+                if minutes_ago % every == 0:
+                    entries.append({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.now - minutes_ago * 60 - 1)),
+                                    'ip_address': '10.0.0.1', 'domain': domain})
+        entries.append({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.now - 3 * 86400)), 'ip_address': '10.0.0.1', 'domain': 'old.local'})
+        self.state.record_dns_accesses(entries)
+
+    def tearDown(self):
+        self.state.close()
+        super().tearDown()
+
+    def test_hits_per_domain_in_the_last_hour(self):
+        hits = self.state.dns_hits(self.now - 3600, self.now)
+        self.assertEqual([(h['domain'], h['hits']) for h in hits], [('web.local', 60), ('db.local', 20), ('old.local', 1)])
+        self.assertEqual(self.state.domain_hits('db.local', self.now - 7200), 40)
+
+        result = get_dns_hits(3600, limit=1, db_path=self.db_path)
+        self.assertEqual([h['domain'] for h in result['domains']], ['web.local'])
+
+    def test_window_queries_use_the_indexes(self):
+        conn = self.state.connection()
+        plan = ' '.join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT domain, COUNT(*), MAX(ts) FROM dns_access WHERE ts >= ? AND ts < ? GROUP BY domain", (0, 1)))
+        self.assertIn('COVERING INDEX dns_access_ts', plan)
+        plan = ' '.join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM dns_access WHERE domain = ? AND ts >= ?", ('a', 0)))
+        self.assertIn('COVERING INDEX dns_access_domain', plan)
+
+    def test_retention_deletes_old_events(self):
+        store = DnsLogStore(self.state, self.log_file, retention_days=1)
+        store.load()
+        self.assertEqual(self.state.domain_hits('old.local', 0), 1)
+        self.assertEqual(self.state.stats()['rows']['dns_access'], 180 + 60 + 1)
+
+class MockJsonRequest:
+    def __init__(self, data):
+        self.data = data
+        self.headers = {'content-type': 'application/json'}
+
+    async def json(self):
+        if isinstance(self.data, Exception):
+            raise self.data
+        return self.data
+
+class MockStreamRequest:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+class TestBatchIngestion(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'state.db')
+
+    def tearDown(self):
+        dns_logs._stores.clear()
+        state_store.close_state_stores()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_batch_is_validated_and_committed_once(self):
+        entries = [
+            {'ip_address': '10.0.0.1', 'domain': 'a.local'},
+            {'ip_address': 'not-an-ip', 'domain': 'b.local'},
+            {'ip_address': 'fd00::1', 'domain': 'c.local', 'timestamp': '2024-01-01T00:00:00'},
+            {'domain': 'd.local'},
+            'garbage'
+        ]
+        with patch.object(StateStore, 'record_dns_accesses', autospec=True, side_effect=StateStore.record_dns_accesses) as mock_record:
+            result = log_dns_accesses(entries, db_path=self.db_path)
+
+        mock_record.assert_called_once()
+        self.assertEqual((result['accepted'], result['rejected']), (2, 3))
+        self.assertEqual([error['index'] for error in result['errors']], [1, 3, 4])
+        recent = get_recent_dns_accesses(5, db_path=self.db_path)
+        self.assertEqual([entry['domain'] for entry in recent], ['c.local', 'a.local'])
+        self.assertEqual(recent[0]['timestamp'], '2024-01-01T00:00:00')
+
+    def test_entries_are_type_checked(self):
+        self.assertIsNone(validate_dns_access({'ip_address': '10.0.0.1', 'domain': 'a.local', 'timestamp': '2024-01-01T00:00:00Z'}))
+        self.assertEqual(validate_dns_access({'ip_address': 167772161, 'domain': 'a.local'}), 'invalid IP address')
+        for timestamp in ('yesterday', 1704067200, ''):
+            self.assertEqual(
+                validate_dns_access({'ip_address': '10.0.0.1', 'domain': 'a.local', 'timestamp': timestamp}),
+                'timestamp must be an ISO 8601 string'
+            )
+
+    async def test_bad_requests_are_400(self):
+        import backend.main as main
+        requests = [
+            (main.add_dns_log, MockJsonRequest({'ip_address': 'not-an-ip', 'domain': 'a.local'})),
+            (main.add_dns_log, MockJsonRequest(ValueError('Expecting value'))),
+            (main.add_dns_logs_batch, MockJsonRequest({'ip_address': '10.0.0.1', 'domain': 'a.local'})),
+            (main.add_dns_logs_batch, MockJsonRequest(ValueError('Expecting value')))
+        ]
+        with patch('backend.main.log_dns_accesses', side_effect=lambda entries: log_dns_accesses(entries, db_path=self.db_path)):
+            for endpoint, request in requests:
+                with self.assertRaises(HTTPException) as cm:
+                    await endpoint(request)
+                self.assertEqual(cm.exception.status_code, 400, request.data)
+
+    async def test_ndjson_stream_is_split_into_batches(self):
+        import backend.main as main
+        lines = [b'{"ip_address": "10.0.0.%d", "domain": "a.local"}' % i for i in range(7)]
+        body = b'\n'.join(lines[:3] + [b'{broken'] + lines[3:])
+        # Split the body mid-line to exercise incremental parsing
+        request = MockStreamRequest([body[:50], body[50:123], body[123:]])
+
+        def log_to_tmp(entries):
+            return log_dns_accesses(entries, db_path=self.db_path)
+
+        with patch('backend.main.log_dns_accesses', side_effect=log_to_tmp) as mock_log, \
+                patch('backend.main.DNS_LOG_BATCH_SIZE', 3):
+            result = await main.ingest_ndjson(request)
+
+        self.assertEqual(mock_log.call_count, 3)
+        self.assertEqual((result['accepted'], result['rejected']), (7, 1))
+        self.assertEqual(result['errors'], [{'index': 3, 'error': 'entry must be an object'}])
+        self.assertEqual(get_recent_dns_accesses(1, db_path=self.db_path)[0]['ip_address'], '10.0.0.6')
+
+if __name__ == '__main__':
+    unittest.main()
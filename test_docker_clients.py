@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.docker_clients import DockerClientPool
+
+class TestDockerClientPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = DockerClientPool(max_hosts=2, idle_timeout=60, health_check_interval=30, pool_size=4)
+
+    def tearDown(self):
+        self.pool.close_all()
+
+    @patch('backend.docker_clients.docker.from_env')
+    def test_local_client_is_reused(self, mock_from_env):
+        mock_from_env.side_effect = lambda **kwargs: MagicMock()
+
+        first = self.pool.get_client()
+        second = self.pool.get_client()
+
+        self.assertIs(first, second)
+        mock_from_env.assert_called_once_with(max_pool_size=4)
+        stats = self.pool.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hosts']['local']['hits'], 1)
+
+    @patch('backend.docker_clients.docker.DockerClient')
+    def test_host_cap_evicts_least_recently_used(self, mock_client_cls):
+        mock_client_cls.side_effect = lambda **kwargs: MagicMock()
+
+        a = self.pool.get_client('tcp://a:2375')
+        self.pool.get_client('tcp://b:2375')
+        self.pool.get_client('tcp://a:2375')
+        self.pool.get_client('tcp://c:2375')
+
+        stats = self.pool.stats()
+        self.assertEqual(set(stats['hosts']), {'tcp://a:2375', 'tcp://c:2375'})
+        self.assertEqual(stats['evictions'], 1)
+        self.assertIs(self.pool.get_client('tcp://a:2375'), a)
+
+    @patch('backend.docker_clients.docker.from_env')
+    def test_idle_clients_are_evicted(self, mock_from_env):
+        stale = MagicMock()
+        mock_from_env.side_effect = [stale, MagicMock()]
+
+        self.pool.get_client()
+        self.pool._clients['local'].last_used -= 120
+
+        self.assertIsNot(self.pool.get_client(), stale)
+        stale.close.assert_called_once()
+        self.assertEqual(self.pool.stats()['evictions'], 1)
+
+    @patch('backend.docker_clients.docker.from_env')
+    def test_failed_health_check_recreates_client(self, mock_from_env):
+        broken = MagicMock()
+        broken.ping.side_effect = Exception('connection refused')
+        mock_from_env.side_effect = [broken, MagicMock()]
+
+        self.pool.get_client()
+        self.pool._clients['local'].last_checked -= 60
+
+        self.assertIsNot(self.pool.get_client(), broken)
+        self.assertEqual(self.pool.stats()['misses'], 2)
+
+    @patch('backend.docker_clients.docker.DockerClient')
+    def test_leased_clients_are_closed_after_the_last_release(self, mock_client_cls):
+        mock_client_cls.side_effect = lambda **kwargs: MagicMock()
+
+        with self.pool.lease('tcp://a:2375'):
+            a = self.pool.get_client('tcp://a:2375')
+            with self.pool.lease('tcp://b:2375'):
+                b = self.pool.get_client('tcp://b:2375')
+                # Every host is streaming: the least recently used is evicted but stays open
+                self.pool.get_client('tcp://c:2375')
+                a.close.assert_not_called()
+                self.assertEqual(self.pool.stats()['retired'], 1)
+
+                # A leased host is spared while an idle one can go
+                self.pool.get_client('tcp://d:2375')
+                self.assertIn('tcp://b:2375', self.pool.stats()['hosts'])
+            b.close.assert_not_called()
+            a.close.assert_not_called()
+        a.close.assert_called_once()
+        self.assertEqual((self.pool.stats()['leases'], self.pool.stats()['retired']), (0, 0))
+
+    @patch('backend.docker_clients.docker.from_env')
+    def test_leased_clients_are_not_idle(self, mock_from_env):
+        mock_from_env.side_effect = lambda **kwargs: MagicMock()
+        with self.pool.lease():
+            client = self.pool.get_client()
+            self.pool._clients['local'].last_used -= 120
+            self.assertEqual(self.pool.evict_idle(), 0)
+        self.assertIs(self.pool.get_client(), client)
+
+    def test_explicit_zero_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DockerClientPool(max_hosts=0)
+
+if __name__ == '__main__':
+    unittest.main()
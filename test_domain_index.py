@@ -0,0 +1,162 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import time
+import asyncio
+import tempfile
+
+import toml
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.domain_index import DomainIndex
+from backend.main import reverse_lookup_domain, lookup_domain, domains_version, index_inventory_event, build_domains
+from fastapi import HTTPException
+
+WEB_ID = 'a' * 64
+DB_ID = 'b' * 64
+
+def make_info(container_id, name, ip_address):
+    return {'id': container_id, 'name': name, 'ip_address': ip_address, 'dns_enabled': True}
+
+class TestDomainIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.config_path = os.path.join(self.temp_dir.name, 'config.toml')
+        self.index = DomainIndex('test.local')
+        self.index.apply_inventory_event('reset', [make_info(WEB_ID, 'web', '10.0.0.2'), make_info(DB_ID, 'db', '10.0.0.3')])
+
+    def write_config(self, services):
+        with open(self.config_path, 'w') as f:
+            toml.dump({'services': services}, f)
+        # Make sure the mtime moves on filesystems with coarse timestamps
+        stat = os.stat(self.config_path)
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_lookups(self):
+        for key in (WEB_ID, WEB_ID[:12], 'web', 'web.test.local', 'web.test.local.', '10.0.0.2'):
+            self.assertEqual(self.index.lookup(key).id, WEB_ID, key)
+        self.assertIsNone(self.index.lookup('missing'))
+        self.assertEqual([r.fqdn for r in self.index.reverse('10.0.0.3')], ['db.test.local'])
+
+    def test_addresses_are_normalized(self):
+        v6_id = 'c' * 64
+        self.index.apply_inventory_event('upsert', make_info(v6_id, 'v6', 'fd00:0:0::0002'))
+        for address in ('fd00::2', 'FD00:0000::2', 'fd00:0:0:0:0:0:0:2'):
+            self.assertEqual([r.id for r in self.index.reverse(address)], [v6_id], address)
+            self.assertEqual(self.index.lookup(address).id, v6_id, address)
+
+        self.index.apply_inventory_event('remove', v6_id)
+        self.assertEqual(self.index.reverse('fd00::2'), [])
+        self.assertEqual(self.index.stats()['addresses'], 2)
+
+    def test_incremental_inventory_changes(self):
+        version = self.index.version
+        self.index.apply_inventory_event('upsert', make_info(WEB_ID, 'web', '10.0.0.9'))
+        self.assertEqual(self.index.reverse('10.0.0.2'), [])
+        self.assertEqual(self.index.lookup('10.0.0.9').name, 'web')
+
+        self.index.apply_inventory_event('remove', DB_ID)
+        self.assertIsNone(self.index.lookup('db'))
+        self.assertIsNone(self.index.lookup(DB_ID[:12]))
+        self.assertEqual(self.index.version, version + 2)
+
+    def test_config_changes_are_picked_up_by_mtime(self):
+        self.write_config([{'name': 'web.test.local', 'type': 'A', 'address': '192.168.1.10'}])
+        self.assertTrue(self.index.refresh_config(self.config_path))
+        self.assertFalse(self.index.refresh_config(self.config_path))
+
+        domains = self.index.domains()
+        self.assertEqual(domains['web'], {'name': 'web.test.local', 'enabled': True, 'address': '192.168.1.10'})
+        self.assertEqual(domains['db'], {'name': 'db.test.local', 'enabled': False, 'address': '10.0.0.3'})
+        self.assertEqual(self.index.reverse('192.168.1.10')[0].name, 'web')
+        self.assertIs(self.index.domains(), domains)
+
+        self.write_config([])
+        self.assertTrue(self.index.refresh_config(self.config_path))
+        self.assertFalse(self.index.domains()['web']['enabled'])
+
+    def test_disabled_containers(self):
+        self.index.set_disabled([DB_ID])
+        self.assertFalse(self.index.lookup('db').dns_enabled)
+        self.assertTrue(self.index.lookup('web').dns_enabled)
+
+    def test_reverse_lookups_are_fast(self):
+        self.index.replace_containers([make_info(f'{i:064x}', f'svc{i}', f'10.1.{i // 250}.{i % 250}') for i in range(5000)])
+        started = time.perf_counter()
+        for i in range(100000):
+            self.index.reverse(f'10.1.{(i % 5000) // 250}.{i % 250}')
+        per_lookup_us = (time.perf_counter() - started) * 10
+        print(f"Reverse lookup: {per_lookup_us:.3f} us")
+        self.assertLess(per_lookup_us, 20)
+
+class TestLookupEndpoints(unittest.IsolatedAsyncioTestCase):
+
+    @patch('backend.main.get_running_containers', return_value=[make_info(WEB_ID, 'web', '10.0.0.2')])
+    async def test_reverse_endpoint_falls_back_to_a_scan(self, mock_list):
+        result = await reverse_lookup_domain('10.0.0.2')
+        self.assertEqual(result['ptr'], '2.0.0.10.in-addr.arpa')
+        self.assertEqual(len(result['names']), 1)
+        self.assertTrue(result['names'][0].startswith('web.'))
+
+        record = await lookup_domain('web')
+        self.assertEqual(record['id'], WEB_ID)
+
+        with self.assertRaises(HTTPException) as cm:
+            await reverse_lookup_domain('not-an-ip')
+        self.assertEqual(cm.exception.status_code, 400)
+
+        with self.assertRaises(HTTPException) as cm:
+            await reverse_lookup_domain('10.9.9.9')
+        self.assertEqual(cm.exception.status_code, 404)
+
+class TestDomainsVersion(unittest.TestCase):
+
+    @patch('backend.main.inventory')
+    @patch('backend.main.domain_index')
+    def test_version_reads_the_counter_and_the_config_mtime(self, mock_index, mock_inventory):
+        mock_inventory.is_ready.return_value = True
+        mock_index.version = 7
+
+        with patch('backend.main.DNS_CONFIG_PATH', '/nonexistent/config.toml'):
+            self.assertEqual(domains_version({}), '7:None')
+        self.assertIsNone(domains_version({'remote_host': 'tcp://10.0.0.5:2375'}))
+        mock_index.refresh_config.assert_not_called()
+
+    @patch('backend.main.inventory')
+    def test_external_config_edits_are_seen_while_the_inventory_is_live(self, mock_inventory):
+        mock_inventory.is_ready.return_value = True
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        config_path = os.path.join(temp_dir.name, 'config.toml')
+        index = DomainIndex('test.local')
+        index.apply_inventory_event('reset', [make_info(WEB_ID, 'web', '10.0.0.2')])
+
+        with patch('backend.main.domain_index', index), patch('backend.main.DNS_CONFIG_PATH', config_path):
+            self.assertFalse(build_domains()['domains']['web']['enabled'])
+            tag = domains_version({})
+
+            # Another worker rewrites config.toml
+            with open(config_path, 'w') as f:
+                toml.dump({'services': [{'name': 'web.test.local', 'type': 'A', 'address': '10.0.0.2'}]}, f)
+            self.assertNotEqual(domains_version({}), tag)
+            self.assertTrue(index.config_changed(config_path))
+            self.assertTrue(build_domains()['domains']['web']['enabled'])
+            self.assertFalse(index.config_changed(config_path))
+
+    @patch('backend.main.domain_index')
+    def test_config_is_reread_on_the_inventory_thread_after_a_seed(self, mock_index):
+        index_inventory_event('upsert', make_info(WEB_ID, 'web', '10.0.0.2'))
+        mock_index.refresh_config.assert_not_called()
+        index_inventory_event('reset', [])
+        mock_index.refresh_config.assert_called_once()
+        self.assertEqual(mock_index.apply_inventory_event.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import time
+import asyncio
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.fleet import scan_fleet, fleet_pool
+from backend.docker_clients import DockerClientPool
+from backend.main import get_docker_pool_stats
+from backend.docker_async import lane_size, FANOUT_LANE
+from backend.main import scan_fleet_hosts
+from fastapi import HTTPException
+
+def fake_scan(remote_host=None, client_pool=None):
+    # Host latency is encoded in the URL, e.g. tcp://slow-0.5:2375
+    host = remote_host or 'local-0.1'
+    if 'down' in host:
+        raise Exception('Connection refused')
+    delay = float(host.split('-')[1].split(':')[0])
+    time.sleep(delay)
+    return [{'id': host, 'name': host}]
+
+class MockRequest:
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+@patch('backend.fleet.get_running_containers', side_effect=fake_scan)
+class TestFleetScan(unittest.IsolatedAsyncioTestCase):
+
+    async def test_takes_as_long_as_slowest_host(self, mock_scan):
+        hosts = [f'tcp://host{i}-0.5:2375' for i in range(30)]
+        started = time.perf_counter()
+        result = await scan_fleet(hosts, timeout=5)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(result['healthy'], 30)
+        self.assertEqual(result['containers'], 30)
+        self.assertEqual([r['host'] for r in result['results']], hosts)
+
+    async def test_unreachable_and_slow_hosts_are_degraded(self, mock_scan):
+        hosts = ['local', 'tcp://down:2375', 'tcp://stuck-3:2375']
+        started = time.perf_counter()
+        result = await scan_fleet(hosts, timeout=0.5)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(result['healthy'], 1)
+        self.assertEqual(result['degraded'], ['tcp://down:2375', 'tcp://stuck-3:2375'])
+        self.assertEqual(result['results'][1]['error'], 'Connection refused')
+        self.assertIn('Timed out', result['results'][2]['error'])
+        # The local daemon is scanned without a remote host
+        self.assertIn(unittest.mock.call(None, client_pool=fleet_pool), mock_scan.call_args_list)
+
+    async def test_deadline_starts_when_the_scan_runs(self, mock_scan):
+        # More hosts than fan-out workers: the last ones queue for a worker first
+        hosts = [f'tcp://host{i}-0.3:2375' for i in range(lane_size(FANOUT_LANE) + 4)]
+        result = await scan_fleet(hosts, timeout=0.5)
+        self.assertEqual(result['healthy'], len(hosts))
+
+    async def test_timeout_is_validated(self, mock_scan):
+        for timeout in ('5', -1, 0, True, 3600):
+            with self.assertRaises(HTTPException) as cm:
+                await scan_fleet_hosts(MockRequest({'hosts': ['local'], 'timeout': timeout}))
+            self.assertEqual(cm.exception.status_code, 400, timeout)
+        with self.assertRaises(HTTPException) as cm:
+            await scan_fleet_hosts(MockRequest(['local']))
+        self.assertEqual(cm.exception.status_code, 400)
+        mock_scan.assert_not_called()
+
+    async def test_stream_yields_hosts_as_they_answer(self, mock_scan):
+        response = await scan_fleet_hosts(MockRequest({
+            'hosts': ['tcp://slow-0.6:2375', 'tcp://fast-0.05:2375'],
+            'stream': True
+        }))
+        lines = [json.loads(line) async for line in response.body_iterator]
+
+        self.assertEqual([line.get('host') for line in lines[:2]], ['tcp://fast-0.05:2375', 'tcp://slow-0.6:2375'])
+        self.assertEqual(lines[-1]['summary']['healthy'], 2)
+
+    async def test_invalid_hosts_are_degraded(self, mock_scan):
+        result = await scan_fleet(['local', '', ['tcp://a:2375'], 5, 'local'], timeout=1)
+        self.assertEqual(result['hosts'], 4)
+        self.assertEqual(result['healthy'], 1)
+        self.assertEqual([r['host'] for r in result['results']], ['local', '', ['tcp://a:2375'], 5])
+        self.assertEqual(result['results'][2]['error'], 'Host must be a non-empty string')
+        self.assertEqual(mock_scan.call_count, 1)
+
+class TestFleetPool(unittest.IsolatedAsyncioTestCase):
+
+    @patch('backend.docker_clients.docker.DockerClient', side_effect=lambda **kwargs: unittest.mock.MagicMock())
+    async def test_a_large_fleet_reuses_its_clients(self, mock_client_cls):
+        pool = DockerClientPool(max_hosts=fleet_pool.max_hosts, health_check_interval=3600)
+        self.addCleanup(pool.close_all)
+
+        def scan(remote_host, labels=None, client_pool=None):
+            client_pool.get_client(remote_host)
+            return []
+
+        hosts = [f'tcp://host{i}:2375' for i in range(30)]
+        with patch('backend.fleet.fleet_pool', pool), patch('backend.fleet.get_running_containers', side_effect=scan):
+            await scan_fleet(hosts, timeout=5)
+            await scan_fleet(hosts, timeout=5)
+
+        stats = pool.stats()
+        self.assertEqual((stats['misses'], stats['hits'], stats['evictions']), (30, 30, 0))
+
+    async def test_pool_stats_include_the_fleet_pool(self):
+        stats = await get_docker_pool_stats()
+        self.assertEqual(stats['fleet']['max_hosts'], fleet_pool.max_hosts)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+import docker
+from backend.inventory import ContainerInventory
+
+def make_container(container_id, name, ip_address, status='running'):
+    container = MagicMock()
+    container.id = container_id
+    container.status = status
+    container.attrs = {
+        'Name': f'/{name}',
+        'Config': {'Image': 'nginx:latest', 'Labels': {}},
+        'State': {'Status': status},
+        'Created': '2023-01-01T00:00:00Z',
+        'NetworkSettings': {
+            'Networks': {'bridge': {'IPAddress': ip_address}},
+            'Ports': {}
+        }
+    }
+    return container
+
+class TestContainerInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.web = make_container('web1', 'web', '10.0.0.2')
+        self.client.containers.list.return_value = [self.web, make_container('zid', 'zeronsd', '10.0.0.9')]
+        self.inventory = ContainerInventory()
+        self.inventory._client = self.client
+        self.inventory._seed()
+
+    def test_seed_skips_system_containers(self):
+        snapshot = self.inventory.snapshot()
+        self.assertEqual([c['id'] for c in snapshot], ['web1'])
+        self.assertEqual(self.inventory.generation, 1)
+
+    def test_snapshot_returns_copies(self):
+        self.inventory.snapshot()[0]['dns_enabled'] = False
+        self.assertTrue(self.inventory.snapshot()[0]['dns_enabled'])
+        # Nested values are copied too
+        self.inventory.snapshot()[0]['labels']['subdomain.enabled'] = 'false'
+        self.assertEqual(self.inventory.snapshot()[0]['labels'], {})
+
+    def test_paused_containers_stay(self):
+        self.web.status = 'paused'
+        self.web.attrs['State']['Status'] = 'paused'
+        self.client.containers.get.return_value = self.web
+        self.inventory._apply_event({'Type': 'container', 'Action': 'pause', 'Actor': {'ID': 'web1'}})
+        self.inventory._apply_event({'Type': 'container', 'Action': 'update', 'Actor': {'ID': 'web1'}})
+        self.assertEqual([c['id'] for c in self.inventory.snapshot()], ['web1'])
+
+    def test_start_and_die_events(self):
+        api = make_container('api1', 'api', '10.0.0.3')
+        self.client.containers.get.return_value = api
+        self.inventory._apply_event({'Type': 'container', 'Action': 'start', 'Actor': {'ID': 'api1'}})
+        self.assertEqual({c['id'] for c in self.inventory.snapshot()}, {'web1', 'api1'})
+
+        self.inventory._apply_event({'Type': 'container', 'Action': 'die', 'Actor': {'ID': 'web1'}})
+        self.assertEqual([c['id'] for c in self.inventory.snapshot()], ['api1'])
+        self.assertEqual(self.inventory.generation, 3)
+        self.assertEqual(self.inventory.events_applied, 2)
+
+    def test_network_connect_refreshes_ip(self):
+        self.web.attrs['NetworkSettings']['Networks'] = {'frontend': {'IPAddress': '172.20.0.5'}}
+        self.client.containers.get.return_value = self.web
+        self.inventory._apply_event({
+            'Type': 'network',
+            'Action': 'connect',
+            'Actor': {'ID': 'net1', 'Attributes': {'container': 'web1'}}
+        })
+        self.assertEqual(self.inventory.snapshot()[0]['ip_address'], '172.20.0.5')
+
+    def test_refresh_of_removed_container(self):
+        self.client.containers.get.side_effect = docker.errors.NotFound('gone')
+        self.inventory._apply_event({'Type': 'container', 'Action': 'rename', 'Actor': {'ID': 'web1'}})
+        self.assertEqual(self.inventory.snapshot(), [])
+
+    def test_ignored_events_do_not_bump_generation(self):
+        self.inventory._apply_event({'Type': 'container', 'Action': 'exec_start', 'Actor': {'ID': 'web1'}})
+        self.assertEqual(self.inventory.generation, 1)
+        self.assertEqual(self.inventory.events_applied, 0)
+
+if __name__ == '__main__':
+    unittest.main()
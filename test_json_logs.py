@@ -0,0 +1,180 @@
+import unittest
+import sys
+import os
+import time
+import threading
+from unittest.mock import patch, MagicMock
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+sys.path.insert(0, os.path.join(current_dir, 'benchmarks'))
+
+from fake_json_logs import FakeJsonLogTree, log_line, log_time
+from fake_docker import container_id
+import backend.json_logs as json_logs
+from backend.json_logs import JsonLogReader, LogFile, TimeIndex, lines_backward, lines_forward, parse_log_time
+from backend.container_stats import get_container_logs, LogFilter, LogStream
+
+def numbers(entries):
+    """Line numbers of the fake log entries"""
+    return [int(entry['message'].split()[1]) for entry in entries]
+
+class TestJsonLogReader(unittest.TestCase):
+
+    def setUp(self):
+        # 3000 lines over .2, .1 and the current file, indexed every 4 KiB (about 40 lines)
+        self.tree = FakeJsonLogTree(containers=2, lines=3000, rotations=2, drivers={1: 'journald'}).start()
+        self.reader = JsonLogReader(self.tree.log_dir, stride=4096, resolve=self.tree.resolve)
+
+    def tearDown(self):
+        self.tree.stop()
+
+    def test_tail_spans_rotated_files(self):
+        self.assertEqual(len(self.reader.log_files('svc-0')), 3)
+        self.assertEqual(numbers(self.reader.read('svc-0', 5)), list(range(2995, 3000)))
+        # Longer than the current file: continues into .1 and .2
+        entries = self.reader.read(container_id(0)[:12], 2500)
+        self.assertEqual(numbers(entries), list(range(500, 3000)))
+        self.assertEqual(numbers(self.reader.read('svc-0', 10000)), list(range(3000)))
+        self.assertEqual(entries[0]['timestamp'], '2024-01-01T00:02:05.000000000Z')
+
+    def test_time_ranges(self):
+        # until inside .1, counted back from there
+        self.assertEqual(numbers(self.reader.read('svc-0', 3, until=log_time(1500))), [1498, 1499, 1500])
+        # since stops the backward walk before the tail is full
+        self.assertEqual(numbers(self.reader.read('svc-0', 100, since=log_time(2990))), list(range(2990, 3000)))
+        # Without a line count the range is streamed oldest first, across a rotation boundary
+        entries = self.reader.read('svc-0', since=log_time(995), until=log_time(1005.5))
+        self.assertEqual(numbers(entries), list(range(995, 1006)))
+        self.assertEqual(numbers(self.reader.read('svc-0', since=log_time(5000))), [])
+        self.assertEqual(self.reader.read('svc-0', 10, until=log_time(-1)), [])
+
+    def test_bisects_within_a_stride(self):
+        # One index entry per file: lookups bisect the file itself
+        reader = JsonLogReader(self.tree.log_dir, stride=1 << 30, resolve=self.tree.resolve)
+        for first in (0, 1, 517, 999, 1000, 1763, 2998):
+            entries = reader.read('svc-0', since=log_time(first), until=log_time(first + 1))
+            self.assertEqual(numbers(entries), list(range(first, min(first + 2, 3000))))
+            self.assertEqual(numbers(reader.read('svc-0', 1, until=log_time(first + 0.1))), [first])
+        self.assertEqual(reader.stats()['index_entries'], 3)
+
+    def test_index_is_sparse_and_extended_on_growth(self):
+        list(self.reader.read('svc-0', since=log_time(2500)))
+        entries = self.reader.stats()['index_entries']
+        # One entry per stride of the current file, not one per line
+        self.assertLess(entries, 1000 // 20)
+        self.assertGreater(entries, 5)
+
+        # New lines, and one still being written
+        self.tree.append(0, log_line(3000) + log_line(3001) + log_line(3002)[:20])
+        self.assertEqual(numbers(self.reader.read('svc-0', 2)), [3000, 3001])
+        self.assertEqual(numbers(self.reader.read('svc-0', since=log_time(3000))), [3000, 3001])
+        self.assertGreaterEqual(self.reader.stats()['index_entries'], entries)
+
+    def test_index_stays_ordered_under_concurrent_readers(self):
+        index = TimeIndex(4096)
+        line_time = json_logs.line_time
+        slow_line_time = lambda line: time.sleep(0.001) or line_time(line)
+        found = []
+
+        def query():
+            with LogFile(self.tree.path(0)) as log:
+                found.append(index.offset_of(log, log.size, log_time(2500)))
+
+        # Slow parses make two threads index the same new bytes at the same time without the lock
+        with patch('backend.json_logs.line_time', side_effect=slow_line_time):
+            threads = [threading.Thread(target=query) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(index.offsets, sorted(set(index.offsets)))
+        self.assertEqual(len(index.offsets), len(index.times))
+        with LogFile(self.tree.path(0)) as log:
+            self.assertEqual(found, [index.offset_of(log, log.size, log_time(2500))] * 4)
+
+    def test_truncated_in_place_while_reading(self):
+        # json-file rotation with max-file=1 truncates the open log: reads come back short instead of faulting
+        path = self.tree.path(0)
+        entries = self.reader.read('svc-0', since=log_time(2100))
+        self.assertEqual(numbers([next(entries), next(entries)]), [2100, 2101])
+        os.truncate(path, 0)
+        # At most the rest of the block already read, then the stream ends
+        rest = numbers(entries)
+        self.assertEqual(rest, list(range(2102, 2102 + len(rest))))
+        self.assertLess(len(rest), 898)
+
+        with LogFile(path + '.1') as log:
+            lines = lines_forward(log, 0, log.size)
+            next(lines)
+            os.truncate(path + '.1', 0)
+            self.assertLess(len(list(lines)), 999)
+            self.assertEqual(list(lines_backward(log, log.size)), [])
+
+        # The index of the truncated file starts over
+        self.tree.append(0, log_line(5000) + log_line(5001))
+        self.assertEqual(numbers(self.reader.read('svc-0', since=log_time(5001))), [5001])
+        # .1 is empty now, the tail goes on into .2
+        self.assertEqual(numbers(self.reader.read('svc-0', 3)), [999, 5000, 5001])
+
+    def test_other_drivers_and_unknown_containers_fall_back(self):
+        self.assertIsNone(self.reader.read('svc-1', 10))
+        self.assertIsNone(self.reader.read('no-such-container', 10))
+        self.assertEqual((self.reader.reads, self.reader.fallbacks), (0, 2))
+
+    def test_unreadable_log_directory_falls_back(self):
+        reader = JsonLogReader(os.path.join(self.tree.log_dir, 'missing'), resolve=self.tree.resolve)
+        self.assertIsNone(reader.read('svc-0', 10))
+
+    def test_parse_log_time(self):
+        self.assertEqual(parse_log_time('2024-01-01T00:00:01.500000000Z'), 1704067201.5)
+        self.assertEqual(parse_log_time('2024-01-01T02:00:01+02:00'), 1704067201.0)
+        self.assertIsNone(parse_log_time('not a time'))
+
+class TestLocalLogPath(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = FakeJsonLogTree(containers=2, lines=200, rotations=1, drivers={1: 'journald'}).start()
+        self.reader = JsonLogReader(self.tree.log_dir, stride=4096, resolve=self.tree.resolve)
+        patcher = patch('backend.container_stats.local_logs', self.reader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tree.stop)
+
+    @patch('backend.container_stats.get_client')
+    def test_json_file_logs_skip_the_daemon(self, mock_get_client):
+        logs = get_container_logs(container_id(0), 3, since=log_time(100), until=log_time(150))
+
+        mock_get_client.assert_not_called()
+        self.assertEqual(numbers(logs), [148, 149, 150])
+        self.assertEqual(set(logs[0]), {'timestamp', 'message'})
+
+    @patch('backend.container_stats.get_client')
+    def test_other_drivers_and_remote_hosts_use_the_api(self, mock_get_client):
+        container = MagicMock()
+        container.logs.return_value = b'2024-01-01T00:00:00Z from the daemon\n'
+        mock_get_client.return_value.containers.get.return_value = container
+
+        journald = get_container_logs('svc-1', 5, until=1704067300.0)
+        remote = get_container_logs('svc-0', 5, remote_host='tcp://10.0.0.5:2375')
+
+        self.assertEqual(journald, remote)
+        self.assertEqual(journald, [{'timestamp': '2024-01-01T00:00:00Z', 'message': 'from the daemon'}])
+        container.logs.assert_any_call(tail=5, timestamps=True, until=1704067300.0)
+        container.logs.assert_called_with(tail=5, timestamps=True)
+
+    @patch('backend.container_stats.get_client')
+    def test_log_stream_reads_files_unless_following(self, mock_get_client):
+        stream = LogStream('svc-0', tail=50, follow=False, log_filter=LogFilter(contains='line 19'))
+        entries = list(stream)
+
+        mock_get_client.assert_not_called()
+        self.assertEqual(numbers(entries), [190, 191, 192, 193, 194, 195, 196, 197, 198, 199])
+        self.assertEqual(stream.lines_read, 50)
+        self.assertIn('level', entries[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+import sys
+import os
+import json
+import time
+import threading
+from unittest.mock import patch, MagicMock
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+sys.path.insert(0, os.path.join(current_dir, 'benchmarks'))
+
+from fake_json_logs import format_time, log_time
+from backend.log_merge import MergedLogStream, merged_container_logs, parse_container_refs
+from backend.main import stream_merged_logs
+from fastapi import HTTPException
+
+def entries(numbers, label=''):
+    """Log entries at the fake log's line times"""
+    for number in numbers:
+        yield {'timestamp': format_time(log_time(number)), 'message': f'{label}{number}', 'level': None}
+
+class QuietSource:
+    """Follow-mode source: yields its entries, then blocks until closed"""
+
+    def __init__(self, items):
+        self.items = items
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        yield from self.items
+        self.closed.wait(5)
+
+    def close(self):
+        self.closed.set()
+
+class TestMergedLogStream(unittest.TestCase):
+
+    def test_timestamp_order_with_source_fields(self):
+        merged = MergedLogStream([
+            ({'container': 'web'}, entries([0, 3, 4, 9], 'web ')),
+            ({'container': 'db', 'host': 'tcp://10.0.0.5:2375'}, entries([1, 2, 5], 'db ')),
+            ({'container': 'cache'}, entries([]))
+        ])
+        result = list(merged)
+
+        self.assertEqual([entry['message'] for entry in result], ['web 0', 'db 1', 'db 2', 'web 3', 'web 4', 'db 5', 'web 9'])
+        self.assertEqual(result[1]['container'], 'db')
+        self.assertEqual(result[1]['host'], 'tcp://10.0.0.5:2375')
+        self.assertNotIn('host', result[0])
+        self.assertEqual(merged.lines_merged, 7)
+
+    def test_read_ahead_is_bounded_per_source(self):
+        produced = {'fast': 0}
+
+        def fast():
+            for entry in entries(range(1000, 6000)):
+                produced['fast'] += 1
+                yield entry
+
+        def slow():
+            for entry in entries(range(10)):
+                time.sleep(0.01)
+                yield entry
+
+        read_ahead = []
+        merged = MergedLogStream([({'container': 'fast'}, fast()), ({'container': 'slow'}, slow())], buffer_lines=50)
+        emitted = 0
+        for entry in merged:
+            if entry['container'] == 'fast':
+                emitted += 1
+            read_ahead.append(produced['fast'] - emitted)
+
+        self.assertEqual(emitted, 5000)
+        # Waiting for the slow source never buffers more than its slots (+1 being handed over)
+        self.assertLessEqual(max(read_ahead), 51)
+
+    def test_follow_does_not_wait_for_a_quiet_source(self):
+        quiet, busy = QuietSource([]), QuietSource(list(entries([1, 2])))
+        merged = MergedLogStream([({'container': 'quiet'}, quiet), ({'container': 'busy'}, busy)], follow=True, window=0.05)
+
+        started = time.monotonic()
+        iterator = iter(merged)
+        first = [next(iterator)['message'], next(iterator)['message']]
+        self.assertEqual(first, ['1', '2'])
+        self.assertLess(time.monotonic() - started, 1)
+
+        iterator.close()
+        self.assertTrue(quiet.closed.is_set() and busy.closed.is_set())
+        # close() waited for the readers
+        self.assertTrue(all(reader.done() for reader in merged._readers))
+
+    def test_readers_are_bounded_by_the_lane(self):
+        with patch('backend.log_merge._reader_permits', threading.BoundedSemaphore(3)) as permits:
+            first = MergedLogStream([({'container': 'a'}, QuietSource([])), ({'container': 'b'}, QuietSource([]))], follow=True)
+            first.start()
+            second = MergedLogStream([({'container': 'c'}, QuietSource([])), ({'container': 'd'}, QuietSource([]))], follow=True)
+            with self.assertRaises(RuntimeError):
+                second.start()
+            # The refused stream gave its permit back
+            self.assertTrue(permits.acquire(blocking=False))
+            permits.release()
+
+            first.close()
+            # Finished readers return their workers
+            second.start()
+            second.close()
+
+    def test_failed_source_reports_and_the_others_go_on(self):
+        def broken():
+            yield from entries([0])
+            raise Exception('Container gone not found')
+
+        result = list(MergedLogStream([({'container': 'gone'}, broken()), ({'container': 'web'}, entries([1, 2]))]))
+
+        self.assertIn({'container': 'gone', 'error': 'Container gone not found'}, result)
+        self.assertEqual([entry['message'] for entry in result if 'message' in entry], ['0', '1', '2'])
+
+    def test_parse_container_refs(self):
+        self.assertEqual(
+            parse_container_refs(['web,db@tcp://10.0.0.5:2375', 'web', 'cache'], remote_host='tcp://10.0.0.9:2375'),
+            [('web', 'tcp://10.0.0.9:2375'), ('db', 'tcp://10.0.0.5:2375'), ('cache', 'tcp://10.0.0.9:2375')]
+        )
+        self.assertEqual(parse_container_refs(['web, ,db']), [('web', None), ('db', None)])
+
+class TestMergedLogsEndpoint(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Each host's daemon serves the same container name with its own lines
+        hosts = {
+            None: b'2024-01-01T00:00:00.000000000Z INFO local a\n2024-01-01T00:00:02.000000000Z ERROR local b\n',
+            'tcp://10.0.0.5:2375': b'2024-01-01T00:00:01.000000000Z ERROR remote a\n'
+        }
+
+        def client_for(host=None):
+            container = MagicMock()
+            container.logs.return_value = iter([hosts[host]])
+            client = MagicMock()
+            client.containers.get.return_value = container
+            return client
+
+        patcher = patch('backend.container_stats.get_client', side_effect=client_for)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # No local json-file logs: every container goes through the mocked API
+        reader = patch('backend.container_stats.local_logs.read', return_value=None)
+        reader.start()
+        self.addCleanup(reader.stop)
+
+    async def test_streams_one_timeline(self):
+        response = await stream_merged_logs(['web', 'web@tcp://10.0.0.5:2375'], follow=False, level='error', tail=100, since=None, contains=None)
+        self.assertEqual(response.media_type, 'application/x-ndjson')
+
+        body = [json.loads(line) async for line in response.body_iterator]
+        self.assertEqual(body, [
+            {'timestamp': '2024-01-01T00:00:01.000000000Z', 'message': 'ERROR remote a', 'level': 'error', 'container': 'web', 'host': 'tcp://10.0.0.5:2375'},
+            {'timestamp': '2024-01-01T00:00:02.000000000Z', 'message': 'ERROR local b', 'level': 'error', 'container': 'web'}
+        ])
+
+    async def test_reader_limit_is_503(self):
+        with patch('backend.log_merge._reader_permits', threading.BoundedSemaphore(1)):
+            with self.assertRaises(HTTPException) as cm:
+                await stream_merged_logs(['web', 'db'], follow=False, level=None, tail=100, since=None, contains=None)
+        self.assertEqual(cm.exception.status_code, 503)
+
+    async def test_container_count_is_checked(self):
+        with self.assertRaises(HTTPException) as cm:
+            await stream_merged_logs([','], level=None)
+        self.assertEqual(cm.exception.status_code, 400)
+
+        with self.assertRaises(HTTPException) as cm:
+            await stream_merged_logs([f'svc-{i}' for i in range(100)], level=None)
+        self.assertEqual(cm.exception.status_code, 400)
+
+    async def test_sources_are_log_streams(self):
+        merged = merged_container_logs([('web', None), ('db', 'tcp://10.0.0.5:2375')], tail=5, follow=False)
+        self.assertEqual([fields for fields, _ in merged.sources], [{'container': 'web'}, {'container': 'db', 'host': 'tcp://10.0.0.5:2375'}])
+        self.assertEqual([(stream.tail, stream.remote_host) for _, stream in merged.sources], [(5, None), (5, 'tcp://10.0.0.5:2375')])
+
+if __name__ == '__main__':
+    unittest.main()
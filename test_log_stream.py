@@ -0,0 +1,138 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import json
+import asyncio
+import threading
+import tracemalloc
+from contextlib import aclosing
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.container_stats import LogFilter, LogStream
+from backend.docker_async import iterate_in_thread
+from backend.main import stream_logs
+from fastapi import HTTPException
+
+class FollowStream:
+    """Stand-in for a follow-mode log stream: yields its chunks, then blocks until closed"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        yield from self.chunks
+        self.closed.wait(5)
+
+    def close(self):
+        self.closed.set()
+
+def patch_logs(test, stream):
+    container = MagicMock()
+    container.logs.return_value = stream
+    client = MagicMock()
+    client.containers.get.return_value = container
+    patcher = patch('backend.container_stats.get_client', return_value=client)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return container
+
+class TestLogStream(unittest.TestCase):
+
+    def test_lines_split_across_chunks(self):
+        container = patch_logs(self, iter([
+            b'2024-01-01T00:00:00Z INFO started\n2024-01-01T00:00:01Z ERR',
+            b'OR disk full\n2024-01-01T00:00:02Z no newline'
+        ]))
+        entries = list(LogStream('abc', tail=None, follow=False, since=1700000000))
+
+        self.assertEqual(entries, [
+            {'timestamp': '2024-01-01T00:00:00Z', 'message': 'INFO started', 'level': 'info'},
+            {'timestamp': '2024-01-01T00:00:01Z', 'message': 'ERROR disk full', 'level': 'error'},
+            {'timestamp': '2024-01-01T00:00:02Z', 'message': 'no newline', 'level': None}
+        ])
+        container.logs.assert_called_once_with(stream=True, follow=False, timestamps=True, tail='all', since=1700000000)
+
+    def test_filters(self):
+        chunks = iter([f'ts [{level}] request {i}\n'.encode() for i, level in enumerate(['info', 'warn', 'error', 'error'])])
+        patch_logs(self, chunks)
+        entries = list(LogStream('abc', follow=False, log_filter=LogFilter(contains='request', levels=['warning', 'error'])))
+        self.assertEqual([e['message'] for e in entries], ['[warn] request 1', '[error] request 2', '[error] request 3'])
+
+        with self.assertRaises(ValueError):
+            LogFilter(levels=['loud'])
+
+    def test_memory_stays_flat(self):
+        def chunks():
+            for i in range(100000):
+                yield f'2024-01-01T00:00:00Z line {i} with some padding text\n'.encode()
+
+        patch_logs(self, chunks())
+        tracemalloc.start()
+        count = sum(1 for _ in LogStream('abc', follow=False))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.assertEqual(count, 100000)
+        self.assertLess(peak, 1024 * 1024)
+
+class TestFollowMode(unittest.IsolatedAsyncioTestCase):
+
+    async def test_consumer_exit_closes_follow_stream(self):
+        raw = FollowStream([b'ts first\n', b'ts second\n'])
+        patch_logs(self, raw)
+        log_stream = LogStream('abc')
+
+        received = []
+        async with aclosing(iterate_in_thread(log_stream, log_stream.close)) as entries:
+            async for entry in entries:
+                received.append(entry['message'])
+                if len(received) == 2:
+                    break
+
+        self.assertEqual(received, ['first', 'second'])
+        self.assertTrue(raw.closed.wait(1))
+
+    async def test_endpoint_streams_ndjson(self):
+        patch_logs(self, iter([b'ts INFO a\nts ERROR b\n']))
+        response = await stream_logs('abc', follow=False, level='error', tail=100, since=None, contains=None)
+        self.assertEqual(response.media_type, 'application/x-ndjson')
+
+        body = [json.loads(line) async for line in response.body_iterator]
+        self.assertEqual(body, [{'timestamp': 'ts', 'message': 'ERROR b', 'level': 'error'}])
+
+    async def test_endpoint_reports_errors_in_stream(self):
+        client = MagicMock()
+        client.containers.get.side_effect = Exception('boom')
+        with patch('backend.container_stats.get_client', return_value=client):
+            response = await stream_logs('abc', follow=False, level=None, tail=100, since=None, contains=None)
+            body = [json.loads(line) async for line in response.body_iterator]
+        self.assertEqual(body, [{'error': 'boom'}])
+
+    async def test_bad_level_is_400(self):
+        with self.assertRaises(HTTPException) as cm:
+            await stream_logs('abc', level='loud')
+        self.assertEqual(cm.exception.status_code, 400)
+
+    async def test_stream_limit_is_checked_when_the_slot_is_taken(self):
+        patch_logs(self, iter([b'ts a\n']))
+        with patch('backend.main.log_stream_slots', threading.BoundedSemaphore(1)), patch('backend.main.MAX_LOG_STREAMS', 1):
+            first = await stream_logs('abc', follow=False, level=None, tail=100, since=None, contains=None)
+            # The slot is held from the response on, before its body is read
+            with self.assertRaises(HTTPException) as cm:
+                await stream_logs('abc', follow=False, level=None, tail=100, since=None, contains=None)
+            self.assertEqual(cm.exception.status_code, 503)
+
+            self.assertEqual([json.loads(line) async for line in first.body_iterator], [{'timestamp': 'ts', 'message': 'a', 'level': None}])
+            # Released by the body and again by the background task: only freed once
+            await first.background()
+            second = await stream_logs('abc', follow=False, level=None, tail=100, since=None, contains=None)
+            await second.background()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+sys.path.insert(0, os.path.join(current_dir, 'benchmarks'))
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from fake_docker import FakeDockerDaemon
+from backend.metrics import Registry, Counter, Histogram, CallbackMetric, MetricsMiddleware, docker_endpoint, DOCKER_API_REQUESTS, CONTAINER_SCAN_SECONDS, CONFIG_GENERATION_SECONDS
+from backend.docker_scan import get_running_containers
+from backend.zeronsd_writer import generate_config
+from backend.docker_clients import pool as docker_pool
+from test_conditional import call
+
+def sample(text, line_start):
+    """Value of the first exposed line starting with line_start"""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+class TestExposition(unittest.TestCase):
+
+    def test_histogram_and_counter_rendering(self):
+        registry = Registry()
+        latency = registry.register(Histogram('req_seconds', 'Request latency', ('route',), buckets=(0.1, 1.0)))
+        calls = registry.register(Counter('calls_total', 'Calls\nmade', ('path',)))
+        registry.register(CallbackMetric('rows', 'Rows', 'gauge', (), lambda: {(): 42}))
+
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.labels('/a').observe(value)
+        calls.labels('say "hi"').inc(2)
+        text = registry.render()
+
+        # Buckets are cumulative and inclusive of their bound
+        self.assertEqual(sample(text, 'req_seconds_bucket{route="/a",le="0.1"}'), 2)
+        self.assertEqual(sample(text, 'req_seconds_bucket{route="/a",le="1"}'), 3)
+        self.assertEqual(sample(text, 'req_seconds_bucket{route="/a",le="+Inf"}'), 4)
+        self.assertEqual(sample(text, 'req_seconds_count{route="/a"}'), 4)
+        self.assertAlmostEqual(sample(text, 'req_seconds_sum{route="/a"}'), 3.65)
+        self.assertIn('# TYPE req_seconds histogram', text)
+        self.assertIn('# HELP calls_total Calls\\nmade', text)
+        self.assertIn('calls_total{path="say \\"hi\\""} 2', text)
+        self.assertIn('rows 42', text)
+
+        with self.assertRaises(ValueError):
+            latency.labels('/a', 'extra')
+        with self.assertRaises(ValueError):
+            registry.register(Counter('calls_total', 'Duplicate'))
+
+    def test_failing_callback_is_skipped(self):
+        registry = Registry()
+        registry.register(CallbackMetric('broken', 'Broken', 'gauge', (), lambda: 1 / 0))
+        registry.register(Counter('ok_total', 'Fine')).inc()
+        text = registry.render()
+        self.assertNotIn('broken', text)
+        self.assertIn('ok_total 1', text)
+
+class TestDockerInstrumentation(unittest.TestCase):
+
+    def test_endpoint_labels(self):
+        self.assertEqual(docker_endpoint('/v1.47/containers/json'), '/containers/json')
+        self.assertEqual(docker_endpoint('/v1.47/containers/3f2a9c/stats'), '/containers/{id}/stats')
+        self.assertEqual(docker_endpoint('/networks/zerodeploy_default'), '/networks/{id}')
+        self.assertEqual(docker_endpoint('/_ping'), '/_ping')
+
+    def test_requests_are_counted_per_host(self):
+        with FakeDockerDaemon(containers=5, networks=1) as daemon:
+            host = daemon.url
+            try:
+                get_running_containers(remote_host=host)
+                get_running_containers(remote_host=host)
+            finally:
+                docker_pool.close_all()
+
+        listed = DOCKER_API_REQUESTS.labels(host, 'GET', '/containers/json', 200).value
+        self.assertEqual(listed, daemon.requests['containers.list'])
+        self.assertEqual(sum(CONTAINER_SCAN_SECONDS.labels(host).snapshot()[0]), 2)
+
+class TestConfigGenerationMetrics(unittest.TestCase):
+
+    def test_outcomes_are_timed(self):
+        containers = [{'name': 'web', 'ip_address': '10.0.0.2', 'dns_enabled': True}]
+        before = {outcome: sum(CONFIG_GENERATION_SECONDS.labels(outcome).snapshot()[0]) for outcome in ('written', 'unchanged')}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, 'config.toml')
+            generate_config(containers, os.path.join(temp_dir, 'missing.toml'), output, 'test.local')
+            generate_config(containers, os.path.join(temp_dir, 'missing.toml'), output, 'test.local')
+        for outcome in ('written', 'unchanged'):
+            self.assertEqual(sum(CONFIG_GENERATION_SECONDS.labels(outcome).snapshot()[0]) - before[outcome], 1)
+
+class TestMetricsMiddleware(unittest.IsolatedAsyncioTestCase):
+
+    async def test_latency_by_route_template(self):
+        async def stats(request):
+            return JSONResponse({'id': request.path_params['container_id']})
+
+        histogram = Histogram('http_seconds', 'Latency', ('method', 'route', 'status'))
+        app = MetricsMiddleware(Starlette(routes=[Route('/containers/{container_id}/stats', stats)]), histogram=histogram)
+
+        for container_id in ('a', 'b', 'c'):
+            status, _, _ = await call(app, f'/containers/{container_id}/stats')
+            self.assertEqual(status, 200)
+        status, _, _ = await call(app, '/unknown/path')
+        self.assertEqual(status, 404)
+
+        counts = {labels['route']: value for suffix, labels, value in histogram.samples() if suffix == '_count'}
+        self.assertEqual(counts, {'/containers/{container_id}/stats': 3, 'other': 1})
+
+    async def test_metrics_endpoint(self):
+        import backend.main as main
+        response = await main.get_metrics()
+        self.assertTrue(response.media_type.startswith('text/plain; version=0.0.4'))
+        text = response.body.decode()
+        for name in ('zerodeploy_http_request_duration_seconds', 'zerodeploy_config_generation_duration_seconds',
+                     'zerodeploy_zeronsd_reload_duration_seconds', 'zerodeploy_cache_hits_total'):
+            self.assertIn(f'# TYPE {name} ', text)
+        self.assertEqual(sample(text, 'zerodeploy_dns_log_entries'), 0)
+        self.assertEqual(sample(text, 'zerodeploy_cache_hits_total{cache="docker_clients"}'), docker_pool.hits)
+
+if __name__ == '__main__':
+    unittest.main()
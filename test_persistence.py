@@ -13,6 +13,7 @@ sys.path.insert(0, os.path.join(current_dir, 'app'))
 
 from backend.main import list_containers, update_domains, Request
 import backend.config_manager as config_manager
+import backend.state_store as state_store
 
 # Mock Request object
 class MockRequest:
@@ -22,16 +23,21 @@ class MockRequest:
     async def json(self):
         return self.data
 
+def remove_database(path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
 class TestPersistenceFix(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.original_settings_file = config_manager.SETTINGS_FILE
-        config_manager.SETTINGS_FILE = '/tmp/test_settings.json'
+        self.original_db_file = state_store.STATE_DB_FILE
+        state_store.STATE_DB_FILE = '/tmp/test_state.db'
 
     def tearDown(self):
-        config_manager.SETTINGS_FILE = self.original_settings_file
-        if os.path.exists('/tmp/test_settings.json'):
-            os.remove('/tmp/test_settings.json')
+        state_store.close_state_stores()
+        state_store.STATE_DB_FILE = self.original_db_file
+        remove_database('/tmp/test_state.db')
 
     @patch('backend.main.get_running_containers')
     @patch('backend.main.generate_config')
@@ -46,12 +52,11 @@ class TestPersistenceFix(unittest.IsolatedAsyncioTestCase):
         }
         # Use a deep copy or new dict to avoid reference issues
         mock_get_containers.return_value = [dict(container_data)]
-        mock_generate.return_value = True
+        mock_generate.return_value = {"added": [], "removed": [], "changed": [], "settings_changed": False, "written": True}
         mock_reload.return_value = True
 
         # Clean up
-        if os.path.exists('/tmp/test_settings.json'):
-            os.remove('/tmp/test_settings.json')
+        remove_database('/tmp/test_state.db')
 
         # 2. Verify initial listing shows enabled
         containers = await list_containers()
@@ -68,10 +73,9 @@ class TestPersistenceFix(unittest.IsolatedAsyncioTestCase):
 
         await update_domains(request)
 
-        # 4. Verify settings file was written and contains container123
-        with open('/tmp/test_settings.json', 'r') as f:
-            data = json.load(f)
-            self.assertIn('container123', data['disabled_containers'])
+        # 4. Verify the state store was written and contains container123
+        stored = state_store.StateStore('/tmp/test_state.db')
+        self.assertIn('container123', stored.disabled_containers())
 
         # 5. Verify subsequent listing shows disabled
         mock_get_containers.return_value = [dict(container_data)]
@@ -80,9 +84,8 @@ class TestPersistenceFix(unittest.IsolatedAsyncioTestCase):
 
         # 6. Simulate a stopped container scenario
         # Assume we have another container 'container_stopped' that was disabled previously.
-        # We manually add it to the settings file to simulate previous state.
-        with open('/tmp/test_settings.json', 'w') as f:
-            json.dump({"disabled_containers": ["container123", "container_stopped"]}, f)
+        # We add it through another connection to simulate previous state.
+        stored.update_disabled(disabled=["container_stopped"])
 
         # Now user updates 'container123' back to enabled.
         # The payload will ONLY contain 'container123' because 'container_stopped' is not running.
@@ -96,13 +99,13 @@ class TestPersistenceFix(unittest.IsolatedAsyncioTestCase):
 
         await update_domains(request_2)
 
-        # 7. Verify settings file:
+        # 7. Verify the state store:
         # - container123 should be removed (enabled)
         # - container_stopped should REMAIN (preserved)
-        with open('/tmp/test_settings.json', 'r') as f:
-            data = json.load(f)
-            self.assertNotIn('container123', data['disabled_containers'])
-            self.assertIn('container_stopped', data['disabled_containers'])
+        disabled = stored.disabled_containers()
+        stored.close()
+        self.assertNotIn('container123', disabled)
+        self.assertIn('container_stopped', disabled)
 
         print("Success: Stopped containers state preserved.")
 
@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.reload_scheduler import ReloadScheduler
+
+class TestReloadScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.apply_fn = MagicMock(return_value={"success": True})
+        self.scheduler = ReloadScheduler(self.apply_fn, window=0.2)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_burst_is_merged_into_one_cycle(self):
+        # Containers started one after another, each update listing all of them
+        tickets = [
+            self.scheduler.submit([{"id": f"c{j}", "name": f"svc{j}", "dns_enabled": True} for j in range(i + 1)])
+            for i in range(40)
+        ]
+        results = [ticket.future.result(timeout=5) for ticket in tickets]
+
+        self.assertEqual(self.apply_fn.call_count, 1)
+        merged, persisted = self.apply_fn.call_args[0]
+        self.assertEqual(len(merged), 40)
+        self.assertEqual(len(persisted), 40)
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual(tickets[0].status()["batch_size"], 40)
+
+        stats = self.scheduler.stats()
+        self.assertEqual((stats["requests"], stats["cycles"], stats["merged_per_cycle_max"]), (40, 1, 40))
+
+    def test_last_snapshot_per_host_wins_and_remote_configs_are_not_persisted(self):
+        self.scheduler.submit([{"id": "a", "dns_enabled": True}, {"id": "c", "dns_enabled": True}])
+        self.scheduler.submit([{"id": "b", "dns_enabled": True}], remote_host="tcp://remote:2375")
+        # "c" is gone from the local host: the later snapshot drops it
+        last = self.scheduler.submit([{"id": "a", "dns_enabled": False}])
+        last.future.result(timeout=5)
+
+        merged, persisted = self.apply_fn.call_args[0]
+        self.assertEqual(merged, [{"id": "b", "dns_enabled": True}, {"id": "a", "dns_enabled": False}])
+        self.assertEqual(persisted, [{"id": "a", "dns_enabled": False}])
+
+    def test_failed_cycle_fails_every_ticket(self):
+        self.apply_fn.side_effect = Exception("disk full")
+        ticket = self.scheduler.submit([{"id": "a"}])
+
+        with self.assertRaises(Exception):
+            ticket.future.result(timeout=5)
+        self.assertEqual(self.scheduler.get_ticket(ticket.id).status()["status"], "failed")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+import backend.state_store as state_store
+from backend.state_store import StateStore, SCHEMA, parse_timestamp
+from backend.zeronsd_writer import build_records
+from fastapi import HTTPException
+
+class RacingConnection:
+    """Connection whose first schema version read returns before another process migrates"""
+
+    def __init__(self, conn, other_process):
+        self.conn = conn
+        self.other_process = other_process
+        self.raced = False
+
+    def execute(self, sql, *args):
+        cursor = self.conn.execute(sql, *args)
+        if sql.startswith("PRAGMA user_version") and not self.raced:
+            self.raced = True
+            cursor = StaleCursor(cursor.fetchone())
+            self.other_process()
+        return cursor
+
+class StaleCursor:
+    def __init__(self, row):
+        self.row = row
+
+    def fetchone(self):
+        return self.row
+
+class JsonRequest:
+    def __init__(self, body):
+        self.body = body
+
+    async def json(self):
+        if isinstance(self.body, Exception):
+            raise self.body
+        return self.body
+
+class TestStateStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = os.path.join(self.temp_dir.name, 'state', 'zerodeploy.db')
+        self.store = StateStore(self.db_path)
+        self.addCleanup(self.store.close)
+
+    def test_database_is_created_in_wal_mode(self):
+        stats = self.store.stats()
+        self.assertEqual(stats['journal_mode'], 'wal')
+        self.assertEqual(stats['schema_version'], len(SCHEMA))
+
+        # Reopening does not re-run the migrations
+        self.store.update_disabled(disabled=['a'])
+        self.store.close()
+        reopened = StateStore(self.db_path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.disabled_containers(), ['a'])
+
+    def test_concurrent_first_start_migrates_once(self):
+        path = os.path.join(self.temp_dir.name, 'fresh.db')
+        conn = sqlite3.connect(path, isolation_level=None)
+        self.addCleanup(conn.close)
+        other = StateStore(path)
+        self.addCleanup(other.close)
+
+        # The other worker creates the schema between this one's version read and its BEGIN IMMEDIATE
+        StateStore(path)._migrate_schema(RacingConnection(conn, other.stats))
+
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], len(SCHEMA))
+
+    def test_readers_are_not_blocked_by_an_open_write(self):
+        self.store.update_disabled(disabled=['a'])
+        reader = StateStore(self.db_path)
+        self.addCleanup(reader.close)
+        with self.store.transaction() as conn:
+            conn.execute("INSERT INTO disabled_containers (container_id, disabled_at) VALUES ('b', 0)")
+            # The uncommitted row is invisible, and the read does not wait for the writer
+            self.assertEqual(reader.disabled_containers(), ['a'])
+        self.assertEqual(reader.disabled_containers(), ['a', 'b'])
+
+    def test_aliases(self):
+        self.store.set_alias('api.test.local', container_id='c1')
+        self.store.set_alias('nas.test.local', address='192.168.1.5')
+        with self.assertRaises(ValueError):
+            self.store.set_alias('bad.test.local')
+        with self.assertRaises(ValueError):
+            self.store.set_alias('bad.test.local', address='10.0.0.1', record_type='CNAME')
+        self.assertEqual([alias['name'] for alias in self.store.aliases()], ['api.test.local', 'nas.test.local'])
+
+        containers = [
+            {'id': 'c1', 'name': 'web', 'ip_address': '10.0.0.2', 'dns_enabled': True},
+            {'id': 'c2', 'name': 'db', 'ip_address': '10.0.0.3', 'dns_enabled': True}
+        ]
+        self.store.set_alias('web.test.local', address='10.9.9.9')
+        records = build_records(containers, 'test.local', self.store.aliases())
+        self.assertEqual(records['api.test.local']['address'], '10.0.0.2')
+        self.assertEqual(records['nas.test.local']['address'], '192.168.1.5')
+        # A container's own record wins over an alias with the same name
+        self.assertEqual(records['web.test.local']['address'], '10.0.0.2')
+
+        # Aliases following a disabled container are dropped with it
+        containers[0]['dns_enabled'] = False
+        self.assertNotIn('api.test.local', build_records(containers, 'test.local', self.store.aliases()))
+
+        self.assertTrue(self.store.remove_alias('api.test.local'))
+        self.assertFalse(self.store.remove_alias('api.test.local'))
+
+    def test_dns_log_batches_are_committed_with_full_sync(self):
+        conn = self.store.connection()
+        levels = []
+        with self.store.transaction(durable=True):
+            levels.append(conn.execute("PRAGMA synchronous").fetchone()[0])
+        levels.append(conn.execute("PRAGMA synchronous").fetchone()[0])
+        # FULL (2) for the transaction, back to NORMAL (1) after it
+        self.assertEqual(levels, [2, 1])
+
+        transaction = self.store.transaction
+        with patch.object(self.store, 'transaction', side_effect=transaction) as mock_transaction:
+            self.store.record_dns_accesses([{'timestamp': '2024-01-01T00:00:00Z', 'ip_address': '10.0.0.1', 'domain': 'web.test.local'}])
+        mock_transaction.assert_called_once_with(durable=True)
+
+    def test_dns_access_count(self):
+        self.assertEqual(self.store.dns_access_count(), 0)
+        entries = [{'timestamp': f'2024-01-01T00:00:0{i}Z', 'ip_address': '10.0.0.1', 'domain': 'web.test.local'} for i in range(5)]
+        self.store.record_dns_accesses(entries)
+        self.assertEqual(self.store.dns_access_count(), 5)
+        self.store.prune_dns_accesses(parse_timestamp('2024-01-01T00:00:02Z'))
+        self.assertEqual(self.store.dns_access_count(), 3)
+        # An out-of-order event pruned from between the survivors leaves a gap in the IDs
+        self.store.record_dns_accesses([
+            {'timestamp': '2024-01-01T00:00:00Z', 'ip_address': '10.0.0.2', 'domain': 'web.test.local'},
+            {'timestamp': '2024-01-01T00:00:09Z', 'ip_address': '10.0.0.2', 'domain': 'web.test.local'}
+        ])
+        self.store.prune_dns_accesses(parse_timestamp('2024-01-01T00:00:01Z'))
+        self.store.import_dns_accesses('/legacy/dns.log', [{'timestamp': '2024-01-01T00:00:10Z', 'ip_address': '10.0.0.3', 'domain': 'db.test.local'}])
+        self.assertEqual(self.store.dns_access_count(), 5)
+        self.assertEqual(self.store.dns_access_count(), self.store.stats()['rows']['dns_access'])
+
+    def test_dns_access_counter_is_seeded_for_existing_databases(self):
+        conn = self.store.connection()
+        conn.execute("INSERT INTO dns_access (ts, timestamp, ip_address, domain) VALUES (0, '', '10.0.0.1', 'web.test.local')")
+        conn.execute("DELETE FROM counters WHERE name = 'dns_access'")
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        reopened = StateStore(self.store.path)
+        self.assertEqual(reopened.dns_access_count(), 1)
+
+    def test_parse_timestamp(self):
+        self.assertEqual(parse_timestamp('2024-01-01T00:00:00Z'), 1704067200.0)
+        self.assertIsNone(parse_timestamp('yesterday'))
+        self.assertIsNone(parse_timestamp(None))
+
+class TestAliasEndpoint(unittest.IsolatedAsyncioTestCase):
+
+    async def test_invalid_bodies_are_400(self):
+        import backend.main as main
+        for body in [ValueError('not json'), ['address', '10.0.0.1'], 'x',
+                     {'address': '10.0.0.1', 'type': 'MX'}, {'address': '10.0.0.1', 'type': ['A']},
+                     {'address': 42}, {'address': 'fe80::1'}, {'address': '10.0.0.1', 'type': 'AAAA'},
+                     {'container_id': 7}, {}]:
+            with self.assertRaises(HTTPException) as cm:
+                await main.set_alias('nas', JsonRequest(body))
+            self.assertEqual(cm.exception.status_code, 400, body)
+
+    async def test_valid_alias_is_stored(self):
+        import backend.main as main
+        with patch.object(main, 'rerender_domains', AsyncMock(return_value={'success': True, 'changes': 1})):
+            result = await main.set_alias('nas', JsonRequest({'address': 'fd00::5', 'type': 'AAAA'}))
+        self.assertEqual(result['name'], main.alias_name('nas'))
+        self.assertEqual(state_store.get_state_store().aliases()[0]['type'], 'AAAA')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import time
+import tempfile
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.stats_history import StatsHistory
+from backend.main import get_stats_history
+from fastapi import HTTPException
+
+# Aligned to the hour so buckets start exactly at START
+START = 1_699_999_200.0
+
+def make_sample(cpu, rx):
+    return {
+        'cpu': {'usage_percent': cpu},
+        'memory': {'usage': 100, 'limit': 1000, 'usage_percent': 10.0},
+        'network': {'rx_bytes': rx, 'tx_bytes': 0},
+        'disk': {'read_bytes': 0, 'write_bytes': 0}
+    }
+
+class TestStatsHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, 'stats_history.bin')
+        self.history = StatsHistory(path=self.path, max_containers=3)
+
+    def record_minutes(self, container_id, minutes):
+        # One sample every 5 seconds, CPU alternating 10 / 30
+        for i in range(minutes * 12):
+            self.history.record(container_id, container_id + '-name', make_sample(10 if i % 2 else 30, i), START + i * 5)
+
+    def test_rolls_up_to_each_resolution(self):
+        self.record_minutes('abc', 3)
+        end = START + 180
+
+        fine = self.history.query('abc', START, end, '10s')
+        self.assertEqual(len(fine['points']), 18)
+        self.assertEqual(fine['points'][0]['cpu_percent'], 20.0)
+        # Counters keep the last value of the bucket
+        self.assertEqual(fine['points'][0]['rx_bytes'], 1)
+
+        minutes = self.history.query('abc', START, end, '1m')
+        self.assertEqual([p['timestamp'] for p in minutes['points']], [START, START + 60, START + 120])
+        self.assertTrue(all(p['cpu_percent'] == 20.0 for p in minutes['points']))
+
+        # Lookup by name, and automatic resolution for a long range
+        daily = self.history.query('abc-name', end - 86400, end)
+        self.assertEqual(daily['resolution'], '1m')
+
+    def test_ring_keeps_newest_buckets(self):
+        self.record_minutes('abc', 70)
+        tier = self.history._containers['abc'].tier('10s')
+        self.assertEqual(len(tier), tier.capacity)
+
+        points = self.history.query('abc', 0, START + 10 ** 6, '10s')['points']
+        timestamps = [p['timestamp'] for p in points]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(len(points), tier.capacity + 1)
+        # 420 buckets were closed; the oldest 59 have been overwritten
+        self.assertEqual(timestamps[0], START + 590)
+
+    def test_container_limit_evicts_least_recent(self):
+        for container_id in ('a', 'b', 'c', 'd'):
+            self.history.record(container_id, container_id, make_sample(1, 1), START)
+        self.assertIsNone(self.history.query('a', START - 10, START + 10))
+        self.assertEqual(self.history.stats()['containers'], 3)
+        self.assertEqual(self.history.stats()['evictions'], 1)
+
+    def test_sweep_samples_a_stable_set_over_the_limit(self):
+        containers = [{'id': f'c{i}', 'name': f'svc-{i}'} for i in range(5)]
+        with ThreadPoolExecutor(2) as executor:
+            for _ in range(3):
+                # The daemon lists the containers in a different order every time
+                containers.reverse()
+                self.assertEqual(self.history.sweep(lambda: containers, lambda _: make_sample(1, 1), executor), 3)
+
+        stats = self.history.stats()
+        self.assertEqual((stats['containers'], stats['evictions'], stats['skipped']), (3, 0, 6))
+        self.assertEqual(sorted(self.history._containers), ['c2', 'c3', 'c4'])
+
+    def test_save_and_load_round_trip(self):
+        self.record_minutes('abc', 70)
+        before = self.history.query('abc', 0, START + 10 ** 6, '1m')['points']
+        self.assertTrue(self.history.save())
+
+        restored = StatsHistory(path=self.path)
+        self.assertEqual(restored.load(), 1)
+        after = restored.query('abc-name', 0, START + 10 ** 6, '1m')['points']
+        # The still-open bucket is not persisted
+        self.assertEqual(after, before[:-1])
+
+    def test_range_query_is_fast(self):
+        self.record_minutes('abc', 60 * 24)
+        started = time.perf_counter()
+        for _ in range(100):
+            self.history.query('abc', START + 3600, START + 7200, '1m')
+        elapsed_ms = (time.perf_counter() - started) * 10
+        print(f"History range query: {elapsed_ms:.3f} ms")
+        self.assertLess(elapsed_ms, 5)
+
+class TestStatsHistoryEndpoint(unittest.TestCase):
+
+    def test_unknown_container_is_404(self):
+        with self.assertRaises(HTTPException) as cm:
+            asyncio.run(get_stats_history('missing'))
+        self.assertEqual(cm.exception.status_code, 404)
+
+    @patch('backend.main.stats_history')
+    def test_unknown_resolution_is_400(self, mock_history):
+        mock_history.query.side_effect = ValueError('Unknown resolution 5m')
+        with self.assertRaises(HTTPException) as cm:
+            asyncio.run(get_stats_history('abc', resolution='5m'))
+        self.assertEqual(cm.exception.status_code, 400)
+
+    @patch('backend.main.stats_history')
+    def test_answers_from_memory(self, mock_history):
+        mock_history.query.return_value = {'id': 'abc', 'points': []}
+        result = asyncio.run(get_stats_history('abc', START, START + 60, '10s'))
+        self.assertEqual(result['id'], 'abc')
+        mock_history.query.assert_called_once_with('abc', START, START + 60, '10s')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from backend.stats_stream import StatsBroadcaster, open_stats_stream
+
+def fake_sample(i):
+    return {
+        'cpu_stats': {'cpu_usage': {'total_usage': 200 * (i + 1)}, 'system_cpu_usage': 1000 * (i + 1), 'online_cpus': 2},
+        'precpu_stats': {'cpu_usage': {'total_usage': 200 * i}, 'system_cpu_usage': 1000 * i},
+        'memory_stats': {'usage': 50, 'limit': 100},
+        'networks': {'eth0': {'rx_bytes': i, 'tx_bytes': i}},
+        'blkio_stats': {}
+    }
+
+class FakeStatsStream:
+    """Daemon stats stream: one sample per interval until closed"""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        i = 0
+        while not self.closed.wait(self.interval):
+            yield fake_sample(i)
+            i += 1
+
+    def close(self):
+        self.closed.set()
+
+class TestStatsBroadcaster(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.container = MagicMock()
+        self.container.name = 'web'
+        client = MagicMock()
+        client.containers.get.return_value = self.container
+        patcher = patch('backend.stats_stream.get_client', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.streams = []
+        opener = patch('backend.stats_stream.open_stats_stream', side_effect=self.open_stream)
+        opener.start()
+        self.addCleanup(opener.stop)
+        self.interval = 0.02
+        self.broadcaster = StatsBroadcaster(max_streams=2)
+
+    def open_stream(self, client, container_id):
+        stream = FakeStatsStream(self.interval)
+        self.streams.append(stream)
+        return stream
+
+    def tearDown(self):
+        for subscription in list(self.broadcaster._subscriptions.values()):
+            subscription.stop()
+
+    async def test_viewers_share_one_daemon_stream(self):
+        first = self.broadcaster.subscribe('abc')
+        second = self.broadcaster.subscribe('abc')
+        self.assertIs(first[0], second[0])
+
+        for _, queue in (first, second):
+            event, sample = await asyncio.wait_for(queue.get(), timeout=2)
+            self.assertEqual(event, 'stats')
+            self.assertEqual(sample['memory']['usage_percent'], 50.0)
+        self.assertEqual(len(self.streams), 1)
+        self.assertEqual(self.broadcaster.stats()['streams'][0]['viewers'], 2)
+
+    async def test_stream_stops_after_last_viewer_leaves(self):
+        subscription, queue = self.broadcaster.subscribe('abc')
+        other = self.broadcaster.subscribe('abc')[1]
+        await asyncio.wait_for(queue.get(), timeout=2)
+
+        self.broadcaster.unsubscribe(subscription, queue)
+        self.assertFalse(subscription.stopping)
+        self.broadcaster.unsubscribe(subscription, other)
+        self.assertTrue(subscription.stopping)
+        self.assertEqual(self.broadcaster.stats()['streams'], [])
+
+        subscription._thread.join(timeout=2)
+        self.assertFalse(subscription._thread.is_alive())
+
+    async def test_unsubscribe_closes_a_waiting_daemon_stream(self):
+        # The daemon has nothing to send for a long time after the first sample
+        subscription, queue = self.broadcaster.subscribe('abc')
+        await asyncio.wait_for(queue.get(), timeout=2)
+        self.streams[0].interval = 30
+
+        self.broadcaster.unsubscribe(subscription, queue)
+        self.assertTrue(self.streams[0].closed.is_set())
+        subscription._thread.join(timeout=2)
+        self.assertFalse(subscription._thread.is_alive())
+
+    async def test_stream_limit(self):
+        self.broadcaster.subscribe('a')
+        self.broadcaster.subscribe('b')
+        with self.assertRaises(RuntimeError):
+            self.broadcaster.subscribe('c')
+
+class TestOpenStatsStream(unittest.TestCase):
+
+    def test_reads_the_decoded_stream_of_the_container(self):
+        client = MagicMock()
+        client.api.base_url = 'http+docker://localhost'
+        client.api.api_version = '1.44'
+        response = client.api.get.return_value
+        response.iter_lines.return_value = iter([json.dumps(fake_sample(0)).encode(), b'', json.dumps(fake_sample(1)).encode()])
+
+        stream = open_stats_stream(client, 'abc')
+
+        client.api.get.assert_called_once_with('http+docker://localhost/v1.44/containers/abc/stats', params={'stream': True}, stream=True)
+        self.assertEqual(list(stream), [fake_sample(0), fake_sample(1)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import time
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from backend.tracing import Tracer, TracingMiddleware, span, annotate
+from backend.docker_async import run_docker
+from test_conditional import call
+
+def slow_listing():
+    with span("docker.list"):
+        time.sleep(0.03)
+    with span("containers.parse"):
+        annotate(containers=3)
+    return ['a', 'b', 'c']
+
+class TestTracingMiddleware(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        async def items(request):
+            with span("containers.list"):
+                names = await run_docker(slow_listing)
+            return JSONResponse(names)
+
+        self.tracer = Tracer(sample_rate=0, buffer_size=2, profile_interval_ms=1)
+        self.app = TracingMiddleware(Starlette(routes=[Route('/items/{kind}', items)]), tracer=self.tracer)
+
+    async def test_untraced_requests_pass_through(self):
+        status, headers, _ = await call(self.app, '/items/all')
+        self.assertEqual(status, 200)
+        self.assertNotIn('server-timing', headers)
+        self.assertEqual(self.tracer.stats()['traced'], 0)
+
+    async def test_forced_trace_has_nested_spans_and_server_timing(self):
+        status, headers, _ = await call(self.app, '/items/all', headers={'X-ZeroDeploy-Trace': '1'})
+        self.assertEqual(status, 200)
+        timing = dict(metric.split(';', 1) for metric in headers['server-timing'].split(', '))
+        self.assertEqual(set(timing), {'containers.list', 'docker.list', 'containers.parse', 'total'})
+        self.assertGreaterEqual(float(timing['docker.list'].split('=')[1]), 30)
+
+        trace = self.tracer.get(int(headers['x-trace-id'])).to_dict()
+        self.assertEqual((trace['route'], trace['status']), ('/items/{kind}', 200))
+        # Spans opened in the worker thread nest under the one opened on the event loop
+        listing = trace['spans']['children'][0]
+        self.assertEqual(listing['name'], 'containers.list')
+        self.assertEqual([child['name'] for child in listing['children']], ['docker.list', 'containers.parse'])
+        self.assertEqual(listing['children'][1]['attributes'], {'containers': 3})
+
+    async def test_ring_buffer_keeps_latest_traces(self):
+        for _ in range(3):
+            await call(self.app, '/items/all', headers={'X-ZeroDeploy-Trace': '1'})
+        self.assertEqual([trace['id'] for trace in self.tracer.traces()], [3, 2])
+        self.assertIsNone(self.tracer.get(1))
+        self.assertEqual(self.tracer.stats()['traced'], 3)
+
+    async def test_profile_mode_samples_stacks(self):
+        _, headers, _ = await call(self.app, '/items/all', headers={'X-ZeroDeploy-Trace': 'profile'})
+        trace = self.tracer.get(int(headers['x-trace-id']))
+        self.assertTrue(trace.profiling)
+        self.assertGreater(trace.samples, 0)
+
+        lines = trace.collapsed_stacks().splitlines()
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+        # The worker thread was sampled while it slept inside slow_listing
+        self.assertTrue(any('test_tracing.py:slow_listing' in line for line in lines))
+
+class TestSpans(unittest.TestCase):
+
+    def test_span_is_a_noop_outside_a_trace(self):
+        with span("docker.list") as current:
+            annotate(ignored=True)
+        self.assertIsNone(current)
+
+if __name__ == '__main__':
+    unittest.main()
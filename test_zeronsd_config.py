@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import shutil
+import tempfile
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+import toml
+import backend.zeronsd_writer as zeronsd_writer
+
+class TestIncrementalConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.template = os.path.join(self.tmp_dir, 'config.template.toml')
+        self.output = os.path.join(self.tmp_dir, 'config.toml')
+        with open(self.template, 'w') as f:
+            f.write('network = "test.local"\n')
+        zeronsd_writer._last_render.clear()
+        self.containers = [
+            {'name': 'web', 'ip_address': '10.0.0.2', 'dns_enabled': True},
+            {'name': 'db', 'ip_address': '10.0.0.3', 'dns_enabled': True}
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        zeronsd_writer._last_render.clear()
+
+    def generate(self, containers):
+        return zeronsd_writer.generate_config(containers, self.template, self.output, 'test.local')
+
+    def test_first_render_adds_every_record(self):
+        diff = self.generate(self.containers)
+        self.assertEqual(diff['added'], ['db.test.local', 'web.test.local'])
+        self.assertTrue(diff['written'])
+        config = toml.load(self.output)
+        self.assertEqual(config['network'], 'test.local')
+        self.assertEqual(len(config['services']), 2)
+
+    def test_unchanged_records_skip_the_write(self):
+        self.generate(self.containers)
+        with patch('backend.zeronsd_writer.write_config_atomic') as mock_write:
+            diff = self.generate(self.containers)
+        mock_write.assert_not_called()
+        self.assertFalse(diff['written'])
+        self.assertEqual((diff['added'], diff['removed'], diff['changed']), ([], [], []))
+
+    def test_diff_reports_added_removed_and_changed(self):
+        self.generate(self.containers)
+        diff = self.generate([
+            {'name': 'web', 'ip_address': '10.0.0.9', 'dns_enabled': True},
+            {'name': 'db', 'ip_address': '10.0.0.3', 'dns_enabled': False},
+            {'name': 'cache', 'ip_address': '10.0.0.4', 'dns_enabled': True}
+        ])
+        self.assertEqual(diff['added'], ['cache.test.local'])
+        self.assertEqual(diff['removed'], ['db.test.local'])
+        self.assertEqual(diff['changed'], ['web.test.local'])
+        self.assertTrue(diff['written'])
+
+    def test_existing_file_seeds_the_diff_after_restart(self):
+        self.generate(self.containers)
+        zeronsd_writer._last_render.clear()
+        diff = self.generate(self.containers)
+        self.assertFalse(diff['written'])
+
+    def test_failed_write_leaves_previous_file_intact(self):
+        self.generate(self.containers)
+        with patch('backend.zeronsd_writer.toml.dump', side_effect=IOError('disk full')):
+            self.assertIsNone(self.generate(self.containers[:1]))
+        self.assertEqual(len(toml.load(self.output)['services']), 2)
+        self.assertFalse([f for f in os.listdir(self.tmp_dir) if f.startswith('.config-')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import socket
+import struct
+import threading
+import time
+
+# Robustly add path for both sandbox and container environments
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+sys.path.insert(0, os.path.join(current_dir, 'app'))
+
+import docker
+import backend.zeronsd_writer as zeronsd_writer
+
+class FakeDnsServer(threading.Thread):
+    """Answers every query with one record while ``answering`` is set"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.05)
+        self.port = self.sock.getsockname()[1]
+        self.answering = threading.Event()
+        self.answering.set()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                query, addr = self.sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            if self.answering.is_set():
+                query_id = struct.unpack('>H', query[:2])[0]
+                self.sock.sendto(struct.pack('>HHHHHH', query_id, 0x8180, 1, 1, 0, 0) + query[12:], addr)
+        self.sock.close()
+
+class TestReloadZeronsd(unittest.TestCase):
+
+    def setUp(self):
+        zeronsd_writer._zeronsd_container_id = None
+        self.container = MagicMock()
+        self.container.id = 'zid'
+        self.container.name = 'zeronsd'
+        self.client = MagicMock()
+        self.client.containers.list.return_value = [self.container]
+        self.client.containers.get.return_value = self.container
+
+    @patch.dict(os.environ, {'ZERONSD_RELOAD_MODE': 'signal'})
+    @patch('backend.zeronsd_writer.get_client')
+    def test_signal_reload_uses_cached_container_id(self, mock_get_client):
+        mock_get_client.return_value = self.client
+
+        self.assertTrue(zeronsd_writer.reload_zeronsd())
+        self.assertTrue(zeronsd_writer.reload_zeronsd())
+
+        self.client.containers.list.assert_called_once_with(filters={'name': '^/zeronsd$'})
+        self.client.containers.get.assert_called_once_with('zid')
+        self.container.kill.assert_called_with(signal='SIGHUP')
+        self.container.restart.assert_not_called()
+
+    @patch.dict(os.environ, {'ZERONSD_RELOAD_MODE': 'signal'})
+    @patch('backend.zeronsd_writer.get_client')
+    def test_failed_signal_falls_back_to_restart(self, mock_get_client):
+        mock_get_client.return_value = self.client
+        self.container.kill.side_effect = docker.errors.APIError('not running')
+
+        self.assertTrue(zeronsd_writer.reload_zeronsd())
+        self.container.restart.assert_called_once_with(timeout=10)
+
+    @patch.dict(os.environ, {}, clear=False)
+    @patch('backend.zeronsd_writer.get_client')
+    def test_restart_is_the_default(self, mock_get_client):
+        os.environ.pop('ZERONSD_RELOAD_MODE', None)
+        mock_get_client.return_value = self.client
+
+        self.assertTrue(zeronsd_writer.reload_zeronsd())
+        self.container.kill.assert_not_called()
+        self.container.restart.assert_called_once_with(timeout=10)
+        self.assertEqual(zeronsd_writer.get_reload_stats()['last_method'], 'restart')
+
+    @patch.dict(os.environ, {'ZERONSD_RELOAD_MODE': 'watch'})
+    @patch('backend.zeronsd_writer.get_client')
+    def test_unknown_mode_restarts(self, mock_get_client):
+        mock_get_client.return_value = self.client
+
+        self.assertTrue(zeronsd_writer.reload_zeronsd())
+        self.container.restart.assert_called_once_with(timeout=10)
+        self.assertEqual(zeronsd_writer.get_reload_stats()['mode'], 'restart')
+
+class TestResolutionProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeDnsServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stopped.set()
+        self.server.join()
+
+    def make_probe(self):
+        probe = zeronsd_writer.ResolutionProbe('dns.vexinet.local', '127.0.0.1', port=self.server.port, window=0.6, interval=0.02)
+        probe.baseline = probe.resolve()
+        probe.reload_issued()
+        return probe
+
+    def test_no_gap_while_server_keeps_answering(self):
+        probe = self.make_probe()
+        probe.start()
+        probe.join()
+        self.assertEqual(zeronsd_writer.RELOAD_STATS['last_gap_ms'], 0.0)
+
+    def test_gap_is_measured_when_server_stops_answering(self):
+        probe = self.make_probe()
+        self.server.answering.clear()
+        threading.Timer(0.3, self.server.answering.set).start()
+        probe.start()
+        probe.join()
+        self.assertGreaterEqual(zeronsd_writer.RELOAD_STATS['last_gap_ms'], 250)
+
+    @patch('backend.zeronsd_writer.get_client')
+    def test_outage_during_a_blocking_restart_is_measured(self, mock_get_client):
+        container = MagicMock()
+        container.id = 'zid'
+        container.name = 'zeronsd'
+        mock_get_client.return_value.containers.list.return_value = [container]
+        zeronsd_writer._zeronsd_container_id = None
+
+        def restart(timeout):
+            # ZeroNSD is down for the whole restart call and back when it returns
+            self.server.answering.clear()
+            time.sleep(0.3)
+            self.server.answering.set()
+        container.restart.side_effect = restart
+
+        env = {'ZERONSD_RELOAD_MODE': 'restart', 'ZERONSD_PROBE_NAME': 'dns.vexinet.local', 'ZERONSD_PROBE_SERVER': '127.0.0.1',
+               'ZERONSD_PROBE_PORT': str(self.server.port), 'ZERONSD_PROBE_WINDOW': '0.2', 'ZERONSD_PROBE_INTERVAL': '0.02'}
+        probes = []
+        start_probe = zeronsd_writer.start_resolution_probe
+        with patch.dict(os.environ, env), \
+                patch('backend.zeronsd_writer.start_resolution_probe', side_effect=lambda: probes.append(start_probe()) or probes[-1]):
+            self.assertTrue(zeronsd_writer.reload_zeronsd())
+        probes[0].join(timeout=5)
+        self.assertGreaterEqual(zeronsd_writer.RELOAD_STATS['last_gap_ms'], 250)
+
+if __name__ == '__main__':
+    unittest.main()